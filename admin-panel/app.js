@@ -6,6 +6,13 @@ let currentGymId = null;
 let currentGymName = null;
 let currentAdminUsername = null;
 let allMembers = [];
+let membersNextCursor = null;
+let memberSearchTimer = null;
+const MEMBERS_PAGE_SIZE = 100;
+// Antrenör modalındaki üye seçici, üye tablosundan bağımsız kendi sorgusunu yapar
+let pickerMembers = [];
+let pickerSearchTimer = null;
+const MEMBER_PICKER_LIMIT = 50;
 let allTrainers = [];
 let allPrograms = [];
 let allExercises = [];
@@ -98,13 +105,22 @@ async function loadStats() {
 }
 
 // ==================== MEMBERS ====================
-async function loadMembers() {
+// Üyeler sayfa sayfa (keyset) yüklenir; append=true ise mevcut listenin sonuna eklenir
+async function loadMembers(append = false) {
+    const query = document.getElementById('memberSearch').value.trim();
+    const params = new URLSearchParams({ limit: MEMBERS_PAGE_SIZE });
+    if (query) params.set('q', query);
+    if (append && membersNextCursor) params.set('cursor', membersNextCursor);
+    
     try {
-        const response = await fetch(`${API_BASE}/admin/gym/${currentGymId}/members`);
+        const response = await fetch(`${API_BASE}/admin/gym/${currentGymId}/members?${params}`);
         if (response.ok) {
-            allMembers = await response.json();
+            const page = await response.json();
+            allMembers = append ? allMembers.concat(page) : page;
+            membersNextCursor = response.headers.get('X-Next-Cursor');
             renderMembersTable(allMembers);
-            renderRecentMembers(allMembers.slice(0, 5));
+            document.getElementById('loadMoreMembers').classList.toggle('d-none', !membersNextCursor);
+            if (!append && !query) renderRecentMembers(allMembers.slice(0, 5));
         }
     } catch (error) {
         console.log('Members error:', error);
@@ -158,16 +174,14 @@ function renderRecentMembers(members) {
     `).join('');
 }
 
-// Member Search
-document.getElementById('memberSearch').addEventListener('input', (e) => {
-    const query = e.target.value.toLowerCase();
-    const filtered = allMembers.filter(m => 
-        m.name.toLowerCase().includes(query) || 
-        m.email.toLowerCase().includes(query)
-    );
-    renderMembersTable(filtered);
+// Member Search (sunucu tarafında ad/email öneki)
+document.getElementById('memberSearch').addEventListener('input', () => {
+    clearTimeout(memberSearchTimer);
+    memberSearchTimer = setTimeout(() => loadMembers(), 300);
 });
 
+document.getElementById('loadMoreMembers').addEventListener('click', () => loadMembers(true));
+
 // Add Member
 document.getElementById('membershipType').addEventListener('change', (e) => {
     document.getElementById('timedOptions').classList.toggle('d-none', e.target.value !== 'timed');
@@ -361,39 +375,75 @@ function renderTrainersList(trainers) {
 }
 
 // Add Trainer
-function populateMemberDropdown(selectId, selectedMemberId = null) {
+// Üye seçici: aktif üyeleri sunucudan arar (allMembers yalnızca tablonun o anki sayfasıdır).
+// Antrenörün bağlı olduğu üye sonuçlarda yoksa bile seçili seçenek olarak eklenir,
+// böylece kaydetmek bağlantıyı koparmaz.
+async function populateMemberDropdown(selectId, selectedMemberId = null, query = '') {
     const select = document.getElementById(selectId);
+    const params = new URLSearchParams({ active: 1, limit: MEMBER_PICKER_LIMIT });
+    if (query) params.set('q', query);
+    
+    try {
+        const response = await fetch(`${API_BASE}/admin/gym/${currentGymId}/members?${params}`);
+        pickerMembers = response.ok ? await response.json() : [];
+    } catch (error) {
+        console.log('Member picker error:', error);
+        pickerMembers = [];
+    }
+    
+    // Kullanıcı bu arada başka bir seçim yaptıysa onu koru
+    const current = select.value ? parseInt(select.value) : selectedMemberId;
     select.innerHTML = '<option value="">-- Mevcut üye seçin (opsiyonel) --</option>';
     
     // Zaten trainer olan üyeleri bul
     const trainerMemberIds = allTrainers.map(t => t.member_id).filter(id => id !== null);
     
-    allMembers.forEach(m => {
-        // Sadece aktif üyeleri listele ve zaten trainer olmayanları
-        if (m.is_active && (!trainerMemberIds.includes(m.member_id) || m.member_id === selectedMemberId)) {
-            const option = document.createElement('option');
-            option.value = m.member_id;
-            option.textContent = `${m.name} (${m.email})`;
-            if (m.member_id === selectedMemberId) {
-                option.selected = true;
-            }
-            select.appendChild(option);
+    const addOption = (memberId, label) => {
+        const option = document.createElement('option');
+        option.value = memberId;
+        option.textContent = label;
+        option.selected = memberId === current;
+        select.appendChild(option);
+    };
+    
+    // Seçili üye listede yoksa (başka sayfada, pasif ya da aramaya uymuyor) yine de ekle
+    if (current !== null && !pickerMembers.some(m => m.member_id === current)) {
+        const trainer = allTrainers.find(t => t.member_id === current);
+        addOption(current, trainer ? `${trainer.name} (${trainer.member_email || '#' + current})` : `Üye #${current}`);
+    }
+    
+    pickerMembers.forEach(m => {
+        // Sadece zaten trainer olmayanları listele (sunucu yalnızca aktif üyeleri döner)
+        if (!trainerMemberIds.includes(m.member_id) || m.member_id === current) {
+            addOption(m.member_id, `${m.name} (${m.email})`);
         }
     });
 }
 
-// Üye seçilince adını otomatik doldur
-document.getElementById('trainerMemberId').addEventListener('change', (e) => {
-    if (e.target.value) {
-        const member = allMembers.find(m => m.member_id == e.target.value);
-        if (member) {
-            document.getElementById('trainerName').value = member.name;
+function bindMemberPicker(searchId, selectId, nameId) {
+    document.getElementById(searchId).addEventListener('input', (e) => {
+        clearTimeout(pickerSearchTimer);
+        pickerSearchTimer = setTimeout(() => populateMemberDropdown(selectId, null, e.target.value.trim()), 300);
+    });
+    
+    // Üye seçilince adını otomatik doldur
+    document.getElementById(selectId).addEventListener('change', (e) => {
+        if (e.target.value) {
+            const member = pickerMembers.find(m => m.member_id == e.target.value);
+            if (member) {
+                document.getElementById(nameId).value = member.name;
+            }
         }
-    }
-});
+    });
+}
+
+bindMemberPicker('trainerMemberSearch', 'trainerMemberId', 'trainerName');
+bindMemberPicker('editTrainerMemberSearch', 'editTrainerMemberId', 'editTrainerName');
 
 // Modal açılınca üyeleri yükle
 document.getElementById('addTrainerModal').addEventListener('show.bs.modal', () => {
+    document.getElementById('trainerMemberSearch').value = '';
+    document.getElementById('trainerMemberId').value = '';
     populateMemberDropdown('trainerMemberId');
 });
 
@@ -443,20 +493,15 @@ function openEditTrainerModal(trainerId, name, specialty, isInGym, memberId) {
     document.getElementById('editTrainerInGym').value = isInGym;
     
     // Üye dropdown'ını doldur ve seçili üyeyi işaretle
+    const select = document.getElementById('editTrainerMemberId');
+    select.innerHTML = '<option value="">-- Mevcut üye seçin (opsiyonel) --</option>';
+    select.value = '';
+    document.getElementById('editTrainerMemberSearch').value = '';
     populateMemberDropdown('editTrainerMemberId', memberId);
     
     new bootstrap.Modal(document.getElementById('editTrainerModal')).show();
 }
 
-document.getElementById('editTrainerMemberId').addEventListener('change', (e) => {
-    if (e.target.value) {
-        const member = allMembers.find(m => m.member_id == e.target.value);
-        if (member) {
-            document.getElementById('editTrainerName').value = member.name;
-        }
-    }
-});
-
 document.getElementById('confirmEditTrainer').addEventListener('click', async () => {
     const trainerId = document.getElementById('editTrainerId').value;
     const name = document.getElementById('editTrainerName').value;
@@ -1,12 +1,369 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, has_request_context, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import pyodbc
-from datetime import date
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+import base64
+import bisect
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import logging.handlers
 import os
+import queue
+import re
+import threading
+import time
+
+# İsteğe bağlı hızlandırıcılar: kurulu değilse standart json / sadece gzip kullanılır
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+class RowBlock:
+    """
+    Tek bir kolon başlığını paylaşan satır bloğu.
+    Satırlar pyodbc Row (tuple benzeri) olarak tutulur, satır başına dict üretilmez.
+    Büyük listelemelerde (üye, antrenör) bellek ve CPU tasarrufu sağlar.
+    columnar=True ise JSON çıktısı {"columns": [...], "rows": [[...], ...]} biçimindedir.
+    """
+    __slots__ = ('columns', 'rows', 'columnar')
+
+    def __init__(self, columns, rows, columnar=False):
+        self.columns = tuple(columns)
+        self.rows = rows
+        self.columnar = columnar
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        # Geriye uyumluluk: satırlar gerektiğinde tek tek dict olarak üretilir
+        columns = self.columns
+        for row in self.rows:
+            yield dict(zip(columns, row))
+
+# --- İSTEK ÖLÇÜMLERİ (METRICS) ---
+METRICS_CONFIG = {
+    # METRICS_ENABLED=0 ölçümü kapatır; cursor yolunda sadece bir thread-local okuması kalır
+    'enabled': os.environ.get('METRICS_ENABLED', '1') == '1',
+    # SERVER_TIMING=1 her yanıta Server-Timing başlığı ekler (tarayıcı geliştirici araçlarında görünür)
+    'server_timing': os.environ.get('SERVER_TIMING', '0') == '1'
+}
+
+# Aktif isteğin ölçümü (thread başına); ölçüm kapalıyken veya istek dışında None
+_request_state = threading.local()
+
+class RequestMetrics:
+    """Tek bir isteğin veritabanı ve serileştirme ölçümleri (nanosaniye)."""
+    __slots__ = ('started', 'queries', 'db_ns', 'rows', 'serialize_ns', 'slowest_ns', 'slowest_sql',
+                 'body_bytes', 'sent_bytes', 'compress_ns')
+
+    def __init__(self):
+        self.started = time.perf_counter_ns()
+        self.queries = 0
+        self.db_ns = 0
+        self.rows = 0
+        self.serialize_ns = 0
+        self.slowest_ns = 0
+        self.slowest_sql = None
+        self.body_bytes = 0   # sıkıştırma öncesi yanıt gövdesi
+        self.sent_bytes = 0   # gönderilen (sıkıştırılmışsa sıkıştırılmış) gövde
+        self.compress_ns = 0
+
+    def record_query(self, sql, elapsed_ns):
+        self.queries += 1
+        self.db_ns += elapsed_ns
+        if elapsed_ns > self.slowest_ns:
+            self.slowest_ns = elapsed_ns
+            self.slowest_sql = sql
+
+    def server_timing(self, total_ns):
+        """Server-Timing başlık değeri (HTTP başlığı olduğu için sadece ASCII)."""
+        def ms(ns):
+            return f"{ns / 1e6:.2f}"
+        app_ns = max(total_ns - self.db_ns - self.serialize_ns - self.compress_ns, 0)
+        return (f'db;dur={ms(self.db_ns)};desc="{self.queries} sorgu", rows;desc="{self.rows}", '
+                f'json;dur={ms(self.serialize_ns)}, compress;dur={ms(self.compress_ns)}, '
+                f'app;dur={ms(app_ns)}, total;dur={ms(total_ns)}')
+
+def current_metrics():
+    return getattr(_request_state, 'metrics', None)
+
+# --- YAVAŞ SORGU KAYDI ---
+SLOW_QUERY_CONFIG = {
+    # SLOW_QUERY_ENABLED=0 kaydı kapatır
+    'enabled': os.environ.get('SLOW_QUERY_ENABLED', '1') == '1',
+    'threshold_ms': float(os.environ.get('SLOW_QUERY_MS', 200)),      # bu süreyi aşan ifadeler kaydedilir
+    'buffer_size': int(os.environ.get('SLOW_QUERY_BUFFER', 200)),     # bellekte tutulan son yavaş çalıştırma
+    # Doluysa her kayıt bu dosyaya JSON satırı olarak eklenir (boyut aşılınca döner)
+    'log_file': os.environ.get('SLOW_QUERY_LOG_FILE', ''),
+    'log_max_bytes': int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 5 * 1024 * 1024)),
+    'log_backups': int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', 3))
+}
+
+# Fingerprint: literal ve placeholder'lar '?' olur, IN listeleri ve çok satırlı VALUES tek gruba iner
+_FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), '?'),
+    (re.compile(r'"(?:[^"\\]|\\.)*"'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s|\?'), '?'),
+    (re.compile(r'\s+'), ' '),
+    (re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE), 'IN (?+)'),
+    (re.compile(r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+'), r'\1+'),
+)
+
+@functools.lru_cache(maxsize=2048)
+def sql_fingerprint(sql):
+    """Normalize edilmiş SQL ve kısa kimliği: (fingerprint_id, fingerprint)."""
+    text = sql.strip().rstrip(';')
+    for pattern, replacement in _FINGERPRINT_RULES:
+        text = pattern.sub(replacement, text)
+    text = text.strip()
+    return hashlib.md5(text.encode('utf-8')).hexdigest()[:12], text
+
+class SlowQueryLog:
+    """
+    Eşiği aşan SQL çalıştırmaları. Son buffer_size kayıt halka tamponda tutulur;
+    fingerprint başına özet (sayı, toplam/en yüksek süre, en yavaşın route'u) ayrıca birikir.
+    Parametre değerleri (şifre vb.) kaydedilmez, sadece sayıları.
+    """
+    def __init__(self, threshold_ms, buffer_size, log_file='', log_max_bytes=5 * 1024 * 1024, log_backups=3):
+        self.threshold_ns = int(threshold_ms * 1e6)
+        self.buffer_size = buffer_size
+        self._recent = deque(maxlen=buffer_size)
+        self._digest = OrderedDict()  # fingerprint_id -> özet (en eski kullanılan atılır)
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.log_file = log_file
+        self._logger = None
+        if log_file:
+            handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=log_max_bytes, backupCount=log_backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger = logging.getLogger('gympro.slow_queries')
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.addHandler(handler)
+
+    def record(self, sql, params, elapsed_ns, kind):
+        fingerprint_id, fingerprint = sql_fingerprint(sql)
+        if has_request_context():
+            method = request.method
+            route = request.url_rule.rule if request.url_rule else request.path
+        else:
+            # İstek dışı: turnike yazıcısı, rollup işçisi, komut satırı betikleri
+            method, route = None, f"<{threading.current_thread().name}>"
+        try:
+            size = len(params) if params is not None else 0
+        except TypeError:
+            size = None
+        entry = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'ms': round(elapsed_ns / 1e6, 3),
+            'fingerprint_id': fingerprint_id,
+            'fingerprint': fingerprint,
+            'method': method,
+            'route': route,
+            'kind': kind,
+            # execute için parametre sayısı, toplu çağrılarda satır sayısı
+            'params': size
+        }
+        with self._lock:
+            self.recorded += 1
+            self._recent.append(entry)
+            digest = self._digest.get(fingerprint_id)
+            if digest is None:
+                digest = self._digest[fingerprint_id] = {
+                    'fingerprint_id': fingerprint_id, 'fingerprint': fingerprint,
+                    'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'max_route': None, 'last_seen': None
+                }
+                if len(self._digest) > self.buffer_size:
+                    self._digest.popitem(last=False)
+            else:
+                self._digest.move_to_end(fingerprint_id)
+            digest['count'] += 1
+            digest['total_ms'] += entry['ms']
+            digest['last_seen'] = entry['ts']
+            if entry['ms'] > digest['max_ms']:
+                digest['max_ms'] = entry['ms']
+                digest['max_route'] = route
+        if self._logger is not None:
+            self._logger.info(json.dumps(entry, ensure_ascii=False))
+
+    def recent(self, limit=50):
+        """En yeni yavaş çalıştırmalar (yeniden eskiye)."""
+        with self._lock:
+            return list(self._recent)[::-1][:limit]
+
+    def top(self, limit=20):
+        """Toplam süreye göre en pahalı fingerprint'ler."""
+        with self._lock:
+            digests = [dict(d) for d in self._digest.values()]
+        digests.sort(key=lambda d: d['total_ms'], reverse=True)
+        for digest in digests:
+            digest['total_ms'] = round(digest['total_ms'], 3)
+            digest['avg_ms'] = round(digest['total_ms'] / digest['count'], 3)
+        return digests[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._digest.clear()
+            self.recorded = 0
+
+slow_query_log = SlowQueryLog(
+    SLOW_QUERY_CONFIG['threshold_ms'], SLOW_QUERY_CONFIG['buffer_size'], SLOW_QUERY_CONFIG['log_file'],
+    SLOW_QUERY_CONFIG['log_max_bytes'], SLOW_QUERY_CONFIG['log_backups']
+) if SLOW_QUERY_CONFIG['enabled'] else None
+
+def _timed_statement(method):
+    """DictCursor çalıştırma metodlarının süresini aktif isteğin ölçümüne ve yavaş sorgu kaydına ekler."""
+    kind = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, sql, *args, **kwargs):
+        metrics = getattr(_request_state, 'metrics', None)
+        if metrics is None and slow_query_log is None:
+            return method(self, sql, *args, **kwargs)
+        start = time.perf_counter_ns()
+        try:
+            return method(self, sql, *args, **kwargs)
+        finally:
+            elapsed_ns = time.perf_counter_ns() - start
+            if metrics is not None:
+                metrics.record_query(sql, elapsed_ns)
+            if slow_query_log is not None and elapsed_ns >= slow_query_log.threshold_ns:
+                slow_query_log.record(sql, args[0] if args else None, elapsed_ns, kind)
+    return wrapper
+
+def _count_rows(count):
+    metrics = getattr(_request_state, 'metrics', None)
+    if metrics is not None:
+        metrics.rows += count
+
+# --- JSON KODLAYICI ---
+JSON_CONFIG = {
+    # auto: orjson kuruluysa onu, değilse standart json'u kullanır; 'json' ile zorlanabilir
+    'backend': os.environ.get('JSON_BACKEND', 'auto')
+}
+
+def json_default(obj):
+    """
+    Kodlayıcıların doğrudan bilmediği tipler.
+    Tarih/saat ISO-8601 metni, Decimal (ör. rating_avg) sayı olarak yazılır.
+    """
+    if hasattr(obj, 'isoformat'):  # date, datetime, time
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, RowBlock):
+        return list(obj)
+    if isinstance(obj, (set, frozenset, deque)):
+        return list(obj)
+    # dataclass, UUID vb. için Flask'ın varsayılanı
+    return DefaultJSONProvider.default(obj)
+
+class StdlibJSONEncoder:
+    """Standart json modülü; kompakt ayraçlar, UTF-8 karakterler kaçışsız."""
+    name = 'json'
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(default=json_default, ensure_ascii=False, separators=(',', ':'))
+
+    def encode(self, obj):
+        return self._encoder.encode(obj).encode('utf-8')
+
+class OrjsonEncoder:
+    """orjson: datetime/date/time'ı yerel olarak, Decimal'i json_default ile yazar; doğrudan bytes üretir."""
+    name = 'orjson'
+
+    def encode(self, obj):
+        return orjson.dumps(obj, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+def make_json_encoder(backend):
+    if backend == 'orjson' or (backend == 'auto' and orjson is not None):
+        if orjson is None:
+            raise RuntimeError("JSON_BACKEND=orjson fakat orjson kurulu değil (pip install orjson)")
+        return OrjsonEncoder()
+    return StdlibJSONEncoder()
+
+class GymJSONProvider(DefaultJSONProvider):
+    """
+    Yanıtları seçilen kodlayıcıyla (orjson / json) doğrudan bytes olarak üreten JSON sağlayıcı.
+    RowBlock'lar dict listesine dönüştürülmeden, parça parça serileştirilir.
+    """
+    block_chunk_size = 1000
+
+    def __init__(self, app, encoder=None):
+        super().__init__(app)
+        self.encoder = encoder or make_json_encoder(JSON_CONFIG['backend'])
+
+    def dumps(self, obj, **kwargs):
+        # Kodlayıcı çıktısı her zaman kompakttır; separators/indent gibi argümanlar yok sayılır
+        return self.dumpb(obj).decode('utf-8')
+
+    def dumpb(self, obj):
+        metrics = getattr(_request_state, 'metrics', None)
+        start = time.perf_counter_ns() if metrics is not None else 0
+        if isinstance(obj, RowBlock):
+            body = self._dumps_block(obj)
+        else:
+            body = self.encoder.encode(obj)
+        if metrics is not None:
+            metrics.serialize_ns += time.perf_counter_ns() - start
+        return body
+
+    def response(self, *args, **kwargs):
+        # str'e çevirip yeniden kodlamadan bytes gövde
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumpb(obj), mimetype=self.mimetype)
+
+    def _dumps_block(self, block):
+        encode = self.encoder.encode
+        if block.columnar:
+            return encode({'columns': block.columns, 'rows': list(map(tuple, block.rows))})
+        # Her seferinde sadece bir parçanın dict'leri bellekte bulunur
+        columns, rows, size = block.columns, block.rows, self.block_chunk_size
+        parts = []
+        for start in range(0, len(rows), size):
+            chunk = [dict(zip(columns, row)) for row in rows[start:start + size]]
+            parts.append(encode(chunk)[1:-1])
+        return b'[' + b','.join(parts) + b']'
+
+def wants_columnar():
+    """İstemci ?format=columnar ile kolon bazlı (başlık + satır dizisi) çıktı isteyebilir."""
+    return request.args.get('format') == 'columnar'
+
+def wants_ndjson():
+    """İstemci ?format=ndjson veya Accept: application/x-ndjson ile satır satır JSON isteyebilir."""
+    if request.args.get('format') == 'ndjson':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    return best == 'application/x-ndjson' and request.accept_mimetypes['application/x-ndjson'] > request.accept_mimetypes['application/json']
+
+def wants_stream():
+    """Listeleme endpoint'lerinde ?stream=1 veya NDJSON isteği akış (streaming) modunu açar."""
+    return request.args.get('stream') in ('1', 'true') or wants_ndjson()
 
 app = Flask(__name__)
+app.json = GymJSONProvider(app)
 # CORS: Frontend (Web/Mobil) uygulamasının bu API'ye erişmesine izin verir.
-CORS(app)
+# X-Next-Cursor: sayfalı listelerde bir sonraki sayfanın imleci (tarayıcıdan okunabilmesi için)
+# Server-Timing: SERVER_TIMING=1 iken istek başına DB/serileştirme süreleri
+CORS(app, expose_headers=['X-Next-Cursor', 'Server-Timing'])
 
 # --- VERİTABANI KONFİGÜRASYONU (ODBC) ---
 # MySQL ODBC Driver kullanarak bağlantı
@@ -18,80 +375,1026 @@ DB_CONFIG = {
     'pwd': os.environ.get('DB_PASSWORD', 'Halil_2003')
 }
 
+# --- BAĞLANTI HAVUZU KONFİGÜRASYONU ---
+# Her istekte ODBC handshake yapmak yerine bağlantılar havuzda tutulur.
+POOL_CONFIG = {
+    'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+    'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+    'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 5)),             # saniye: boş bağlantı bekleme süresi
+    'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),         # saniye: boşta kalan bağlantı yenilenir
+    'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)) # saniye: eski bağlantı yenilenir
+}
+
+# Çoklu ifade (MULTI_STATEMENTS) sadece turnike yazıcısının ayrı bağlantılarında açılır:
+# INSERT + LAST_INSERT_ID() ve toplu kredi UPDATE'leri orada tek round-trip'te gider.
+# Havuzdaki genel bağlantılar tek ifade çalıştırır; olası bir SQL enjeksiyonu ek ifade
+# (stacked query) çalıştıramaz. DB_MULTI_STATEMENTS=0 yazıcıda da kapatır.
+WRITER_POOL_CONFIG = {
+    'multi_statements': os.environ.get('DB_MULTI_STATEMENTS', '1') == '1',
+    'max_size': int(os.environ.get('DB_WRITER_POOL_MAX', 2))
+}
+
+# INSERT ifadesini ve VALUES (...) grubunu (varsa ON DUPLICATE KEY UPDATE ekiyle) tanımak için
+_INSERT_RE = re.compile(r'^\s*INSERT\b', re.IGNORECASE)
+_VALUES_RE = re.compile(r'\bVALUES\s*(\(.*?\))(\s+ON\s+DUPLICATE\s+KEY\s+UPDATE\b.*)?\s*$',
+                        re.IGNORECASE | re.DOTALL)
+
+class _Statement:
+    """Önbellekteki tek bir SQL ifadesi: çevrilmiş SQL, INSERT mi, kolon başlıkları."""
+    __slots__ = ('sql', 'is_insert', 'columns', 'hits')
+
+    def __init__(self, sql):
+        # MySQL %s placeholder -> ODBC ? placeholder
+        self.sql = sql.replace('%s', '?')
+        self.is_insert = bool(_INSERT_RE.match(sql))
+        self.columns = None
+        self.hits = 0
+
+class StatementCache:
+    """
+    SQL metnine göre anahtarlanan LRU ifade önbelleği.
+    app.py'deki endpoint'ler sabit SQL metinleri kullandığından her execute'ta
+    %s -> ? çevirisi ve kolon listesi yeniden üretilmez.
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, sql):
+        with self._lock:
+            entry = self._entries.get(sql)
+            if entry is not None:
+                self._entries.move_to_end(sql)
+                self.hits += 1
+                entry.hits += 1
+                return entry
+            self.misses += 1
+            entry = self._entries[sql] = _Statement(sql)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return entry
+
+    def stats(self, top=10):
+        """Hit/miss sayaçları ve en çok kullanılan ifadeler."""
+        with self._lock:
+            total = self.hits + self.misses
+            hottest = sorted(self._entries.items(), key=lambda item: item[1].hits, reverse=True)[:top]
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'top': [{'sql': ' '.join(sql.split())[:120], 'hits': entry.hits} for sql, entry in hottest]
+            }
+
+statement_cache = StatementCache(int(os.environ.get('STATEMENT_CACHE_SIZE', 256)))
+
+class BatchResultError(pyodbc.Error):
+    """
+    Çoklu ifade batch'i, gönderilen ifade sayısı kadar satır sayısı döndürmedi.
+    Batch'in bir kısmı çalışmış olabilir: transaction geri alınmalı ve ifadeler tek tek tekrarlanmalıdır.
+    """
+
+# lastrowid henüz sorgulanmadı: ilk okunduğunda aynı bağlantıda LAST_INSERT_ID() ile alınır
+_LASTROWID_PENDING = object()
+
 class DictCursor:
     """pyodbc cursor'ı mysql.connector dictionary cursor gibi davranmasını sağlar"""
-    def __init__(self, cursor, as_dict=True):
+    # Sürücü çoklu ifade batch'ini bir kez reddederse (ör. sunucu tarafı prepared statement
+    # kullanan bir ODBC yapılandırması) süreç boyunca tek ifadelik yola geçilir
+    batching_rejected = False
+
+    def __init__(self, cursor, as_dict=True, multi_statements=False):
         self._cursor = cursor
         self._columns = None
         self._as_dict = as_dict
+        self._multi_statements = multi_statements
+        self._lastrowid = None
+        self._rowcount = None
+
+    def _batching(self):
+        return self._multi_statements and not DictCursor.batching_rejected
     
+    @_timed_statement
     def execute(self, sql, params=None):
-        # MySQL %s placeholder -> ODBC ? placeholder
-        sql = sql.replace('%s', '?')
+        statement = statement_cache.get(sql)
+        if statement.is_insert:
+            self._lastrowid = self._execute_insert(statement.sql, params)
+            return self
+        self._lastrowid = None
+        self._rowcount = None
+        if params:
+            self._cursor.execute(statement.sql, params)
+        else:
+            self._cursor.execute(statement.sql)
+        description = self._cursor.description
+        if description:
+            # Kolon başlıkları ifade başına bir kez üretilir
+            columns = statement.columns
+            if columns is None or len(columns) != len(description):
+                columns = statement.columns = tuple(column[0] for column in description)
+            self._columns = columns
+        return self
+    
+    def _run(self, sql, params):
         if params:
             self._cursor.execute(sql, params)
         else:
             self._cursor.execute(sql)
-        if self._cursor.description:
-            self._columns = [column[0] for column in self._cursor.description]
-        return self
+
+    def _execute_insert(self, sql, params):
+        """
+        INSERT'i çalıştırır. Çoklu ifade açık (yazıcı havuzu) bağlantıda INSERT ve
+        LAST_INSERT_ID() tek round-trip'te gönderilir ve id hemen döner. Diğer bağlantılarda
+        yalnızca INSERT gider; id, lastrowid okunursa ayrı bir sorguyla alınır.
+        """
+        if not self._batching():
+            self._run(sql, params)
+            self._rowcount = self._cursor.rowcount
+            return _LASTROWID_PENDING
+        try:
+            self._run(sql.rstrip().rstrip(';') + "; SELECT LAST_INSERT_ID()", params)
+        except pyodbc.ProgrammingError:
+            # Batch bütünüyle reddedildi (hiçbir ifadesi çalışmadı); tek ifadeyle tekrar dene.
+            # Tek ifade de başarısız olursa hata batch'le ilgili değildir ve yukarı iletilir.
+            self._run(sql, params)
+            self._rowcount = self._cursor.rowcount
+            DictCursor.batching_rejected = True
+            return _LASTROWID_PENDING
+        self._rowcount = self._cursor.rowcount
+        try:
+            if not self._cursor.nextset():
+                return _LASTROWID_PENDING
+        except pyodbc.ProgrammingError:
+            # INSERT çalıştı; yalnızca id sorgusu sonuç vermedi, INSERT tekrarlanmamalı
+            DictCursor.batching_rejected = True
+            return _LASTROWID_PENDING
+        row = self._cursor.fetchone()
+        return row[0] if row else None
+
+    @_timed_statement
+    def _query_lastrowid(self, sql):
+        self._cursor.execute(sql)
+        row = self._cursor.fetchone()
+        return row[0] if row else None
+
+    def _execute_each(self, statement, chunk):
+        counts = []
+        for params in chunk:
+            self._cursor.execute(statement, params)
+            counts.append(self._cursor.rowcount)
+        return counts
+
+    def _execute_chunk(self, statement, chunk):
+        """
+        Parça tek batch olarak gönderilir; her ifadenin satır sayısı nextset() ile okunur.
+        Batch ProgrammingError ile kesilirse (tamamen reddedildi veya bir ifadesi hata verdi)
+        hata veren ifadeden önceki ifadeler çalışmıştır: yalnızca kalanlar tek tek çalıştırılır.
+        """
+        counts = []
+        try:
+            self._cursor.execute('; '.join([statement] * len(chunk)), [value for row in chunk for value in row])
+            counts.append(self._cursor.rowcount)
+            while len(counts) < len(chunk) and self._cursor.nextset():
+                counts.append(self._cursor.rowcount)
+        except pyodbc.ProgrammingError:
+            # Kalanlardan ilki tek başına da hata verirse hata batch'le ilgili değildir ve yukarı iletilir
+            counts.extend(self._execute_each(statement, chunk[len(counts):]))
+            DictCursor.batching_rejected = True
+            return counts
+        if len(counts) != len(chunk):
+            # Sonuçlar ifadelerle eşleştirilemez; bu sürücüde batch yolu bir daha denenmez
+            DictCursor.batching_rejected = True
+            raise BatchResultError(f'Batch {len(chunk)} ifade içeriyordu, {len(counts)} satır sayısı döndü')
+        return counts
+    
+    @_timed_statement
+    def execute_batch(self, sql, seq_params, batch_size=100):
+        """
+        Aynı DML ifadesini (UPDATE/DELETE) her parametre seti için sırayla çalıştırır.
+        Çoklu ifade açık bağlantıda ifadeler batch_size'lık parçalar halinde tek round-trip'te,
+        değilse tek tek gönderilir.
+        Dönüş: her ifadenin etkilediği satır sayısı (sırasıyla).
+        Sürücü eksik satır sayısı döndürürse BatchResultError fırlatılır; çağıran
+        transaction'ı geri alıp tekrar denemelidir (tekrar denemede ifadeler tek tek gider).
+        """
+        statement = statement_cache.get(sql).sql.rstrip().rstrip(';')
+        seq_params = list(seq_params)
+        counts = []
+        for i in range(0, len(seq_params), batch_size):
+            chunk = seq_params[i:i + batch_size]
+            if len(chunk) > 1 and self._batching():
+                counts.extend(self._execute_chunk(statement, chunk))
+            else:
+                counts.extend(self._execute_each(statement, chunk))
+        self._rowcount = sum(counts)
+        return counts
+    
+    @_timed_statement
+    def insert_many(self, sql, seq_params, batch_size=500):
+        """
+        Aynı INSERT'i birden çok satır için çok satırlı VALUES ile çalıştırır
+        (her batch tek ifade, tek round-trip) ve etkilenen satır sayısını döner.
+        sql tek satırlık VALUES (%s, ...) grubu içermelidir. ON DUPLICATE KEY UPDATE eki korunur.
+        Üretilen ID'ler döndürülmez: innodb_autoinc_lock_mode=2 (MySQL 8 varsayılanı) eşzamanlı
+        yazmalarda çok satırlı INSERT'e ardışık ID bloğu garanti etmez. ID gerekiyorsa
+        satır başına execute() kullanılmalıdır.
+        """
+        sql = statement_cache.get(sql).sql
+        match = _VALUES_RE.search(sql)
+        if not match:
+            raise ValueError('insert_many için VALUES (...) içeren bir INSERT gerekli')
+        prefix, group, suffix = sql[:match.start(1)], match.group(1), match.group(2) or ''
+        seq_params = list(seq_params)
+        total = 0
+        for i in range(0, len(seq_params), batch_size):
+            chunk = seq_params[i:i + batch_size]
+            self._cursor.execute(prefix + ', '.join([group] * len(chunk)) + suffix,
+                                 [value for row in chunk for value in row])
+            total += self._cursor.rowcount
+        self._rowcount = total
+        self._lastrowid = None
+        return total
     
     def fetchone(self):
         row = self._cursor.fetchone()
+        if row:
+            _count_rows(1)
         if row and self._columns and self._as_dict:
             return dict(zip(self._columns, row))
         return row
     
     def fetchall(self):
         rows = self._cursor.fetchall()
+        _count_rows(len(rows))
         if rows and self._columns and self._as_dict:
             return [dict(zip(self._columns, row)) for row in rows]
         return rows
     
+    def iter_blocks(self, size):
+        """Sonucu fetchmany ile en fazla 'size' satırlık RowBlock'lar halinde üretir."""
+        columns = self._columns or ()
+        while True:
+            rows = self._cursor.fetchmany(size)
+            if not rows:
+                return
+            _count_rows(len(rows))
+            yield RowBlock(columns, rows)
+    
+    @property
+    def columns(self):
+        return self._columns or ()
+    
+    def fetchall_block(self, columnar=False):
+        """Tüm sonucu dict üretmeden, ortak başlıklı bir RowBlock olarak döner."""
+        rows = self._cursor.fetchall()
+        _count_rows(len(rows))
+        return RowBlock(self._columns or (), rows, columnar=columnar)
+    
     def close(self):
         self._cursor.close()
     
     @property
     def lastrowid(self):
-        self._cursor.execute("SELECT @@IDENTITY")
-        result = self._cursor.fetchone()
-        return result[0] if result else None
+        if self._lastrowid is _LASTROWID_PENDING:
+            # Aynı bağlantıda, araya başka INSERT girmeden sorgulanır (execute her ifadede sıfırlar)
+            self._lastrowid = self._query_lastrowid("SELECT LAST_INSERT_ID()")
+        return self._lastrowid
     
     @property
     def rowcount(self):
+        if self._rowcount is not None:
+            return self._rowcount
         return self._cursor.rowcount
 
 class ConnectionWrapper:
     """pyodbc connection'ı mysql.connector gibi davranmasını sağlar"""
-    def __init__(self, conn):
+    def __init__(self, conn, pool=None, created_at=None, multi_statements=False):
         self._conn = conn
+        self._pool = pool
+        self._created_at = created_at if created_at is not None else time.monotonic()
+        self._closed = False
+        self.multi_statements = multi_statements
     
     def cursor(self, dictionary=False):
         cursor = self._conn.cursor()
         # Her zaman wrapper kullan (%s -> ? dönüşümü için)
-        return DictCursor(cursor, as_dict=dictionary)
+        return DictCursor(cursor, as_dict=dictionary, multi_statements=self.multi_statements)
     
     def commit(self):
         self._conn.commit()
     
+    def rollback(self):
+        self._conn.rollback()
+    
     def close(self):
-        self._conn.close()
+        # Havuzdan alınan bağlantı kapatılmaz, havuza geri verilir
+        if self._closed:
+            return
+        self._closed = True
+        if self._pool is not None:
+            self._pool.release(self._conn, self._created_at)
+        else:
+            self._conn.close()
 
-def get_db_connection():
-    """ODBC kullanarak veritabanı bağlantısı oluşturur ve döner."""
+class PoolTimeoutError(Exception):
+    """Havuzda belirtilen süre içinde boş bağlantı bulunamadığında fırlatılır."""
+
+class ConnectionPool:
+    """
+    Sınırlı (bounded) ODBC bağlantı havuzu.
+    - min_size kadar bağlantı önceden açılır, max_size aşılmaz.
+    - Havuz doluysa istek 'timeout' saniye boyunca boş bağlantı bekler.
+    - Ödünç verilen bağlantı 'SELECT 1' ile kontrol edilir, bozuksa yenisi açılır.
+    - max_idle süresince boşta kalan veya max_lifetime'ı aşan bağlantılar yenilenir.
+    """
+    def __init__(self, connect, min_size=2, max_size=10, timeout=5.0,
+                 max_idle=300.0, max_lifetime=1800.0, multi_statements=False):
+        self._connect = connect
+        self.multi_statements = multi_statements
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._in_use = 0
+        self._total = 0
+        self._cond = threading.Condition()
+        self._counters = {
+            'created': 0, 'recycled': 0, 'broken': 0, 'checkouts': 0,
+            'waits': 0, 'timeouts': 0, 'wait_time_total': 0.0, 'wait_time_max': 0.0
+        }
+        for _ in range(min(self.min_size, self.max_size)):
+            self._idle.append(self._open())
+
+    def _open(self):
+        conn = self._connect()
+        now = time.monotonic()
+        self._total += 1
+        self._counters['created'] += 1
+        return (conn, now, now)
+
+    def _discard(self, conn):
+        self._total -= 1
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+    def _is_expired(self, created_at, last_used, now):
+        return (now - last_used > self.max_idle) or (now - created_at > self.max_lifetime)
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except pyodbc.Error:
+            return False
+
+    def acquire(self):
+        """Havuzdan sağlıklı bir bağlantı ödünç alır."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        while True:
+            candidate = None
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    # Süresi dolmuş boş bağlantıları temizle
+                    while self._idle:
+                        conn, created_at, last_used = self._idle.pop()
+                        if self._is_expired(created_at, last_used, now):
+                            self._counters['recycled'] += 1
+                            self._discard(conn)
+                            continue
+                        candidate = (conn, created_at)
+                        break
+                    if candidate is not None:
+                        break
+                    if self._total < self.max_size:
+                        # Yer ayır, bağlantıyı kilit dışında aç
+                        self._total += 1
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._counters['timeouts'] += 1
+                        raise PoolTimeoutError('Veritabanı bağlantı havuzu dolu')
+                    waited = True
+                    self._cond.wait(remaining)
+                self._in_use += 1
+
+            if candidate is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                candidate = (conn, time.monotonic())
+                with self._cond:
+                    self._counters['created'] += 1
+            elif not self._is_healthy(candidate[0]):
+                # Bozuk bağlantıyı at ve tekrar dene
+                with self._cond:
+                    self._in_use -= 1
+                    self._counters['broken'] += 1
+                    self._discard(candidate[0])
+                    self._cond.notify()
+                continue
+
+            wait_time = time.monotonic() - start
+            with self._cond:
+                self._counters['checkouts'] += 1
+                if waited:
+                    self._counters['waits'] += 1
+                self._counters['wait_time_total'] += wait_time
+                self._counters['wait_time_max'] = max(self._counters['wait_time_max'], wait_time)
+            return ConnectionWrapper(candidate[0], pool=self, created_at=candidate[1],
+                                     multi_statements=self.multi_statements)
+
+    def release(self, conn, created_at):
+        """Bağlantıyı havuza iade eder. Commit edilmemiş işlemler geri alınır."""
+        try:
+            conn.rollback()
+            healthy = True
+        except pyodbc.Error:
+            healthy = False
+        with self._cond:
+            self._in_use -= 1
+            now = time.monotonic()
+            if not healthy:
+                self._counters['broken'] += 1
+                self._discard(conn)
+            elif now - created_at > self.max_lifetime:
+                self._counters['recycled'] += 1
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at, now))
+            self._cond.notify()
+
+    def stats(self):
+        """Havuzu boyutlandırmak için anlık sayaçlar."""
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update({
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'total': self._total,
+                'min_size': self.min_size,
+                'max_size': self.max_size
+            })
+        checkouts = stats['checkouts']
+        stats['wait_time_avg'] = round(stats['wait_time_total'] / checkouts, 6) if checkouts else 0.0
+        stats['wait_time_total'] = round(stats['wait_time_total'], 6)
+        stats['wait_time_max'] = round(stats['wait_time_max'], 6)
+        return stats
+
+def _connect_raw(multi_statements=False):
+    """ODBC üzerinden ham (havuzsuz) bir pyodbc bağlantısı açar."""
     connection_string = (
         f"DRIVER={DB_CONFIG['driver']};"
         f"SERVER={DB_CONFIG['server']};"
         f"DATABASE={DB_CONFIG['database']};"
         f"UID={DB_CONFIG['uid']};"
-        f"PWD={DB_CONFIG['pwd']}"
+        f"PWD={DB_CONFIG['pwd']};"
     )
-    conn = pyodbc.connect(connection_string)
-    return ConnectionWrapper(conn)
+    if multi_statements:
+        connection_string += "MULTI_STATEMENTS=1"
+    return pyodbc.connect(connection_string)
+
+_pool = None
+_writer_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Bağlantı havuzunu ilk kullanımda oluşturur."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_connect_raw, **POOL_CONFIG)
+    return _pool
+
+def get_writer_pool():
+    """Çoklu ifade açık bağlantıların küçük havuzu (turnike yazıcısı). Kapalıysa genel havuz."""
+    global _writer_pool
+    if not WRITER_POOL_CONFIG['multi_statements']:
+        return get_pool()
+    if _writer_pool is None:
+        with _pool_lock:
+            if _writer_pool is None:
+                options = dict(POOL_CONFIG, min_size=0, max_size=WRITER_POOL_CONFIG['max_size'])
+                _writer_pool = ConnectionPool(functools.partial(_connect_raw, multi_statements=True),
+                                              multi_statements=True, **options)
+    return _writer_pool
+
+def get_db_connection(multi_statements=False):
+    """
+    Havuzdan bir veritabanı bağlantısı ödünç alır. close() bağlantıyı havuza iade eder.
+    multi_statements=True yalnızca sabit SQL çalıştıran yazma yolları (turnike yazıcısı) içindir.
+    """
+    return (get_writer_pool() if multi_statements else get_pool()).acquire()
+
+# Akış modunda her fetchmany çağrısında okunacak satır sayısı
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 500))
+
+def stream_listing(conn, cursor, columnar=False, ndjson=False):
+    """
+    Çalıştırılmış bir sorgunun sonucunu fetchmany ile parça parça okuyup
+    JSON dizisi (veya NDJSON) olarak akıtır. Bellek kullanımı salon büyüklüğüyle değil,
+    STREAM_CHUNK_SIZE ile sınırlıdır. Cursor ve bağlantı yanıt kapanınca serbest bırakılır.
+    """
+    columns = cursor.columns
+
+    def dumps(obj):
+        # jsonify ile aynı kompakt çıktı
+        return app.json.dumps(obj, separators=(',', ':'))
+
+    def generate():
+        if ndjson:
+            for block in cursor.iter_blocks(STREAM_CHUNK_SIZE):
+                yield ''.join(dumps(row) + '\n' for row in block)
+            return
+        yield '{"columns":' + dumps(list(columns)) + ',"rows":[' if columnar else '['
+        first = True
+        for block in cursor.iter_blocks(STREAM_CHUNK_SIZE):
+            block.columnar = False
+            body = dumps(list(map(tuple, block.rows)) if columnar else block)[1:-1].strip()
+            if not body:
+                continue
+            yield body if first else ',' + body
+            first = False
+        yield ']}' if columnar else ']'
+
+    released = []
+    def release():
+        if not released:
+            released.append(True)
+            cursor.close()
+            conn.close()
+
+    mimetype = 'application/x-ndjson' if ndjson else app.json.mimetype
+    response = Response(generate(), mimetype=mimetype)
+    response.call_on_close(release)
+    return response
+
+@app.errorhandler(PoolTimeoutError)
+def handle_pool_timeout(error):
+    return jsonify({'error': 'Sunucu şu an yoğun, lütfen tekrar deneyin'}), 503
 
 # IntegrityError için pyodbc exception kullan
 IntegrityError = pyodbc.IntegrityError
 
+# --- DOLULUK TAKİBİ KONFİGÜRASYONU ---
+OCCUPANCY_CONFIG = {
+    # saat: çıkış okutmadan bu süreyi aşan giriş artık "içeride" sayılmaz (0 = süresiz)
+    'expire_hours': float(os.environ.get('OCCUPANCY_EXPIRE_HOURS', 4))
+}
+
+class OccupancyTracker:
+    """
+    Salon bazlı anlık doluluk sayacı.
+    Her salon için içerideki üyeler {member_id: giriş_zamanı} olarak giriş sırasıyla tutulur.
+    - Turnike checkin/checkout sonrası record() ile güncellenir.
+    - Salon ilk okunduğunda (veya rebuild ile) turnike geçmişinden yeniden kurulur.
+    - Çıkış okutmayı unutan üyeler expire_hours sonunda otomatik düşülür.
+    Okuma, TurnstileEvent tablosunu taramadan O(1) yapılır.
+    """
+    def __init__(self, expire_hours=4.0):
+        self.expire = timedelta(hours=expire_hours) if expire_hours > 0 else None
+        self._inside = {}    # gym_id -> OrderedDict(member_id -> entered_at)
+        self._pending = {}   # gym_id -> yükleme sırasında gelen olaylar
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _apply(inside, member_id, direction, ts):
+        if member_id is None:
+            return
+        if direction == 'in':
+            inside.pop(member_id, None)
+            inside[member_id] = ts
+        else:
+            inside.pop(member_id, None)
+
+    def _prune(self, inside, now):
+        # Giriş sırasıyla tutulduğu için süresi dolanlar hep baştadır
+        if self.expire is None:
+            return
+        limit = now - self.expire
+        while inside:
+            member_id, entered_at = next(iter(inside.items()))
+            if entered_at >= limit:
+                break
+            inside.popitem(last=False)
+
+    def record(self, gym_id, member_id, direction, ts=None):
+        """Yazılmış (commit edilmiş) bir turnike olayını sayaca işler."""
+        gym_id, member_id = int(gym_id), int(member_id)
+        ts = ts or datetime.now()
+        if direction == 'in' and self.expire is not None and ts < datetime.now() - self.expire:
+            # Geç gelen (eski tarihli) giriş artık içeride sayılmaz
+            direction = 'out'
+        with self._lock:
+            if gym_id in self._pending:
+                self._pending[gym_id].append((member_id, direction, ts))
+            inside = self._inside.get(gym_id)
+            if inside is not None:
+                self._apply(inside, member_id, direction, ts)
+            # Yüklenmemiş salon: ilk okumada geçmişten kurulacak
+
+    def _load(self, conn, gym_ids):
+        """Verilen salonların durumunu turnike geçmişinden kurar."""
+        gym_ids = [int(g) for g in gym_ids]
+        if not gym_ids:
+            return
+        with self._lock:
+            for gym_id in gym_ids:
+                self._pending[gym_id] = []
+
+        try:
+            placeholders = ', '.join(['%s'] * len(gym_ids))
+            sql = f"""
+                SELECT gym_id, member_id, direction, ts
+                FROM TurnstileEvent
+                WHERE gym_id IN ({placeholders})
+            """
+            params = list(gym_ids)
+            if self.expire is not None:
+                sql += " AND ts >= %s"
+                params.append(datetime.now() - self.expire)
+            sql += " ORDER BY ts, event_id"
+
+            states = {gym_id: OrderedDict() for gym_id in gym_ids}
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                for gym_id, member_id, direction, ts in cursor.fetchall():
+                    self._apply(states[gym_id], member_id, direction, ts)
+            finally:
+                cursor.close()
+
+            with self._lock:
+                for gym_id, inside in states.items():
+                    # Sorgu sürerken gelen olayları sırayla tekrar uygula
+                    for member_id, direction, ts in self._pending.get(gym_id, ()):
+                        self._apply(inside, member_id, direction, ts)
+                    self._inside[gym_id] = inside
+        finally:
+            with self._lock:
+                for gym_id in gym_ids:
+                    self._pending.pop(gym_id, None)
+
+    def people_inside(self, gym_id, conn):
+        """Salondaki anlık kişi sayısını döner. Salon yüklenmemişse önce geçmişten kurulur."""
+        return self.people_inside_many([gym_id], conn)[int(gym_id)]
+
+    def people_inside_many(self, gym_ids, conn):
+        """
+        Birden fazla salonun doluluğunu {gym_id: kişi_sayısı} olarak döner.
+        Yüklenmemiş salonlar tek bir toplu sorgu ile kurulur (salon başına sorgu yok).
+        """
+        gym_ids = [int(g) for g in gym_ids]
+        missing = [g for g in set(gym_ids) if g not in self._inside]
+        if missing:
+            self._load(conn, missing)
+        now = datetime.now()
+        counts = {}
+        with self._lock:
+            for gym_id in gym_ids:
+                inside = self._inside.get(gym_id)
+                if inside is None:
+                    counts[gym_id] = 0
+                    continue
+                self._prune(inside, now)
+                counts[gym_id] = len(inside)
+        return counts
+
+    def loaded_count(self, gym_id):
+        """Salon bellekte kuruluysa doluluğunu, değilse None döner (veritabanına gitmez)."""
+        with self._lock:
+            inside = self._inside.get(int(gym_id))
+            if inside is None:
+                return None
+            self._prune(inside, datetime.now())
+            return len(inside)
+
+    def reset(self):
+        """Tüm sayaçları unutur; salonlar bir sonraki okumada geçmişten yeniden kurulur."""
+        with self._lock:
+            self._inside.clear()
+
+    def rebuild(self, conn, gym_ids=None):
+        """Sayaçları turnike geçmişinden sıfırdan kurar. gym_ids verilmezse tüm salonlar."""
+        if gym_ids is None:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT gym_id FROM Gym")
+                gym_ids = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        with self._lock:
+            for gym_id in gym_ids:
+                self._inside.pop(int(gym_id), None)
+        self._load(conn, gym_ids)
+
+occupancy = OccupancyTracker(**OCCUPANCY_CONFIG)
+
+# --- MATERYALİZE SALON İSTATİSTİKLERİ (GymStats) ---
+# GymStats, admin paneli istatistiklerini salon başına tek satırda tutar.
+# Yazma endpoint'leri sayaçları kendi transaction'ları içinde artırıp azaltır;
+# refresh_gym_stats() ise satırları ana tablolardan baştan hesaplar (rebuild_stats.py).
+GYM_STATS_COLUMNS = ('total_members', 'active_members', 'total_trainers', 'trainers_in_gym')
+
+def bump_gym_stats(cursor, gym_id, **deltas):
+    """
+    Bir salonun sayaçlarını verilen farklar kadar değiştirir (commit çağıranda).
+    Örn: bump_gym_stats(cursor, 1, total_members=1, active_members=1)
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    unknown = set(deltas) - set(GYM_STATS_COLUMNS)
+    if unknown:
+        raise ValueError(f"Bilinmeyen istatistik kolonu: {', '.join(sorted(unknown))}")
+    assignments = ', '.join(f"{column} = GREATEST({column} + %s, 0)" for column in deltas)
+    cursor.execute(f"UPDATE GymStats SET {assignments} WHERE gym_id = %s",
+                   list(deltas.values()) + [gym_id])
+
+def store_people_inside(conn, counts):
+    """Doluluk sayaçlarının {gym_id: kişi} değerlerini GymStats'e yazar ve commit eder."""
+    if not counts:
+        return
+    cases = ' '.join(['WHEN %s THEN %s'] * len(counts))
+    ids_in = ', '.join(['%s'] * len(counts))
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            UPDATE GymStats SET people_inside = CASE gym_id {cases} END 
+            WHERE gym_id IN ({ids_in})
+        """, [value for item in counts.items() for value in item] + list(counts))
+        conn.commit()
+    finally:
+        cursor.close()
+
+def refresh_people_inside(conn):
+    """
+    Tüm salonların anlık doluluğunu GymStats.people_inside'a tek UPDATE ile yazar.
+    Turnike yazma yolu bu kolonu güncellemez; rollup işçisi (ROLLUP_INTERVAL) ve
+    rollup_turnstile.py her turda bunu çağırır. Kolon yalnızca sayacı bellekte olmayan
+    okuyucular içindir (ör. başka bir süreç) ve en fazla bir rollup turu kadar geriden gelir.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT gym_id FROM Gym")
+        gym_ids = [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+    store_people_inside(conn, occupancy.people_inside_many(gym_ids, conn))
+
+def refresh_gym_stats(conn, gym_ids=None):
+    """
+    GymStats satırlarını ana tablolardan yeniden hesaplar (yoksa oluşturur).
+    gym_ids verilmezse tüm salonlar. Doluluk, turnike geçmişinden yeniden kurulur.
+    Dönüş: yenilenen salon sayısı.
+    """
+    cursor = conn.cursor()
+    try:
+        if gym_ids is None:
+            cursor.execute("SELECT gym_id FROM Gym")
+            gym_ids = [row[0] for row in cursor.fetchall()]
+        gym_ids = [int(g) for g in gym_ids]
+        if not gym_ids:
+            return 0
+        today = date.today()
+        placeholders = ', '.join(['%s'] * len(gym_ids))
+        # Bugünkü girişler ts aralığı ile sayılır (DATE(ts) = CURDATE() indeksi kullanamaz)
+        cursor.execute(f"""
+            INSERT INTO GymStats (gym_id, total_members, active_members, total_trainers,
+                                  trainers_in_gym, stats_date, today_entries, people_inside)
+            SELECT g.gym_id,
+                (SELECT COUNT(*) FROM Membership ms WHERE ms.gym_id = g.gym_id),
+                (SELECT COUNT(*) FROM Membership ms WHERE ms.gym_id = g.gym_id AND ms.is_active = 1),
+                (SELECT COUNT(*) FROM Trainer t WHERE t.gym_id = g.gym_id),
+                (SELECT COUNT(*) FROM Trainer t WHERE t.gym_id = g.gym_id AND t.is_in_gym = 1),
+                %s,
+                (SELECT COUNT(*) FROM TurnstileEvent te 
+                 WHERE te.gym_id = g.gym_id AND te.direction = 'in' AND te.ts >= %s AND te.ts < %s),
+                0
+            FROM Gym g
+            WHERE g.gym_id IN ({placeholders})
+            ON DUPLICATE KEY UPDATE
+                total_members = VALUES(total_members),
+                active_members = VALUES(active_members),
+                total_trainers = VALUES(total_trainers),
+                trainers_in_gym = VALUES(trainers_in_gym),
+                stats_date = VALUES(stats_date),
+                today_entries = VALUES(today_entries)
+        """, [today, today, today + timedelta(days=1)] + gym_ids)
+        conn.commit()
+    finally:
+        cursor.close()
+
+    occupancy.rebuild(conn, gym_ids)
+    store_people_inside(conn, occupancy.people_inside_many(gym_ids, conn))
+    return len(gym_ids)
+
+# --- UYGULAMA İÇİ ÖNBELLEK ---
+CACHE_CONFIG = {
+    # CACHE_DISABLED=1 tüm önbellekleri devre dışı bırakır (hata ayıklama için)
+    'enabled': os.environ.get('CACHE_DISABLED', '0') != '1',
+    'exercise_ttl': float(os.environ.get('EXERCISE_CACHE_TTL', 300)),  # saniye
+    'eligibility_ttl': float(os.environ.get('ELIGIBILITY_CACHE_TTL', 60)),  # saniye
+    'workout_ttl': float(os.environ.get('WORKOUT_CACHE_TTL', 300))  # saniye
+}
+
+# İsimle erişilebilen önbellekler (istatistik ve manuel temizleme için)
+CACHES = {}
+
+class TTLCache:
+    """
+    Süreli (TTL) read-through önbellek.
+    Değer yoksa veya süresi dolduysa loader çağrılır ve sonucu saklanır.
+    Yükleme sürerken invalidate() çağrılırsa eski sonuç önbelleğe yazılmaz.
+    """
+    def __init__(self, name, ttl):
+        self.name = name
+        self.ttl = ttl
+        self.enabled = CACHE_CONFIG['enabled']
+        self._data = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.invalidations = 0
+        CACHES[name] = self
+
+    def get_or_load(self, key, loader, bypass=False):
+        if bypass or not self.enabled:
+            with self._lock:
+                self.bypassed += 1
+            return loader()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+        value = loader()
+        with self._lock:
+            if generation == self._generation:
+                self._data[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self, key=None):
+        """Tek bir anahtarı veya (key=None) tüm önbelleği geçersiz kılar."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'ttl': self.ttl,
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+def cache_bypassed():
+    """?nocache=1 ile tek bir istek için önbellek atlanabilir (hata ayıklama)."""
+    return request.args.get('nocache') == '1'
+
+# Egzersiz kataloğu neredeyse hiç değişmez: bellek içi ExerciseIndex burada tutulur
+exercise_cache = TTLCache('exercises', CACHE_CONFIG['exercise_ttl'])
+
+def invalidate_exercise_cache():
+    """Exercise tablosu değiştiğinde çağrılmalıdır."""
+    exercise_cache.invalidate()
+    # Program ağaçları egzersiz adlarını ve kas gruplarını içerir
+    workout_cache.invalidate()
+    resource_versions.bump('exercises')
+
+# --- KOŞULLU GET (ETag / Last-Modified) ---
+CONDITIONAL_GET_CONFIG = {
+    'enabled': os.environ.get('CONDITIONAL_GET_ENABLED', '1') == '1',
+    # Doğrudan veritabanı düzenlemeleri sürüm sayacına yansımaz; ETag en geç bu kadar
+    # saniyede bir kendiliğinden değişir (0 = yalnızca sürüm değişince)
+    'max_age': int(os.environ.get('ETAG_MAX_AGE', 300))
+}
+
+class ResourceVersions:
+    """
+    Nadiren değişen kaynaklar için süreç içi sürüm sayaçları.
+    Yazma endpoint'leri ilgili kaynağı bump() ile artırır; okuma endpoint'leri ETag'i
+    sorgu çalıştırmadan bu sayaçlardan üretir. boot_id, yeniden başlatmada sayaçlar
+    sıfırlandığında eski ETag'lerin yanlışlıkla eşleşmesini önler.
+
+    Sınırlamalar:
+    - Sayaçlar ve boot_id süreç başınadır (tek süreç varsayımı). Birden çok worker'da her
+      worker'ın ETag'i farklıdır (başka worker'a düşen istek 200 alır, yanlış 304 almaz);
+      ancak bir worker'daki bump diğerlerine ulaşmaz, onlar eski içeriğe en fazla
+      ETAG_MAX_AGE saniye daha 304 dönebilir.
+    - Yalnızca bu uygulamanın yazma endpoint'leri bump() çağırır. Veritabanına doğrudan
+      yapılan değişiklikler (populate_saas.py, rebuild_stats.py, elle SQL) sayaçlara yansımaz;
+      ETag en geç ETAG_MAX_AGE penceresi dolunca değişir. Hemen yansıması için
+      POST /api/admin/cache/<kaynak>/invalidate çağrılmalıdır.
+    """
+    def __init__(self, names):
+        self.boot_id = os.urandom(4).hex()
+        started = int(time.time())
+        self._versions = {name: (0, started) for name in names}
+        self._lock = threading.Lock()
+
+    def bump(self, name):
+        with self._lock:
+            version, modified_at = self._versions[name]
+            # Last-Modified saniye çözünürlüklüdür; aynı saniyedeki iki yazma da ayırt edilmeli
+            self._versions[name] = (version + 1, max(int(time.time()), modified_at + 1))
+
+    def get(self, name):
+        return self._versions[name]
+
+    def __contains__(self, name):
+        return name in self._versions
+
+resource_versions = ResourceVersions(('workouts', 'exercises', 'gyms'))
+
+def conditional(*resources):
+    """
+    GET endpoint'ine sürüm tabanlı ETag / Last-Modified desteği ekler.
+    İstekteki If-None-Match (yoksa If-Modified-Since) güncel sürümle eşleşirse
+    view hiç çalıştırılmadan 304 döner. ETag, kaynak sürümlerinin yanında URL'yi
+    (sorgu parametreleri dahil) içerdiğinden her filtre kendi doğrulayıcısını alır.
+    Sürümlerin tazeliği için ResourceVersions'taki sınırlamalara bakın.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not CONDITIONAL_GET_CONFIG['enabled'] or cache_bypassed():
+                return view(*args, **kwargs)
+
+            max_age = CONDITIONAL_GET_CONFIG['max_age']
+            now = int(time.time())
+            window = now // max_age if max_age > 0 else 0
+            versions = [resource_versions.get(name) for name in resources]
+            last_modified = max([modified_at for _, modified_at in versions] + [window * max_age])
+            scope = hashlib.md5(request.full_path.encode('utf-8')).hexdigest()[:8]
+            etag = '-'.join([resource_versions.boot_id, f"w{window}", scope] +
+                            [f"{name}{version}" for name, (version, _) in zip(resources, versions)])
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = since is not None and since.timestamp() >= last_modified
+
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.last_modified = datetime.fromtimestamp(last_modified, tz=timezone.utc)
+            if COMPRESSION_CONFIG['enabled']:
+                # 304, aynı isteğin 200 yanıtının Vary başlığını taşımalı (sıkıştırma gövde
+                # boyutuna bağlı olduğundan 304'te bilinmez; iki yanıtta da her zaman eklenir)
+                response.vary.add('Accept-Encoding')
+            # İstemci önbellekte tutabilir ama her kullanımda doğrulamalıdır
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
 # ==================================================================
 # 1. KİMLİK DOĞRULAMA (AUTHENTICATION) & KAYIT
 # ==================================================================
@@ -178,18 +1481,15 @@ def get_my_memberships():
         """, (member_id,))
         gyms = cursor.fetchall()
         
+        # Tüm salonların doluluğu tek seferde (salon başına sorgu atılmaz)
+        inside_counts = occupancy.people_inside_many([gym['gym_id'] for gym in gyms], conn)
+        
         # Her gym için doluluk oranı hesapla
         for gym in gyms:
             gym_id = gym['gym_id']
             capacity = gym.get('capacity', 100)
             
-            cursor.execute("SELECT count(*) as cnt FROM TurnstileEvent WHERE gym_id = %s AND direction='in'", (gym_id,))
-            total_in = cursor.fetchone()['cnt']
-            
-            cursor.execute("SELECT count(*) as cnt FROM TurnstileEvent WHERE gym_id = %s AND direction='out'", (gym_id,))
-            total_out = cursor.fetchone()['cnt']
-            
-            people_inside = max(0, total_in - total_out)
+            people_inside = inside_counts[gym_id]
             occupancy_rate = (people_inside / capacity) * 100 if capacity > 0 else 0
             
             gym['people_inside'] = people_inside
@@ -224,14 +1524,8 @@ def gym_dashboard(gym_id):
             
         capacity = gym_data['capacity']
 
-        # Sadece seçilen şubenin turnike verilerini say
-        cursor.execute("SELECT count(*) as cnt FROM TurnstileEvent WHERE gym_id = %s AND direction='in'", (gym_id,))
-        total_in = cursor.fetchone()['cnt']
-        
-        cursor.execute("SELECT count(*) as cnt FROM TurnstileEvent WHERE gym_id = %s AND direction='out'", (gym_id,))
-        total_out = cursor.fetchone()['cnt']
-        
-        people_inside = max(0, total_in - total_out)
+        # Sadece seçilen şubenin anlık doluluk sayacı
+        people_inside = occupancy.people_inside(gym_id, conn)
         occupancy_rate = (people_inside / capacity) * 100 if capacity > 0 else 0
 
         response_data['gym_status'] = {
@@ -277,54 +1571,154 @@ def gym_dashboard(gym_id):
 # 3. ANTRENMAN YÖNETİMİ (HİBRİT İÇERİK MODELİ)
 # ==================================================================
 
+# --- ANTRENMAN KATALOĞU ---
+# Bir kapsamın (global: gym_id NULL, ya da tek bir salon) programları egzersiz listeleriyle
+# tek sorguda okunur. <=> NULL-güvenli eşitliktir: %s = None iken global programları seçer.
+WORKOUT_CATALOG_SQL = """
+    SELECT fw.fixed_id, fw.gym_id, fw.title, fw.duration_min,
+           fe.exercise_id, e.name, e.muscle_group, fe.order_no, fe.sets, fe.reps, fe.rest_sec
+    FROM FixedWorkout fw
+    LEFT JOIN FixedWorkoutExercise fe ON fe.fixed_id = fw.fixed_id
+    LEFT JOIN Exercise e ON e.exercise_id = fe.exercise_id
+    WHERE fw.gym_id <=> %s
+    ORDER BY fw.fixed_id, fe.order_no
+"""
+
+class WorkoutScope:
+    """
+    Tek kapsamın program ağacı: fixed_id sırasıyla programlar, her biri kendi
+    egzersiz listesiyle (order_no sırasıyla). Önbellekte paylaşılır, değiştirilmemelidir.
+    """
+    def __init__(self, rows):
+        self.by_id = {}
+        for row in rows:
+            workout = self.by_id.get(row['fixed_id'])
+            if workout is None:
+                workout = self.by_id[row['fixed_id']] = {
+                    'fixed_id': row['fixed_id'], 'gym_id': row['gym_id'],
+                    'title': row['title'], 'duration_min': row['duration_min'], 'exercises': []
+                }
+            if row['exercise_id'] is not None:
+                workout['exercises'].append({
+                    'exercise_id': row['exercise_id'], 'name': row['name'], 'muscle_group': row['muscle_group'],
+                    'order_no': row['order_no'], 'sets': row['sets'], 'reps': row['reps'], 'rest_sec': row['rest_sec']
+                })
+        # Liste endpoint'lerinin hazır satırları
+        self.summaries = [{'fixed_id': w['fixed_id'], 'title': w['title'], 'duration_min': w['duration_min']}
+                          for w in self.by_id.values()]
+        self.admin_rows = [dict(summary, exercise_count=len(w['exercises']))
+                           for summary, w in zip(self.summaries, self.by_id.values())]
+
+class WorkoutCatalog:
+    """
+    Sabit program kataloğu. Kapsam başına (None = global, X = sadece X salonuna özel)
+    bir WorkoutScope önbellekte tutulur; bir salonun kataloğu global + kendi kapsamıdır.
+    Bir programın düzenlenmesi sadece o programın kapsamını geçersiz kılar.
+    """
+    def __init__(self, cache):
+        self.cache = cache
+        self._scope_of = {}  # fixed_id -> kapsam (yüklenen kapsamlardan öğrenilir)
+        self._lock = threading.Lock()
+
+    def _load_scope(self, gym_id):
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(WORKOUT_CATALOG_SQL, (gym_id,))
+            scope = WorkoutScope(cursor.fetchall())
+        finally:
+            cursor.close()
+            conn.close()
+        with self._lock:
+            for fixed_id in scope.by_id:
+                self._scope_of[fixed_id] = gym_id
+        return scope
+
+    @staticmethod
+    def _key(gym_id):
+        # Global kapsamın gym_id'si None'dır; TTLCache.invalidate(None) tüm önbelleği sildiği
+        # için kapsam doğrudan anahtar olarak kullanılmaz
+        return ('scope', gym_id)
+
+    def scope(self, gym_id, bypass=False):
+        return self.cache.get_or_load(self._key(gym_id), lambda: self._load_scope(gym_id), bypass=bypass)
+
+    def for_gym(self, gym_id, bypass=False):
+        """Salonun gördüğü kapsamlar: global (ve gym_id verildiyse salona özel)."""
+        scopes = [self.scope(None, bypass)]
+        if gym_id is not None:
+            scopes.append(self.scope(gym_id, bypass))
+        return scopes
+
+    def workout(self, fixed_id, bypass=False):
+        """Programı egzersizleriyle döner; yoksa None."""
+        with self._lock:
+            known = fixed_id in self._scope_of
+            gym_id = self._scope_of.get(fixed_id)
+        if not known:
+            # Henüz yüklenmemiş bir kapsamdaki program: kapsamı bulup onu yükle
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute("SELECT gym_id FROM FixedWorkout WHERE fixed_id = %s", (fixed_id,))
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+                conn.close()
+            if not row:
+                return None
+            gym_id = row['gym_id']
+        return self.scope(gym_id, bypass).by_id.get(fixed_id)
+
+    def invalidate_scope(self, gym_id):
+        """Kapsama program eklendiğinde/güncellendiğinde çağrılmalıdır."""
+        self.cache.invalidate(self._key(gym_id))
+        resource_versions.bump('workouts')
+
+    def invalidate_all(self):
+        """Program tabloları uygulama dışından (doğrudan SQL) değiştiğinde çağrılmalıdır."""
+        self.cache.invalidate()
+        with self._lock:
+            # Programlar taşınmış veya silinmiş olabilir; kapsamlar yeniden öğrenilir
+            self._scope_of.clear()
+        resource_versions.bump('workouts')
+
+    def invalidate_workout(self, fixed_id, deleted=False):
+        """Programın kendisi veya egzersiz listesi değiştiğinde çağrılmalıdır."""
+        with self._lock:
+            known = fixed_id in self._scope_of
+            gym_id = self._scope_of.pop(fixed_id, None) if deleted else self._scope_of.get(fixed_id)
+        # Bilinmeyen program hiçbir önbellekli kapsamda değildir; yalnızca ETag yenilenir
+        if known:
+            self.cache.invalidate(self._key(gym_id))
+        resource_versions.bump('workouts')
+
+workout_cache = TTLCache('workouts', CACHE_CONFIG['workout_ttl'])
+workout_catalog = WorkoutCatalog(workout_cache)
+
 @app.route('/api/fixed-workouts', methods=['GET'])
+@conditional('workouts')
 def get_fixed_workouts():
     """
     SaaS MODELİ İÇERİK MANTIĞI:
     1. Global İçerik: gym_id IS NULL (Tüm salonlarda görünür)
     2. Local İçerik: gym_id = X (Sadece X salonunun üyeleri görür)
+    Salon seçilmediyse sadece globaller döner.
     """
-    gym_id = request.args.get('gym_id') 
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        if gym_id:
-            # Hem globalleri hem de o salona özelleri getir
-            query = "SELECT fixed_id, title, duration_min FROM FixedWorkout WHERE gym_id IS NULL OR gym_id = %s"
-            cursor.execute(query, (gym_id,))
-        else:
-            # Salon seçilmediyse sadece globalleri getir
-            cursor.execute("SELECT fixed_id, title, duration_min FROM FixedWorkout WHERE gym_id IS NULL")
-            
-        workouts = cursor.fetchall()
-        return jsonify(workouts)
-    finally:
-        cursor.close()
-        conn.close()
+    gym_id = request.args.get('gym_id', type=int)
+    scopes = workout_catalog.for_gym(gym_id, bypass=cache_bypassed())
+    workouts = [summary for scope in scopes for summary in scope.summaries]
+    workouts.sort(key=lambda w: w['fixed_id'])
+    return jsonify(workouts)
 
 @app.route('/api/fixed-workouts/<int:fixed_id>', methods=['GET'])
+@conditional('workouts', 'exercises')
 def get_fixed_workout_detail(fixed_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute("SELECT * FROM FixedWorkout WHERE fixed_id = %s", (fixed_id,))
-        workout = cursor.fetchone()
-        if not workout: return jsonify({'error': 'Bulunamadı'}), 404
-
-        # Programın egzersizlerini çek
-        sql_query = """
-            SELECT e.name, e.muscle_group, fe.sets, fe.reps, fe.rest_sec, fe.order_no
-            FROM FixedWorkoutExercise fe
-            JOIN Exercise e ON fe.exercise_id = e.exercise_id
-            WHERE fe.fixed_id = %s ORDER BY fe.order_no ASC
-        """
-        cursor.execute(sql_query, (fixed_id,))
-        workout['exercises'] = cursor.fetchall()
-        return jsonify(workout)
-    finally:
-        cursor.close()
-        conn.close()
+    """Programı egzersiz listesiyle (order_no sırasıyla) döner."""
+    workout = workout_catalog.workout(fixed_id, bypass=cache_bypassed())
+    if not workout:
+        return jsonify({'error': 'Bulunamadı'}), 404
+    return jsonify(workout)
 
 # ==================================================================
 # 4. KİŞİSEL RUTİNLER (ÜYEYE BAĞLI - PORTABLE DATA)
@@ -405,11 +1799,13 @@ def get_trainers():
     """
     Belirli bir salona ait antrenörleri listeler.
     gym_id parametresi ile filtrelenir.
+    ?stream=1 veya NDJSON isteğinde liste parça parça akıtılır.
     """
     gym_id = request.args.get('gym_id')
     
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
+    streaming = False
     try:
         if gym_id:
             cursor.execute("""
@@ -431,58 +1827,116 @@ def get_trainers():
                 ORDER BY t.rating_avg DESC
             """)
         
-        trainers = cursor.fetchall()
+        if wants_stream():
+            # Cursor ve bağlantı akış bitince kapanır
+            streaming = True
+            return stream_listing(conn, cursor, columnar=wants_columnar(), ndjson=wants_ndjson())
+        
+        trainers = cursor.fetchall_block(columnar=wants_columnar())
         return jsonify(trainers)
     finally:
-        cursor.close()
-        conn.close()
+        if not streaming:
+            cursor.close()
+            conn.close()
 
-@app.route('/api/exercises', methods=['GET'])
-def get_exercises():
+class ExerciseIndex:
     """
-    Tüm egzersizleri listeler.
-    muscle_group parametresi ile filtrelenebilir.
+    Egzersiz kataloğunun bellek içi indeksi. Exercise tablosu tek sorguyla okunur;
+    id, kas grubu ve isim öneki aramaları veritabanına gitmeden yapılır.
+    Hazır sıralamalar:
+      - 'muscle_group': kas grubu, sonra isim (varsayılan)
+      - 'name': isim
+      - 'id': exercise_id
     """
-    muscle_group = request.args.get('muscle_group')
-    
+    SORTS = ('muscle_group', 'name', 'id')
+
+    def __init__(self, rows):
+        exercises = [{'exercise_id': row['exercise_id'], 'name': row['name'],
+                      'muscle_group': row['muscle_group']} for row in rows]
+        name_key = lambda e: ((e['name'] or '').casefold(), e['exercise_id'])
+        # MySQL ORDER BY'da olduğu gibi NULL kas grubu en başta
+        group_key = lambda e: (e['muscle_group'] is not None, e['muscle_group'] or '') + name_key(e)
+
+        self.by_id = {e['exercise_id']: e for e in exercises}
+        self._sorted = {
+            'muscle_group': sorted(exercises, key=group_key),
+            'name': sorted(exercises, key=name_key),
+            'id': sorted(exercises, key=lambda e: e['exercise_id'])
+        }
+        self.by_group = {}
+        for e in self._sorted['muscle_group']:
+            self.by_group.setdefault(e['muscle_group'], []).append(e)
+        self.muscle_groups = list(self.by_group)
+        # İsim öneki araması için: (küçük harf isim, egzersiz) sıralı dizisi
+        self._names = [(e['name'] or '').casefold() for e in self._sorted['name']]
+
+    def search(self, muscle_group=None, prefix=None, sort='muscle_group'):
+        """Filtrelenmiş ve istenen sıradaki egzersiz listesini döner."""
+        if prefix:
+            key = prefix.casefold()
+            lo = bisect.bisect_left(self._names, key)
+            hi = bisect.bisect_left(self._names, key + '\U0010ffff')
+            candidates = self._sorted['name'][lo:hi]
+            if muscle_group:
+                candidates = [e for e in candidates if e['muscle_group'] == muscle_group]
+            if sort == 'name':
+                return candidates
+            ids = {e['exercise_id'] for e in candidates}
+            return [e for e in self._sorted[sort] if e['exercise_id'] in ids]
+        if muscle_group:
+            group = self.by_group.get(muscle_group, [])
+            if sort in ('muscle_group', 'name'):
+                # Grup içinde iki sıralama aynıdır
+                return group
+            return sorted(group, key=lambda e: e['exercise_id'])
+        return self._sorted[sort]
+
+def load_exercise_index():
+    """Exercise tablosunu okuyup indeksi kurar (önbellek yükleyicisi)."""
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        if muscle_group:
-            cursor.execute("""
-                SELECT exercise_id, name, muscle_group  
-                FROM Exercise 
-                WHERE muscle_group = %s
-                ORDER BY name ASC
-            """, (muscle_group,))
-        else:
-            cursor.execute("""
-                SELECT exercise_id, name, muscle_group  
-                FROM Exercise 
-                ORDER BY muscle_group, name ASC
-            """)
-        
-        exercises = cursor.fetchall()
-        return jsonify(exercises)
+        cursor.execute("SELECT exercise_id, name, muscle_group FROM Exercise")
+        return ExerciseIndex(cursor.fetchall())
     finally:
         cursor.close()
         conn.close()
 
+def get_exercise_index():
+    return exercise_cache.get_or_load(('index',), load_exercise_index, bypass=cache_bypassed())
+
+@app.route('/api/exercises', methods=['GET'])
+@conditional('exercises')
+def get_exercises():
+    """
+    Tüm egzersizleri listeler (mobil uygulama ve admin paneli ortak kullanır).
+    - muscle_group: kas grubuna göre filtre
+    - q: isim öneki (yazarken arama)
+    - sort: 'muscle_group' (varsayılan), 'name' veya 'id'
+    """
+    sort = request.args.get('sort', 'muscle_group')
+    if sort not in ExerciseIndex.SORTS:
+        return jsonify({'error': f"sort şunlardan biri olmalı: {', '.join(ExerciseIndex.SORTS)}"}), 400
+    exercises = get_exercise_index().search(muscle_group=request.args.get('muscle_group'),
+                                            prefix=request.args.get('q'), sort=sort)
+    return jsonify(exercises)
+
+@app.route('/api/exercises/<int:exercise_id>', methods=['GET'])
+def get_exercise(exercise_id):
+    """Tek bir egzersizi id ile getirir."""
+    exercise = get_exercise_index().by_id.get(exercise_id)
+    if not exercise:
+        return jsonify({'error': 'Egzersiz bulunamadı'}), 404
+    return jsonify(exercise)
+
 @app.route('/api/muscle-groups', methods=['GET'])
+@conditional('exercises')
 def get_muscle_groups():
     """
     Sistemdeki tüm kas gruplarını listeler.
     Egzersiz ekleme/filtreleme ekranlarında kullanılır.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT DISTINCT muscle_group FROM Exercise ORDER BY muscle_group")
-        muscle_groups = [row[0] for row in cursor.fetchall()]
-        return jsonify(muscle_groups)
-    finally:
-        cursor.close()
-        conn.close()
+    return jsonify(get_exercise_index().muscle_groups)
 
 @app.route('/api/my-routines/<int:routine_id>', methods=['PUT'])
 def update_routine(routine_id):
@@ -534,6 +1988,7 @@ def remove_exercise_from_routine(routine_id, exercise_id):
 # ==================================================================
 
 @app.route('/api/gyms/<int:gym_id>', methods=['GET'])
+@conditional('gyms')
 def get_gym_info(gym_id):
     """Salon bilgilerini getirir."""
     conn = get_db_connection()
@@ -548,79 +2003,645 @@ def get_gym_info(gym_id):
         cursor.close()
         conn.close()
 
+@app.route('/api/admin/db/stats', methods=['GET'])
+def get_db_stats():
+    """
+    Veritabanı katmanının anlık sayaçlarını döner.
+    Bağlantı havuzunu boyutlandırmak (kullanımda, boşta, bekleme süresi) ve
+    ifade önbelleğinin sıcak endpoint'leri kapsadığını doğrulamak için kullanılır.
+    """
+    return jsonify({
+        'pool': get_pool().stats(),
+        'writer_pool': _writer_pool.stats() if _writer_pool is not None else None,
+        'multi_statements_rejected': DictCursor.batching_rejected,
+        'statement_cache': statement_cache.stats(),
+        'turnstile': turnstile_batcher.stats(),
+        'rollup': rollup_worker.stats()
+    })
+
+class RouteMetricsRegistry:
+    """
+    Route başına birikimli istek ölçümleri: istek sayısı ve süre dağılımı, sorgu sayısı,
+    toplam DB süresi, okunan satır, serileştirme ve sıkıştırma süresi, yanıt boyutu ve en yavaş ifade.
+    """
+    # İstek süresi histogram sınırları (saniye)
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}    # (method, route) -> sayaçlar
+        self._statuses = {}  # (method, route, status) -> istek sayısı
+
+    def observe(self, method, route, status, metrics, total_ns):
+        seconds = total_ns / 1e9
+        with self._lock:
+            entry = self._routes.get((method, route))
+            if entry is None:
+                entry = self._routes[(method, route)] = {
+                    'requests': 0, 'duration_seconds': 0.0, 'buckets': [0] * len(self.BUCKETS),
+                    'queries': 0, 'max_queries': 0, 'db_seconds': 0.0, 'rows': 0,
+                    'serialize_seconds': 0.0, 'slowest_seconds': 0.0, 'slowest_sql': None,
+                    'body_bytes': 0, 'sent_bytes': 0, 'compress_seconds': 0.0
+                }
+            entry['requests'] += 1
+            entry['duration_seconds'] += seconds
+            index = bisect.bisect_left(self.BUCKETS, seconds)
+            if index < len(self.BUCKETS):
+                entry['buckets'][index] += 1
+            entry['queries'] += metrics.queries
+            entry['max_queries'] = max(entry['max_queries'], metrics.queries)
+            entry['db_seconds'] += metrics.db_ns / 1e9
+            entry['rows'] += metrics.rows
+            entry['serialize_seconds'] += metrics.serialize_ns / 1e9
+            entry['body_bytes'] += metrics.body_bytes
+            entry['sent_bytes'] += metrics.sent_bytes
+            entry['compress_seconds'] += metrics.compress_ns / 1e9
+            if metrics.slowest_ns / 1e9 > entry['slowest_seconds']:
+                entry['slowest_seconds'] = metrics.slowest_ns / 1e9
+                entry['slowest_sql'] = ' '.join(metrics.slowest_sql.split())[:300]
+            key = (method, route, status)
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._statuses.clear()
+
+    def stats(self):
+        """Route başına ortalamalar (JSON çıktısı için)."""
+        with self._lock:
+            routes = [(key, dict(entry)) for key, entry in self._routes.items()]
+        result = []
+        for (method, route), entry in sorted(routes, key=lambda item: item[1]['db_seconds'], reverse=True):
+            requests = entry['requests']
+            result.append({
+                'method': method,
+                'route': route,
+                'requests': requests,
+                'avg_ms': round(entry['duration_seconds'] / requests * 1000, 3),
+                'avg_queries': round(entry['queries'] / requests, 2),
+                'max_queries': entry['max_queries'],
+                'avg_db_ms': round(entry['db_seconds'] / requests * 1000, 3),
+                'avg_rows': round(entry['rows'] / requests, 1),
+                'avg_serialize_ms': round(entry['serialize_seconds'] / requests * 1000, 3),
+                'avg_body_bytes': round(entry['body_bytes'] / requests),
+                'avg_sent_bytes': round(entry['sent_bytes'] / requests),
+                'compression_ratio': round(entry['sent_bytes'] / entry['body_bytes'], 3) if entry['body_bytes'] else None,
+                'avg_compress_ms': round(entry['compress_seconds'] / requests * 1000, 3),
+                'slowest_ms': round(entry['slowest_seconds'] * 1000, 3),
+                'slowest_sql': entry['slowest_sql']
+            })
+        return result
+
+    @staticmethod
+    def _labels(**values):
+        parts = []
+        for name, value in values.items():
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            parts.append(f'{name}="{value}"')
+        return '{' + ','.join(parts) + '}'
+
+    def prometheus(self):
+        """Prometheus metin formatı (text/plain; version=0.0.4)."""
+        labels = self._labels
+        with self._lock:
+            routes = {key: dict(entry, buckets=list(entry['buckets'])) for key, entry in self._routes.items()}
+            statuses = dict(self._statuses)
+
+        lines = [
+            '# HELP gympro_http_requests_total İşlenen HTTP istekleri.',
+            '# TYPE gympro_http_requests_total counter'
+        ]
+        for (method, route, status), count in sorted(statuses.items()):
+            lines.append(f'gympro_http_requests_total{labels(method=method, route=route, status=status)} {count}')
+
+        lines += [
+            '# HELP gympro_http_request_duration_seconds İstek süresi.',
+            '# TYPE gympro_http_request_duration_seconds histogram'
+        ]
+        for (method, route), entry in sorted(routes.items()):
+            cumulative = 0
+            for bound, count in zip(self.BUCKETS, entry['buckets']):
+                cumulative += count
+                lines.append(f'gympro_http_request_duration_seconds_bucket'
+                             f'{labels(method=method, route=route, le=bound)} {cumulative}')
+            lines.append(f'gympro_http_request_duration_seconds_bucket'
+                         f'{labels(method=method, route=route, le="+Inf")} {entry["requests"]}')
+            lines.append(f'gympro_http_request_duration_seconds_sum{labels(method=method, route=route)} '
+                         f'{entry["duration_seconds"]:.6f}')
+            lines.append(f'gympro_http_request_duration_seconds_count{labels(method=method, route=route)} '
+                         f'{entry["requests"]}')
+
+        per_route = (
+            ('gympro_db_queries_total', 'counter', 'Çalıştırılan SQL ifadeleri.', 'queries', '{}'),
+            ('gympro_db_seconds_total', 'counter', 'Veritabanında geçen süre.', 'db_seconds', '{:.6f}'),
+            ('gympro_db_rows_fetched_total', 'counter', 'Okunan satırlar.', 'rows', '{}'),
+            ('gympro_serialize_seconds_total', 'counter', 'JSON serileştirme süresi.', 'serialize_seconds', '{:.6f}'),
+            ('gympro_response_body_bytes_total', 'counter', 'Sıkıştırma öncesi yanıt gövdesi.', 'body_bytes', '{}'),
+            ('gympro_response_sent_bytes_total', 'counter', 'Gönderilen yanıt gövdesi.', 'sent_bytes', '{}'),
+            ('gympro_compress_seconds_total', 'counter', 'Yanıt sıkıştırma süresi.', 'compress_seconds', '{:.6f}'),
+            ('gympro_db_max_queries_per_request', 'gauge', 'Tek istekteki en yüksek sorgu sayısı.', 'max_queries', '{}'),
+            ('gympro_db_slowest_query_seconds', 'gauge', 'Görülen en yavaş tek ifade.', 'slowest_seconds', '{:.6f}'),
+        )
+        for name, kind, help_text, field, fmt in per_route:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for (method, route), entry in sorted(routes.items()):
+                lines.append(f'{name}{labels(method=method, route=route)} {fmt.format(entry[field])}')
+
+        if _pool is not None:
+            pool = _pool.stats()
+            for field in ('in_use', 'idle', 'total', 'waits', 'timeouts'):
+                kind = 'counter' if field in ('waits', 'timeouts') else 'gauge'
+                suffix = '_total' if kind == 'counter' else ''
+                lines += [f'# TYPE gympro_db_pool_{field}{suffix} {kind}',
+                          f'gympro_db_pool_{field}{suffix} {pool[field]}']
+        return '\n'.join(lines) + '\n'
+
+request_metrics = RouteMetricsRegistry()
+
+@app.before_request
+def start_request_metrics():
+    if METRICS_CONFIG['enabled']:
+        _request_state.metrics = RequestMetrics()
+
+@app.after_request
+def finish_request_metrics(response):
+    metrics = getattr(_request_state, 'metrics', None)
+    if metrics is None:
+        return response
+    _request_state.metrics = None
+    total_ns = time.perf_counter_ns() - metrics.started
+    route = request.url_rule.rule if request.url_rule else '<eşleşmeyen>'
+    request_metrics.observe(request.method, route, response.status_code, metrics, total_ns)
+    if METRICS_CONFIG['server_timing']:
+        response.headers['Server-Timing'] = metrics.server_timing(total_ns)
+        response.headers['Timing-Allow-Origin'] = '*'
+    return response
+
+@app.teardown_request
+def clear_request_metrics(error=None):
+    # after_request çalışmadan biten isteklerde ölçüm sonraki isteğe taşınmasın
+    _request_state.metrics = None
+
+# --- YANIT SIKIŞTIRMA ---
+COMPRESSION_CONFIG = {
+    # COMPRESSION_ENABLED=0 sıkıştırmayı kapatır (ör. önünde sıkıştıran bir proxy varsa)
+    'enabled': os.environ.get('COMPRESSION_ENABLED', '1') == '1',
+    'min_size': int(os.environ.get('COMPRESS_MIN_SIZE', 1024)),    # bu boyutun altındaki gövdeler olduğu gibi gider
+    'gzip_level': int(os.environ.get('GZIP_LEVEL', 6)),
+    'brotli_quality': int(os.environ.get('BROTLI_QUALITY', 5))
+}
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain', 'text/html', 'text/csv'}
+
+def _compress_gzip(body):
+    # mtime=0: aynı gövde her seferinde aynı bayt dizisine sıkışır
+    return gzip.compress(body, compresslevel=COMPRESSION_CONFIG['gzip_level'], mtime=0)
+
+def _compress_brotli(body):
+    return brotli.compress(body, quality=COMPRESSION_CONFIG['brotli_quality'])
+
+# Sunucu tercih sırası: eşit kalitede brotli daha küçük çıktı verir
+COMPRESSORS = OrderedDict([('br', _compress_brotli)] if brotli is not None else [])
+COMPRESSORS['gzip'] = _compress_gzip
+
+# Metrik kancasından sonra kaydedildiği için ondan önce çalışır (after_request ters sırayla çağrılır)
+@app.after_request
+def compress_response(response):
+    """
+    Accept-Encoding'e göre gövdeyi brotli veya gzip ile sıkıştırır.
+    Akış (streaming) yanıtları, küçük gövdeler ve zaten kodlanmış yanıtlar olduğu gibi bırakılır.
+    """
+    metrics = getattr(_request_state, 'metrics', None)
+    if response.is_streamed or response.direct_passthrough:
+        return response
+    body_size = response.content_length or 0
+    if metrics is not None:
+        metrics.body_bytes += body_size
+        metrics.sent_bytes += body_size
+    if (not COMPRESSION_CONFIG['enabled'] or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers):
+        return response
+    if body_size < COMPRESSION_CONFIG['min_size']:
+        return response
+
+    # Yanıt boyutu eşiği aştığında içerik Accept-Encoding'e göre değişir
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(list(COMPRESSORS))
+    if encoding is None:
+        return response
+    start = time.perf_counter_ns()
+    compressed = COMPRESSORS[encoding](response.get_data())
+    if metrics is not None:
+        metrics.compress_ns += time.perf_counter_ns() - start
+    if len(compressed) >= body_size:
+        return response
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    if metrics is not None:
+        metrics.sent_bytes += len(compressed) - body_size
+    return response
+
+@app.route('/api/admin/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Route başına istek sayısı/süresi, sorgu sayısı, DB süresi, okunan satır ve serileştirme
+    süresi (Prometheus metin formatı). ?format=json ortalamaları ve en yavaş ifadeyi döner.
+    """
+    if request.args.get('format') == 'json':
+        return jsonify({'enabled': METRICS_CONFIG['enabled'], 'routes': request_metrics.stats()})
+    return Response(request_metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/metrics/reset', methods=['POST'])
+def reset_metrics():
+    """Ölçümleri sıfırlar (ör. bir yük testinden önce)."""
+    request_metrics.reset()
+    return jsonify({'message': 'Ölçümler sıfırlandı'})
+
+@app.route('/api/admin/slow-queries', methods=['GET'])
+def get_slow_queries():
+    """
+    SLOW_QUERY_MS eşiğini aşan son SQL çalıştırmaları ve toplam süreye göre en pahalı
+    fingerprint'ler. ?limit=N her iki listeyi sınırlar (varsayılan 50).
+    """
+    if slow_query_log is None:
+        return jsonify({'enabled': False, 'recent': [], 'top': []})
+    limit = max(1, min(request.args.get('limit', 50, type=int), slow_query_log.buffer_size))
+    return jsonify({
+        'enabled': True,
+        'threshold_ms': slow_query_log.threshold_ns / 1e6,
+        'recorded': slow_query_log.recorded,
+        'log_file': slow_query_log.log_file or None,
+        'recent': slow_query_log.recent(limit),
+        'top': slow_query_log.top(limit)
+    })
+
+@app.route('/api/admin/slow-queries/reset', methods=['POST'])
+def reset_slow_queries():
+    """Bellekteki yavaş sorgu kayıtlarını temizler (dosya etkilenmez)."""
+    if slow_query_log is not None:
+        slow_query_log.reset()
+    return jsonify({'message': 'Yavaş sorgu kayıtları temizlendi'})
+
 # ==================================================================
 # 6. TURNİKE YÖNETİMİ (GİRİŞ/ÇIKIŞ)
 # ==================================================================
 
-@app.route('/api/turnstile/checkin', methods=['POST'])
-def turnstile_checkin():
+# --- TURNİKE OLAY İŞLEME ---
+TURNSTILE_CONFIG = {
+    'max_batch': int(os.environ.get('TURNSTILE_BATCH_MAX', 200)),           # bir transaction'daki en fazla olay
+    'max_wait': float(os.environ.get('TURNSTILE_BATCH_WAIT_MS', 5)) / 1000,  # toplama için bekleme süresi
+    'result_timeout': float(os.environ.get('TURNSTILE_RESULT_TIMEOUT', 10)), # saniye
+    'bulk_max': int(os.environ.get('TURNSTILE_BULK_MAX', 1000)),             # toplu API'de en fazla olay
+    'max_clock_skew': float(os.environ.get('TURNSTILE_MAX_CLOCK_SKEW', 300)) # saniye; ts en fazla bu kadar ileri olabilir
+}
+
+def parse_turnstile_event(data, direction=None):
     """
-    Salona giriş kaydı oluşturur.
-    Turnike QR okutulduğunda çağrılır.
-    Eğer üye aynı zamanda trainer ise, trainer'ın is_in_gym durumunu da günceller.
+    İstek gövdesinden bir turnike olayı üretir.
+    Dönüş: (olay, hata_mesajı). direction verilmezse gövdeden okunur.
     """
-    data = request.get_json()
+    data = data or {}
     member_id = data.get('member_id')
     gym_id = data.get('gym_id')
-    
     if not member_id or not gym_id:
-        return jsonify({'error': 'member_id ve gym_id zorunludur'}), 400
-    
-    conn = get_db_connection()
+        return None, 'member_id ve gym_id zorunludur'
+    direction = direction or data.get('direction')
+    if direction not in ('in', 'out'):
+        return None, "direction 'in' veya 'out' olmalıdır"
+    try:
+        ts = datetime.fromisoformat(data['ts']) if data.get('ts') else None
+        event = {'member_id': int(member_id), 'gym_id': int(gym_id), 'direction': direction, 'ts': ts}
+    except (TypeError, ValueError):
+        return None, 'Geçersiz member_id, gym_id veya ts'
+    # Rollup, ts'si yeni olaylarda durur; çok ileri tarihli bir olay onu o zamana kadar bekletirdi
+    if ts and ts > datetime.now() + timedelta(seconds=TURNSTILE_CONFIG['max_clock_skew']):
+        return None, 'ts gelecekte olamaz'
+    return event, None
+
+def _accepted(event, is_trainer):
+    if event['direction'] == 'in':
+        message = 'Giriş başarılı! Hoş geldiniz, Antrenör!' if is_trainer else 'Giriş başarılı! Hoş geldiniz.'
+    else:
+        message = 'Çıkış başarılı! Görüşmek üzere, Antrenör!' if is_trainer else 'Çıkış başarılı! Görüşmek üzere.'
+    return {'status': 'accepted', 'message': message, 'is_trainer': is_trainer}
+
+def _denied(error):
+    return {'status': 'denied', 'error': error}
+
+# --- GİRİŞ UYGUNLUĞU ÖNBELLEĞİ ---
+def load_gym_eligibility(conn, gym_id):
+    """
+    Bir salonun turnike kararı için gereken özetini yükler:
+    members: member_id -> 'timed' / 'credit' (aktif üyelik; süreli varsa o öncelikli)
+    trainers: member_id -> trainer_id
+    """
     cursor = conn.cursor(dictionary=True)
     try:
-        # Üyelik kontrolü
-        cursor.execute("""
-            SELECT membership_id, type, credit_total, credit_used 
-            FROM Membership 
-            WHERE member_id = %s AND gym_id = %s AND is_active = 1
-        """, (member_id, gym_id))
-        membership = cursor.fetchone()
-        
-        if not membership:
-            return jsonify({'error': 'Aktif üyelik bulunamadı'}), 403
-        
-        # Kredili üyelikse kontrol et
-        if membership['type'] == 'credit':
-            remaining = membership['credit_total'] - membership['credit_used']
-            if remaining <= 0:
-                return jsonify({'error': 'Giriş hakkınız kalmadı'}), 403
-            
-            # Kredi kullan
-            cursor.execute("""
-                UPDATE Membership SET credit_used = credit_used + 1 
-                WHERE membership_id = %s
-            """, (membership['membership_id'],))
-        
-        # Giriş kaydı oluştur
-        cursor.execute("""
-            INSERT INTO TurnstileEvent (gym_id, member_id, direction, ts)
-            VALUES (%s, %s, 'in', NOW())
-        """, (gym_id, member_id))
-        
-        # Üye aynı zamanda trainer mı kontrol et ve is_in_gym güncelle
+        cursor.execute("SELECT member_id, type FROM Membership WHERE gym_id = %s AND is_active = 1", (gym_id,))
+        members = {}
+        for row in cursor.fetchall():
+            if members.get(row['member_id']) != 'timed':
+                members[row['member_id']] = row['type']
         cursor.execute("""
-            SELECT trainer_id FROM Trainer 
-            WHERE member_id = %s AND gym_id = %s
-        """, (member_id, gym_id))
-        trainer = cursor.fetchone()
-        
-        is_trainer = False
-        if trainer:
-            is_trainer = True
-            cursor.execute("""
-                UPDATE Trainer SET is_in_gym = TRUE 
-                WHERE trainer_id = %s
-            """, (trainer['trainer_id'],))
-        
+            SELECT trainer_id, member_id FROM Trainer 
+            WHERE gym_id = %s AND member_id IS NOT NULL
+        """, (gym_id,))
+        trainers = {}
+        for row in cursor.fetchall():
+            trainers.setdefault(row['member_id'], row['trainer_id'])
+        return {'members': members, 'trainers': trainers}
+    finally:
+        cursor.close()
+
+class EligibilityCache(TTLCache):
+    """
+    Salon bazında "bu üye girebilir mi, antrenör mü" önbelleği.
+    Süreli üyelik ve üyelik yokluğu kararları veritabanına gitmeden verilir;
+    kredili girişlerde kredi yine veritabanında atomik olarak düşülür.
+    Admin üyelik/antrenör düzenlemeleri ilgili salonu geçersiz kılar, TTL ise
+    başka süreçlerden yapılan değişikliklerin en geç ne kadar sonra görüleceğini sınırlar.
+    Karar süreleri (önbellekten cevap) son N karar üzerinden raporlanır.
+
+    Sınırlama: geçersiz kılma yalnızca bu süreç içindir. API birden çok süreçle (ör. gunicorn
+    worker'ları) veya birden çok sunucuda çalışıyorsa, bir worker'da yapılan üyelik iptali ya da
+    süre değişikliği diğer worker'ların kararlarına en geç ELIGIBILITY_CACHE_TTL saniye sonra
+    yansır; bu sürede iptal edilen süreli üye turnikeden geçebilir (kredili girişler her zaman
+    veritabanında doğrulanır). Çok süreçli kurulumda TTL kısaltılmalı veya
+    ELIGIBILITY_CACHE_TTL=0 ile önbellek kapatılmalıdır.
+    """
+    def __init__(self, name, ttl, samples=4096):
+        super().__init__(name, ttl)
+        self._timings = deque(maxlen=samples)
+        self.decisions = 0
+        self.db_decisions = 0
+
+    def for_gym(self, conn, gym_id):
+        return self.get_or_load(gym_id, lambda: load_gym_eligibility(conn, gym_id))
+
+    def record_decision(self, elapsed_ns, needs_db):
+        with self._lock:
+            self._timings.append(elapsed_ns)
+            self.decisions += 1
+            if needs_db:
+                self.db_decisions += 1
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            timings = sorted(self._timings)
+            decisions, db_decisions = self.decisions, self.db_decisions
+        def percentile(p):
+            return round(timings[min(int(len(timings) * p), len(timings) - 1)] / 1000, 1) if timings else 0.0
+        stats['decisions'] = {
+            'count': decisions,
+            'db_confirmed': db_decisions,   # kredi düşümü için veritabanına gidenler
+            'p50_us': percentile(0.50),
+            'p99_us': percentile(0.99),
+            'max_us': round(timings[-1] / 1000, 1) if timings else 0.0
+        }
+        return stats
+
+eligibility_cache = EligibilityCache('eligibility', CACHE_CONFIG['eligibility_ttl'])
+
+def invalidate_eligibility(gym_id):
+    """Bir salonun Membership veya Trainer kayıtları değiştiğinde çağrılmalıdır."""
+    eligibility_cache.invalidate(int(gym_id))
+
+# Kredili girişi tek ifadede doğrular ve tüketir: kredi kalmışsa credit_used artırılır.
+# Etkilenen satır sayısı kararı verir; okuma + ayrı UPDATE olmadığı için
+# paralel okutmalarda kredi iki kez harcanamaz.
+CONSUME_CREDIT_SQL = """
+    UPDATE Membership SET credit_used = credit_used + 1
+    WHERE member_id = %s AND gym_id = %s AND is_active = 1
+      AND type = 'credit' AND credit_used < credit_total
+    LIMIT 1
+"""
+
+def update_turnstile_stats(cursor, accepted, trainer_gyms):
+    """
+    Kabul edilen olayları GymStats'e tek UPDATE ile işler: bugünkü giriş sayısı artırılır
+    (gün değiştiyse sıfırdan başlar), antrenör durumu değişen salonlarda trainers_in_gym
+    Trainer tablosundan yeniden sayılır. Eski tarihli olaylar bugünkü girişlere sayılmaz.
+    """
+    today = date.today()
+    entries = {}
+    for event in accepted:
+        is_today = event['ts'] is None or event['ts'].date() == today
+        if event['direction'] == 'in' and is_today:
+            entries[event['gym_id']] = entries.get(event['gym_id'], 0) + 1
+    gym_ids = sorted(set(entries) | set(trainer_gyms))
+    if not gym_ids:
+        return
+    # Atamalar soldan sağa uygulanır: today_entries, stats_date güncellenmeden önce hesaplanmalı
+    today_entries = "IF(stats_date = %s, today_entries, 0)"
+    params = [today]
+    if entries:
+        today_entries += " + CASE gym_id " + ' '.join(['WHEN %s THEN %s'] * len(entries)) + " ELSE 0 END"
+        params += [value for item in entries.items() for value in item]
+    assignments = [f"today_entries = {today_entries}", "stats_date = %s"]
+    params.append(today)
+    if trainer_gyms:
+        trainer_in = ', '.join(['%s'] * len(trainer_gyms))
+        assignments.append(f"""trainers_in_gym = IF(gym_id IN ({trainer_in}),
+            (SELECT COUNT(*) FROM Trainer t WHERE t.gym_id = GymStats.gym_id AND t.is_in_gym = 1),
+            trainers_in_gym)""")
+        params += sorted(trainer_gyms)
+    gym_in = ', '.join(['%s'] * len(gym_ids))
+    cursor.execute(f"UPDATE GymStats SET {', '.join(assignments)} WHERE gym_id IN ({gym_in})",
+                   params + gym_ids)
+
+def process_turnstile_events(conn, events):
+    """
+    Turnike olaylarını tek transaction'da işler ve her olay için sonuç döner.
+    Üyelik ve antrenör kararları salon bazlı uygunluk önbelleğinden verilir; veritabanına
+    olay sayısından bağımsız olarak en fazla şu round-trip'ler yapılır:
+      1. Kredi düşümleri (koşullu UPDATE'ler, tek batch)   2. Olaylar (çok satırlı INSERT)
+      3. Antrenör is_in_gym durumları (tek UPDATE)         4. GymStats sayaçları (tek UPDATE)
+    Commit sonrası yalnızca bellek içi doluluk sayacı güncellenir; GymStats.people_inside
+    sıcak yolda yazılmaz, rollup turlarında refresh_people_inside() ile yenilenir.
+    Olaylar sırayla değerlendirilir; aynı batch'teki girişler krediyi sırayla tüketir.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        # Kararlar: önbellekten (kredili girişler sonraki adımda veritabanında kesinleşir)
+        decisions = []
+        for event in events:
+            started = time.perf_counter_ns()
+            gym = eligibility_cache.for_gym(conn, event['gym_id'])
+            kind = gym['members'].get(event['member_id']) if event['direction'] == 'in' else 'out'
+            trainer_id = gym['trainers'].get(event['member_id'])
+            eligibility_cache.record_decision(time.perf_counter_ns() - started, kind == 'credit')
+            decisions.append((kind, trainer_id))
+
+        # Kredili girişler: doğrulama ve kredi tüketimi aynı ifadede
+        credit_events = [e for e, (kind, _) in zip(events, decisions) if kind == 'credit']
+        granted = cursor.execute_batch(CONSUME_CREDIT_SQL,
+                                       [(e['member_id'], e['gym_id']) for e in credit_events]) if credit_events else []
+        credit_granted = {id(e): count > 0 for e, count in zip(credit_events, granted)}
+
+        results = []
+        accepted = []
+        trainer_state = {}   # trainer_id -> son is_in_gym değeri
+        trainer_gyms = set() # antrenör durumu değişen salonlar
+        for event, (kind, trainer_id) in zip(events, decisions):
+            if kind is None:
+                results.append(_denied('Aktif üyelik bulunamadı'))
+                continue
+            if kind == 'credit' and not credit_granted[id(event)]:
+                results.append(_denied('Giriş hakkınız kalmadı'))
+                continue
+            if trainer_id:
+                trainer_state[trainer_id] = event['direction'] == 'in'
+                trainer_gyms.add(event['gym_id'])
+            accepted.append(event)
+            results.append(_accepted(event, trainer_id is not None))
+
+        if accepted:
+            cursor.insert_many("""
+                INSERT INTO TurnstileEvent (gym_id, member_id, direction, ts)
+                VALUES (%s, %s, %s, COALESCE(%s, NOW()))
+            """, [(e['gym_id'], e['member_id'], e['direction'], e['ts']) for e in accepted],
+                TURNSTILE_CONFIG['max_batch'])
+
+        if trainer_state:
+            cases = ' '.join(['WHEN %s THEN %s'] * len(trainer_state))
+            ids_in = ', '.join(['%s'] * len(trainer_state))
+            params = [value for item in trainer_state.items() for value in item] + list(trainer_state)
+            cursor.execute(f"""
+                UPDATE Trainer SET is_in_gym = CASE trainer_id {cases} END 
+                WHERE trainer_id IN ({ids_in})
+            """, params)
+
+        update_turnstile_stats(cursor, accepted, trainer_gyms)
         conn.commit()
-        
-        if is_trainer:
-            return jsonify({'message': 'Giriş başarılı! Hoş geldiniz, Antrenör!', 'is_trainer': True}), 201
-        return jsonify({'message': 'Giriş başarılı! Hoş geldiniz.', 'is_trainer': False}), 201
     finally:
         cursor.close()
-        conn.close()
+
+    for event in accepted:
+        occupancy.record(event['gym_id'], event['member_id'], event['direction'], event['ts'])
+    return results
+
+class TurnstileBatcher:
+    """
+    Turnike olayları için write-behind kuyruğu (group commit).
+    İstekler olaylarını kuyruğa bırakıp sonucunu bekler; tek bir yazıcı thread kuyruktaki
+    olayları max_batch adede (veya max_wait dolana) kadar toplayıp tek transaction'da yazar.
+    Sabah yoğunluğunda eşzamanlı turnike okutmaları tek bağlantı ve tek commit'i paylaşır.
+    Batch hata verirse (ör. bilinmeyen gym_id) olaylar tek tek yeniden denenir.
+    """
+    def __init__(self, max_batch=200, max_wait=0.005):
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {'events': 0, 'batches': 0, 'retried_batches': 0, 'max_batch_seen': 0}
+
+    def submit(self, events):
+        """Olayları kuyruğa ekler; her olay için bir Future döner."""
+        self._ensure_started()
+        futures = []
+        for event in events:
+            future = Future()
+            self._queue.put((event, future))
+            futures.append(future)
+        return futures
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='turnstile-writer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    items.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._flush(items)
+
+    def _flush(self, items):
+        events = [event for event, _ in items]
+        futures = [future for _, future in items]
+        with self._lock:
+            self._counters['events'] += len(events)
+            self._counters['batches'] += 1
+            self._counters['max_batch_seen'] = max(self._counters['max_batch_seen'], len(events))
+        try:
+            conn = get_db_connection(multi_statements=True)
+        except Exception as err:
+            for future in futures:
+                future.set_exception(err)
+            return
+        try:
+            try:
+                results = process_turnstile_events(conn, events)
+            except pyodbc.Error:
+                # Hatalı olayı bulmak için tek tek dene; diğerleri etkilenmesin
+                conn.rollback()
+                with self._lock:
+                    self._counters['retried_batches'] += 1
+                results = []
+                for event in events:
+                    try:
+                        results.extend(process_turnstile_events(conn, [event]))
+                    except pyodbc.Error as err:
+                        conn.rollback()
+                        results.append(err)
+            for future, result in zip(futures, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as err:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(err)
+        finally:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['queued'] = self._queue.qsize()
+        stats['avg_batch'] = round(stats['events'] / stats['batches'], 2) if stats['batches'] else 0.0
+        return stats
+
+turnstile_batcher = TurnstileBatcher(TURNSTILE_CONFIG['max_batch'], TURNSTILE_CONFIG['max_wait'])
+
+def submit_turnstile_event(event):
+    """Tek bir olayı kuyruk üzerinden işler ve sonucu döner."""
+    return turnstile_batcher.submit([event])[0].result(timeout=TURNSTILE_CONFIG['result_timeout'])
+
+def turnstile_response(result):
+    if result['status'] == 'accepted':
+        return jsonify({'message': result['message'], 'is_trainer': result['is_trainer']}), 201
+    return jsonify({'error': result['error']}), 403
+
+@app.errorhandler(FutureTimeoutError)
+def handle_turnstile_timeout(error):
+    return jsonify({'error': 'Turnike kaydı zaman aşımına uğradı, lütfen tekrar deneyin'}), 503
+
+@app.route('/api/turnstile/checkin', methods=['POST'])
+def turnstile_checkin():
+    """
+    Salona giriş kaydı oluşturur.
+    Turnike QR okutulduğunda çağrılır.
+    Eğer üye aynı zamanda trainer ise, trainer'ın is_in_gym durumunu da günceller.
+    Olay, eşzamanlı diğer okutmalarla birlikte toplu olarak yazılır (TurnstileBatcher).
+    """
+    event, error = parse_turnstile_event(request.get_json(), 'in')
+    if error:
+        return jsonify({'error': error}), 400
+    return turnstile_response(submit_turnstile_event(event))
 
 @app.route('/api/turnstile/checkout', methods=['POST'])
 def turnstile_checkout():
@@ -628,84 +2649,414 @@ def turnstile_checkout():
     Salondan çıkış kaydı oluşturur.
     Turnike QR okutulduğunda çağrılır.
     Eğer üye aynı zamanda trainer ise, trainer'ın is_in_gym durumunu da günceller.
+    Olay, eşzamanlı diğer okutmalarla birlikte toplu olarak yazılır (TurnstileBatcher).
     """
-    data = request.get_json()
-    member_id = data.get('member_id')
-    gym_id = data.get('gym_id')
-    
-    if not member_id or not gym_id:
-        return jsonify({'error': 'member_id ve gym_id zorunludur'}), 400
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    event, error = parse_turnstile_event(request.get_json(), 'out')
+    if error:
+        return jsonify({'error': error}), 400
+    return turnstile_response(submit_turnstile_event(event))
+
+@app.route('/api/turnstile/events', methods=['POST'])
+def turnstile_bulk_events():
+    """
+    Toplu turnike olayı alımı (turnike kapıları biriktirdikleri okutmaları tek istekte gönderir).
+    Gövde: {"events": [{"member_id": 1, "gym_id": 1, "direction": "in", "ts": "2025-01-01T07:00:00"}, ...]}
+    ts opsiyoneldir (yoksa sunucu zamanı). Her olay için sırasıyla ayrı sonuç döner:
+    accepted / denied (üyelik, kredi) / invalid (eksik alan) / error (yazılamadı) /
+    pending (süre doldu, olay hâlâ kuyrukta veya yazılıyor olabilir).
+
+    Endpoint idempotent DEĞİLDİR: olaylar bir anahtarla tekilleştirilmez, aynı olayı tekrar
+    göndermek krediyi iki kez düşürür. İstemci yalnızca invalid/error sonuçlu olayları yeniden
+    göndermeli; pending olaylar kaydedilmiş olabileceğinden tekrar gönderilmemelidir.
+    """
+    data = request.get_json() or {}
+    raw_events = data.get('events')
+    if not isinstance(raw_events, list) or not raw_events:
+        return jsonify({'error': 'events listesi zorunludur'}), 400
+    if len(raw_events) > TURNSTILE_CONFIG['bulk_max']:
+        return jsonify({'error': f"Tek istekte en fazla {TURNSTILE_CONFIG['bulk_max']} olay gönderilebilir"}), 413
+
+    results = [None] * len(raw_events)
+    valid = []
+    for index, raw in enumerate(raw_events):
+        event, error = parse_turnstile_event(raw if isinstance(raw, dict) else None)
+        if error:
+            results[index] = {'status': 'invalid', 'error': error}
+        else:
+            valid.append((index, event))
+
+    futures = turnstile_batcher.submit([event for _, event in valid])
+    deadline = time.monotonic() + TURNSTILE_CONFIG['result_timeout']
+    for (index, _), future in zip(valid, futures):
+        try:
+            results[index] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            # Batch'in bir kısmı commit edilmiş olabilir; tüm isteği 503 ile reddetmek
+            # istemcinin kaydedilmiş olayları yeniden göndermesine (çifte kredi) yol açardı
+            results[index] = {'status': 'pending', 'error': 'Sonuç zamanında alınamadı, olay kaydedilmiş olabilir'}
+        except pyodbc.Error:
+            results[index] = {'status': 'error', 'error': 'Olay kaydedilemedi'}
+
+    accepted = sum(1 for result in results if result['status'] == 'accepted')
+    pending = sum(1 for result in results if result['status'] == 'pending')
+    return jsonify({
+        'accepted': accepted,
+        'pending': pending,
+        'rejected': len(results) - accepted - pending,
+        'results': [dict(result, index=index) for index, result in enumerate(results)]
+    })
+
+# --- TURNİKE ROLLUP'LARI (TRAFİK ANALİTİĞİ) ---
+ROLLUP_CONFIG = {
+    'interval': float(os.environ.get('ROLLUP_INTERVAL', 60)),     # saniye; 0 = arka plan işçisi kapalı
+    'batch_size': int(os.environ.get('ROLLUP_BATCH_SIZE', 5000)),  # bir transaction'da işlenen olay sayısı
+    # saniye; bundan yeni olaylar işlenmez (daha küçük event_id'li, henüz commit edilmemiş olaylar beklenir)
+    'safety_lag': float(os.environ.get('ROLLUP_SAFETY_LAG', 30))
+}
+ROLLUP_WATERMARK = 'turnstile'
+
+def _rollup_bucket(buckets, key):
+    bucket = buckets.get(key)
+    if bucket is None:
+        bucket = buckets[key] = {'entries': 0, 'exits': 0, 'peak': 0, 'visits': 0, 'visit_seconds': 0}
+    return bucket
+
+def _upsert_rollup(cursor, table, key_column, buckets):
+    """Kovaları toplanarak (additive) yazar; tepe doluluk için büyük olan korunur."""
+    if not buckets:
+        return
+    cursor.insert_many(f"""
+        INSERT INTO {table} (gym_id, {key_column}, entries, exits, peak_occupancy, visit_count, visit_seconds)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            entries = entries + VALUES(entries),
+            exits = exits + VALUES(exits),
+            peak_occupancy = GREATEST(peak_occupancy, VALUES(peak_occupancy)),
+            visit_count = visit_count + VALUES(visit_count),
+            visit_seconds = visit_seconds + VALUES(visit_seconds)
+    """, [(gym_id, key, b['entries'], b['exits'], b['peak'], b['visits'], b['visit_seconds'])
+          for (gym_id, key), b in buckets.items()])
+
+def rollup_turnstile_batch(conn, batch_size):
+    """
+    Watermark'tan (son işlenen event_id) sonraki en fazla batch_size olayı
+    salon bazlı saatlik (TurnstileHourly) ve günlük (TurnstileDaily) kovalara işler.
+    - entries / exits: kovadaki giriş ve çıkış sayısı
+    - peak_occupancy: kovadaki olay anlarında görülen en yüksek içerideki kişi sayısı
+    - visit_count / visit_seconds: girişi bu kovada olan ve çıkışı okutulan ziyaretler
+    Çıkışı henüz gelmemiş ziyaretler RollupOpenVisit'te bir sonraki çalışmaya taşınır.
+    Kovalar, açık ziyaretler ve watermark tek transaction'da yazılır; watermark satırı
+    FOR UPDATE ile kilitlendiği için iki süreç aynı olayları iki kez sayamaz.
+
+    Watermark bir event_id olduğundan, birden çok yazıcıda küçük id'li bir olay büyük id'li
+    olaydan sonra commit edilebilir; watermark onu geçerse olay hiç sayılmaz (ve arşive
+    event_id <= watermark ile taşınır). Bu yüzden yalnızca ts'si safety_lag saniyeden eski
+    olaylar işlenir ve ilk yeni olayda durulur: açık bir yazma transaction'ı safety_lag'den
+    uzun sürmedikçe watermark'ın altında commit bekleyen olay kalmaz. Varsayım: ts yazma
+    anıdır. Toplu uçtan geriye tarihli ts ile gelen olaylarda bu ancak tek yazıcıda
+    (tek API süreci: olaylar tek turnstile-writer thread'inden sırayla commit edilir) garantidir.
+    Dönüş: işlenen olay sayısı.
+    """
+    cursor = conn.cursor()
     try:
-        # Çıkış kaydı oluştur
+        cursor.execute("SELECT last_event_id FROM RollupWatermark WHERE name = %s FOR UPDATE",
+                       (ROLLUP_WATERMARK,))
+        row = cursor.fetchone()
+        if row is None:
+            # İki sürecin aynı anda ilk satırı eklemeye çalışmaması için satır createDB.sql'de oluşturulur
+            raise RuntimeError(f"RollupWatermark satırı ('{ROLLUP_WATERMARK}') yok; createDB.sql ile oluşturun")
+        last_event_id = row[0]
+
         cursor.execute("""
-            INSERT INTO TurnstileEvent (gym_id, member_id, direction, ts)
-            VALUES (%s, %s, 'out', NOW())
-        """, (gym_id, member_id))
-        
-        # Üye aynı zamanda trainer mı kontrol et ve is_in_gym güncelle
+            SELECT event_id, gym_id, member_id, direction, ts FROM TurnstileEvent
+            WHERE event_id > %s ORDER BY event_id LIMIT %s
+        """, (last_event_id, batch_size))
+        events = cursor.fetchall()
+        settled_before = datetime.now() - timedelta(seconds=ROLLUP_CONFIG['safety_lag'])
+        for index, event in enumerate(events):
+            if event[4] >= settled_before:
+                # Bu olaydan sonrası bir sonraki çalışmaya kalır (watermark bunu geçmez)
+                events = events[:index]
+                break
+        if not events:
+            conn.commit()
+            return 0
+
+        gym_ids = sorted({event[1] for event in events})
+        placeholders = ', '.join(['%s'] * len(gym_ids))
+        cursor.execute(f"""
+            SELECT gym_id, member_id, entered_at FROM RollupOpenVisit 
+            WHERE gym_id IN ({placeholders}) ORDER BY entered_at
+        """, gym_ids)
+        open_visits = {gym_id: OrderedDict() for gym_id in gym_ids}
+        for gym_id, member_id, entered_at in cursor.fetchall():
+            open_visits[gym_id][member_id] = entered_at
+
+        hourly, daily = {}, {}
+        for _, gym_id, member_id, direction, ts in events:
+            inside = open_visits[gym_id]
+            if occupancy.expire is not None:
+                # Çıkış okutmayı unutanlar doluluk sayacındaki gibi düşülür (ziyaret sayılmaz)
+                while inside and next(iter(inside.values())) < ts - occupancy.expire:
+                    inside.popitem(last=False)
+            hour_bucket = _rollup_bucket(hourly, (gym_id, ts.replace(minute=0, second=0, microsecond=0)))
+            day_bucket = _rollup_bucket(daily, (gym_id, ts.date()))
+            if direction == 'in':
+                hour_bucket['entries'] += 1
+                day_bucket['entries'] += 1
+                if member_id is not None:
+                    inside.pop(member_id, None)
+                    inside[member_id] = ts
+            else:
+                hour_bucket['exits'] += 1
+                day_bucket['exits'] += 1
+                entered_at = inside.pop(member_id, None) if member_id is not None else None
+                if entered_at is not None and ts >= entered_at:
+                    seconds = int((ts - entered_at).total_seconds())
+                    for bucket in (_rollup_bucket(hourly, (gym_id, entered_at.replace(minute=0, second=0, microsecond=0))),
+                                   _rollup_bucket(daily, (gym_id, entered_at.date()))):
+                        bucket['visits'] += 1
+                        bucket['visit_seconds'] += seconds
+            hour_bucket['peak'] = max(hour_bucket['peak'], len(inside))
+            day_bucket['peak'] = max(day_bucket['peak'], len(inside))
+
+        _upsert_rollup(cursor, 'TurnstileHourly', 'bucket_start', hourly)
+        _upsert_rollup(cursor, 'TurnstileDaily', 'day', daily)
+
+        cursor.execute(f"DELETE FROM RollupOpenVisit WHERE gym_id IN ({placeholders})", gym_ids)
+        still_open = [(gym_id, member_id, entered_at)
+                      for gym_id, inside in open_visits.items() for member_id, entered_at in inside.items()]
+        if still_open:
+            cursor.insert_many("INSERT INTO RollupOpenVisit (gym_id, member_id, entered_at) VALUES (%s, %s, %s)",
+                               still_open)
+
+        cursor.execute("UPDATE RollupWatermark SET last_event_id = %s WHERE name = %s",
+                       (events[-1][0], ROLLUP_WATERMARK))
+        conn.commit()
+        return len(events)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def run_turnstile_rollup(conn, batch_size=None):
+    """
+    Watermark'a (safety_lag'den eski son olaya) yetişene kadar batch'ler halinde rollup yapar.
+    Dönüş: işlenen olay sayısı.
+    """
+    batch_size = batch_size or ROLLUP_CONFIG['batch_size']
+    total = 0
+    while True:
+        processed = rollup_turnstile_batch(conn, batch_size)
+        total += processed
+        if processed < batch_size:
+            return total
+
+class TurnstileRollupWorker:
+    """
+    Rollup'ları arka planda interval saniyede bir watermark'tan devam ettirir ve
+    her turda GymStats.people_inside'ı anlık doluluktan yeniler.
+    İlk analitik isteğinde (veya sunucu açılışında) başlar; interval 0 ise hiç başlamaz
+    ve rollup_turnstile.py ile (ör. cron) çalıştırılması gerekir.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {'runs': 0, 'events': 0, 'errors': 0, 'last_run_at': None, 'last_error': None}
+
+    def ensure_started(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='turnstile-rollup', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self.run_once()
+            time.sleep(self.interval)
+
+    def run_once(self):
+        try:
+            conn = get_db_connection()
+            try:
+                processed = run_turnstile_rollup(conn)
+                refresh_people_inside(conn)
+            finally:
+                conn.close()
+        except Exception as err:
+            # İşçi thread'i ölmesin; bir sonraki turda tekrar denenir
+            with self._lock:
+                self._counters['errors'] += 1
+                self._counters['last_error'] = str(err)
+            return
+        with self._lock:
+            self._counters['runs'] += 1
+            self._counters['events'] += processed
+            self._counters['last_run_at'] = datetime.now().isoformat(timespec='seconds')
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, interval=self.interval, running=self._thread is not None)
+
+rollup_worker = TurnstileRollupWorker(ROLLUP_CONFIG['interval'])
+
+# --- TURNİKE ARŞİVİ (SICAK / SOĞUK KATMAN) ---
+# TurnstileEvent sadece son TURNSTILE_HOT_DAYS günü tutar (sıcak katman); daha eski olaylar
+# aylık arşiv tablolarına veya sıkıştırılmış dosyalara taşınır (archive_turnstile.py).
+# "Bugün" ve "şu an" sorguları (doluluk, GymStats, turnike) yalnızca sıcak tabloyu okur.
+ARCHIVE_CONFIG = {
+    'hot_days': int(os.environ.get('TURNSTILE_HOT_DAYS', 90)),          # sıcak tabloda tutulan gün
+    'chunk_size': int(os.environ.get('TURNSTILE_ARCHIVE_CHUNK', 5000))  # bir transaction'da taşınan olay
+}
+ARCHIVE_COLUMNS = ('event_id', 'gym_id', 'member_id', 'trainer_id', 'ts', 'direction')
+
+def archive_table_name(month):
+    """Ayın arşiv tablosu: date(2025, 1, 1) -> TurnstileEvent_202501"""
+    return f"TurnstileEvent_{month.year:04d}{month.month:02d}"
+
+def turnstile_archive_cutoff(hot_days=None):
+    """
+    Bu andan eski olaylar arşivlenebilir. Bugün ve doluluk penceresi
+    (OCCUPANCY_EXPIRE_HOURS) her zaman sıcak tabloda kalır.
+    """
+    hot_days = max(ARCHIVE_CONFIG['hot_days'] if hot_days is None else hot_days, 1)
+    cutoff = datetime.combine(date.today() - timedelta(days=hot_days), datetime.min.time())
+    if occupancy.expire is not None:
+        cutoff = min(cutoff, datetime.now() - occupancy.expire)
+    return cutoff
+
+def _archive_month(conn, cursor, month, upper, watermark, to_dir, chunk_size):
+    """Bir ayın [ay başı, upper) aralığındaki olaylarını parça parça taşır. Dönüş: taşınan olay."""
+    where = "ts >= %s AND ts < %s AND event_id <= %s"
+    params = [datetime(month.year, month.month, 1), upper, watermark]
+    if to_dir is None:
+        storage, location = 'table', archive_table_name(month)
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {location} LIKE TurnstileEvent")
+    else:
+        storage, location = 'file', os.path.join(to_dir, f"turnstile_{month.year:04d}{month.month:02d}.jsonl.gz")
+
+    total = 0
+    while True:
+        columns = 'event_id' if storage == 'table' else ', '.join(ARCHIVE_COLUMNS)
+        cursor.execute(f"SELECT {columns} FROM TurnstileEvent WHERE {where} ORDER BY ts, event_id LIMIT %s",
+                       params + [chunk_size])
+        rows = cursor.fetchall()
+        if not rows:
+            return total
+        ids = [row[0] for row in rows]
+        id_in = ', '.join(['%s'] * len(ids))
+        if storage == 'table':
+            cursor.execute(f"""
+                INSERT INTO {location} ({', '.join(ARCHIVE_COLUMNS)})
+                SELECT {', '.join(ARCHIVE_COLUMNS)} FROM TurnstileEvent WHERE event_id IN ({id_in})
+            """, ids)
+        else:
+            # gzip üyeleri ardışık eklenebilir; yarıda kalan bir çalışma tekrarlanırsa
+            # aynı event_id iki kez yazılabilir, okurken event_id ile tekilleştirilmelidir
+            with gzip.open(location, 'at', encoding='utf-8') as archive:
+                for row in rows:
+                    event = dict(zip(ARCHIVE_COLUMNS, row))
+                    event['ts'] = event['ts'].isoformat()
+                    archive.write(json.dumps(event, ensure_ascii=False) + '\n')
+        cursor.execute(f"DELETE FROM TurnstileEvent WHERE event_id IN ({id_in})", ids)
         cursor.execute("""
-            SELECT trainer_id FROM Trainer 
-            WHERE member_id = %s AND gym_id = %s
-        """, (member_id, gym_id))
-        trainer = cursor.fetchone()
-        
-        is_trainer = False
-        if trainer:
-            is_trainer = True
-            cursor.execute("""
-                UPDATE Trainer SET is_in_gym = FALSE 
-                WHERE trainer_id = %s
-            """, (trainer['trainer_id'],))
-        
+            INSERT INTO TurnstileArchive (month, storage, location, event_count)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE event_count = event_count + VALUES(event_count), location = VALUES(location)
+        """, (f"{month.year:04d}-{month.month:02d}", storage, location, len(ids)))
         conn.commit()
-        
-        if is_trainer:
-            return jsonify({'message': 'Çıkış başarılı! Görüşmek üzere, Antrenör!', 'is_trainer': True}), 201
-        return jsonify({'message': 'Çıkış başarılı! Görüşmek üzere.', 'is_trainer': False}), 201
+        total += len(ids)
+
+def archive_turnstile_events(conn, hot_days=None, to_dir=None, chunk_size=None, dry_run=False):
+    """
+    Sıcak TurnstileEvent tablosundaki cutoff'tan eski olayları aylık soğuk katmana taşır:
+    - varsayılan: TurnstileEvent_YYYYMM tabloları (aynı şema)
+    - to_dir verilirse: to_dir/turnstile_YYYYMM.jsonl.gz dosyaları
+    Yalnızca rollup'a işlenmiş olaylar (event_id <= watermark) taşınır; saatlik/günlük
+    kovalar bu yüzden eksiksiz kalır. Her parça kopyalama + silme olarak tek transaction'dır
+    ve TurnstileArchive kaydı ile birlikte commit edilir.
+    Dönüş: {'YYYY-MM': taşınan (dry_run'da taşınacak) olay sayısı}
+    """
+    chunk_size = chunk_size or ARCHIVE_CONFIG['chunk_size']
+    cutoff = turnstile_archive_cutoff(hot_days)
+    moved = {}
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT last_event_id FROM RollupWatermark WHERE name = %s", (ROLLUP_WATERMARK,))
+        row = cursor.fetchone()
+        watermark = row[0] if row else 0
+        cursor.execute("SELECT MIN(ts) FROM TurnstileEvent WHERE ts < %s AND event_id <= %s", (cutoff, watermark))
+        oldest = cursor.fetchone()[0]
+        if oldest is None:
+            return moved
+
+        month = date(oldest.year, oldest.month, 1)
+        while datetime(month.year, month.month, 1) < cutoff:
+            next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+            upper = min(datetime(next_month.year, next_month.month, 1), cutoff)
+            if dry_run:
+                cursor.execute("""
+                    SELECT COUNT(*) FROM TurnstileEvent WHERE ts >= %s AND ts < %s AND event_id <= %s
+                """, (datetime(month.year, month.month, 1), upper, watermark))
+                count = cursor.fetchone()[0]
+            else:
+                count = _archive_month(conn, cursor, month, upper, watermark, to_dir, chunk_size)
+            if count:
+                moved[f"{month.year:04d}-{month.month:02d}"] = count
+            month = next_month
+        return moved
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         cursor.close()
-        conn.close()
 
 @app.route('/api/admin/gym/<int:gym_id>/stats', methods=['GET'])
 def get_gym_stats(gym_id):
     """
     Admin Dashboard için salon istatistiklerini döner.
-    Toplam üye, aktif üye, içerideki kişi sayısı, doluluk oranı.
+    Toplam üye, aktif üye, antrenörler, bugünkü girişler, içerideki kişi sayısı, doluluk oranı.
+    Sayaçlar GymStats tablosundan tek birincil anahtar okumasıyla gelir.
     """
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        # Salon kapasitesi
-        cursor.execute("SELECT capacity FROM Gym WHERE gym_id = %s", (gym_id,))
-        gym = cursor.fetchone()
-        if not gym:
+        stats_sql = """
+            SELECT g.capacity, s.gym_id AS stats_gym_id, s.total_members, s.active_members,
+                   s.total_trainers, s.trainers_in_gym, s.stats_date, s.today_entries, s.people_inside
+            FROM Gym g
+            LEFT JOIN GymStats s ON s.gym_id = g.gym_id
+            WHERE g.gym_id = %s
+        """
+        cursor.execute(stats_sql, (gym_id,))
+        stats = cursor.fetchone()
+        if not stats:
             return jsonify({'error': 'Salon bulunamadı'}), 404
-        capacity = gym['capacity']
-
-        # Toplam üye sayısı (bu salona kayıtlı)
-        cursor.execute("SELECT COUNT(*) as cnt FROM Membership WHERE gym_id = %s", (gym_id,))
-        total_members = cursor.fetchone()['cnt']
-
-        # Aktif üye sayısı
-        cursor.execute("SELECT COUNT(*) as cnt FROM Membership WHERE gym_id = %s AND is_active = 1", (gym_id,))
-        active_members = cursor.fetchone()['cnt']
-
-        # İçerideki kişi sayısı (turnike verileri)
-        cursor.execute("SELECT COUNT(*) as cnt FROM TurnstileEvent WHERE gym_id = %s AND direction = 'in'", (gym_id,))
-        total_in = cursor.fetchone()['cnt']
-        cursor.execute("SELECT COUNT(*) as cnt FROM TurnstileEvent WHERE gym_id = %s AND direction = 'out'", (gym_id,))
-        total_out = cursor.fetchone()['cnt']
-        people_inside = max(0, total_in - total_out)
+        if stats['stats_gym_id'] is None:
+            # Salonun istatistik satırı henüz yok: bir kez hesaplanır
+            refresh_gym_stats(conn, [gym_id])
+            cursor.execute(stats_sql, (gym_id,))
+            stats = cursor.fetchone()
+        capacity = stats['capacity']
+
+        # Bellekteki doluluk sayacı daha günceldir (çıkış okutmayanlar düşülmüş olur)
+        people_inside = occupancy.loaded_count(gym_id)
+        if people_inside is None:
+            people_inside = stats['people_inside']
 
         # Doluluk oranı
         occupancy_percentage = round((people_inside / capacity) * 100, 1) if capacity > 0 else 0
 
         return jsonify({
-            'total_members': total_members,
-            'active_members': active_members,
+            'total_members': stats['total_members'],
+            'active_members': stats['active_members'],
+            'total_trainers': stats['total_trainers'],
+            'trainers_in_gym': stats['trainers_in_gym'],
+            'today_entries': stats['today_entries'] if stats['stats_date'] == date.today() else 0,
             'people_inside': people_inside,
             'capacity': capacity,
             'occupancy_percentage': occupancy_percentage
@@ -714,16 +3065,235 @@ def get_gym_stats(gym_id):
         cursor.close()
         conn.close()
 
+def _avg_visit_minutes(visit_count, visit_seconds):
+    return round(visit_seconds / visit_count / 60, 1) if visit_count else None
+
+def _rollup_watermark(cursor):
+    cursor.execute("SELECT last_event_id, updated_at FROM RollupWatermark WHERE name = %s", (ROLLUP_WATERMARK,))
+    row = cursor.fetchone()
+    if not row:
+        return {'last_event_id': 0, 'updated_at': None}
+    return {'last_event_id': row['last_event_id'],
+            'updated_at': row['updated_at'].isoformat() if row['updated_at'] else None}
+
+@app.route('/api/admin/gym/<int:gym_id>/analytics/heatmap', methods=['GET'])
+def get_gym_traffic_heatmap(gym_id):
+    """
+    Haftanın günü x saat yoğunluk haritası (son N hafta, saatlik rollup'lardan).
+    Ör. "Kadıköy pazartesi 18:00'de ne kadar yoğun?" -> weekday=0, hour=18 hücresi.
+    Ham TurnstileEvent tablosuna dokunmaz; en fazla 7*24*weeks kova okunur.
+    weekday: 0 = Pazartesi ... 6 = Pazar
+    """
+    rollup_worker.ensure_started()
+    weeks = min(max(request.args.get('weeks', 8, type=int), 1), 52)
+    today = date.today()
+    first_day = today - timedelta(weeks=weeks)
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            SELECT bucket_start, entries, exits, peak_occupancy, visit_count, visit_seconds
+            FROM TurnstileHourly
+            WHERE gym_id = %s AND bucket_start >= %s
+        """, (gym_id, datetime.combine(first_day, datetime.min.time())))
+        cells = {}
+        for row in cursor.fetchall():
+            key = (row['bucket_start'].weekday(), row['bucket_start'].hour)
+            cell = cells.setdefault(key, {'entries': 0, 'exits': 0, 'peak': 0, 'visits': 0, 'visit_seconds': 0})
+            cell['entries'] += row['entries']
+            cell['exits'] += row['exits']
+            cell['peak'] = max(cell['peak'], row['peak_occupancy'])
+            cell['visits'] += row['visit_count']
+            cell['visit_seconds'] += row['visit_seconds']
+
+        # Ortalama için her haftanın gününün aralıkta kaç kez geçtiği
+        weekday_counts = [0] * 7
+        for offset in range((today - first_day).days + 1):
+            weekday_counts[(first_day + timedelta(days=offset)).weekday()] += 1
+
+        return jsonify({
+            'gym_id': gym_id,
+            'weeks': weeks,
+            'since': first_day.isoformat(),
+            'cells': [{
+                'weekday': weekday,
+                'hour': hour,
+                'avg_entries': round(cell['entries'] / weekday_counts[weekday], 2),
+                'avg_exits': round(cell['exits'] / weekday_counts[weekday], 2),
+                'peak_occupancy': cell['peak'],
+                'avg_visit_min': _avg_visit_minutes(cell['visits'], cell['visit_seconds'])
+            } for (weekday, hour), cell in sorted(cells.items())],
+            'rollup': _rollup_watermark(cursor)
+        })
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.route('/api/admin/gym/<int:gym_id>/analytics/trend', methods=['GET'])
+def get_gym_traffic_trend(gym_id):
+    """
+    Günlük trafik trendi (son N gün, günlük rollup'lardan): giriş, çıkış,
+    tepe doluluk ve ortalama ziyaret süresi. Olmayan günler sıfır olarak döner.
+    """
+    rollup_worker.ensure_started()
+    days = min(max(request.args.get('days', 30, type=int), 1), 366)
+    first_day = date.today() - timedelta(days=days - 1)
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            SELECT day, entries, exits, peak_occupancy, visit_count, visit_seconds
+            FROM TurnstileDaily
+            WHERE gym_id = %s AND day >= %s
+        """, (gym_id, first_day))
+        rows = {row['day']: row for row in cursor.fetchall()}
+
+        trend = []
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            row = rows.get(day)
+            trend.append({
+                'day': day.isoformat(),
+                'entries': row['entries'] if row else 0,
+                'exits': row['exits'] if row else 0,
+                'peak_occupancy': row['peak_occupancy'] if row else 0,
+                'avg_visit_min': _avg_visit_minutes(row['visit_count'], row['visit_seconds']) if row else None
+            })
+        return jsonify({'gym_id': gym_id, 'days': trend, 'rollup': _rollup_watermark(cursor)})
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.route('/api/admin/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Uygulama içi önbelleklerin isabet oranı ve boyutlarını döner."""
+    return jsonify({name: cache.stats() for name, cache in CACHES.items()})
+
+# Bağımlı önbellekleri de temizleyen özel geçersiz kılıcılar (isim -> fonksiyon)
+CACHE_INVALIDATORS = {
+    'exercises': invalidate_exercise_cache,
+    'workouts': workout_catalog.invalidate_all
+}
+
+@app.route('/api/admin/cache/<name>/invalidate', methods=['POST'])
+def invalidate_cache(name):
+    """
+    İsmi verilen önbelleği temizler ve aynı isimli kaynağın ETag sürümünü artırır.
+    Örn: Exercise tablosu doğrudan veritabanından değiştirildiğinde 'exercises'
+    (program ağaçları egzersiz adlarını içerdiğinden workouts önbelleği de temizlenir).
+    Yalnızca sürümü olan kaynaklar ('gyms') için sadece ETag yenilenir.
+    """
+    invalidator = CACHE_INVALIDATORS.get(name)
+    if invalidator:
+        invalidator()
+        return jsonify({'message': f'{name} önbelleği temizlendi'})
+    cache = CACHES.get(name)
+    if not cache and name not in resource_versions:
+        return jsonify({'error': 'Önbellek bulunamadı'}), 404
+    if cache:
+        cache.invalidate()
+    if name in resource_versions:
+        resource_versions.bump(name)
+    return jsonify({'message': f'{name} önbelleği temizlendi'})
+
+@app.route('/api/admin/gym/<int:gym_id>/occupancy/rebuild', methods=['POST'])
+def rebuild_gym_occupancy(gym_id):
+    """
+    Salonun doluluk sayacını turnike geçmişinden yeniden kurar.
+    Sayaç ile gerçek durum arasında fark oluştuğunda (ör. manuel veri düzeltmesi) kullanılır.
+    """
+    conn = get_db_connection()
+    try:
+        occupancy.rebuild(conn, [gym_id])
+        return jsonify({'message': 'Doluluk sayacı yenilendi', 'people_inside': occupancy.people_inside(gym_id, conn)})
+    finally:
+        conn.close()
+
+# Üye listesi sayfalama ayarları
+MEMBERS_PAGE_SIZE = int(os.environ.get('MEMBERS_PAGE_SIZE', 100))
+MEMBERS_MAX_PAGE_SIZE = 1000
+
+def encode_members_cursor(start_date, membership_id):
+    """Sıralama anahtarından (start_date, membership_id) opak bir sayfa imleci üretir."""
+    key = [start_date.isoformat() if start_date else None, membership_id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+def decode_members_cursor(token):
+    """Sayfa imlecini çözer. Geçersizse ValueError fırlatır."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        start_date, membership_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (date.fromisoformat(start_date) if start_date else None), int(membership_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as err:
+        raise ValueError('Geçersiz cursor') from err
+
+def escape_like(value):
+    """LIKE kalıbındaki özel karakterleri (%, _, \\) kaçışlar."""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
 @app.route('/api/admin/gym/<int:gym_id>/members', methods=['GET'])
 def get_gym_members(gym_id):
     """
-    Salona kayıtlı tüm üyeleri listeler.
+    Salona kayıtlı üyeleri listeler.
     Üyelik bilgileri ve kalan süre/bakiye ile birlikte.
+
+    Keyset (imleç) sayfalama: sıralama (start_date DESC, membership_id DESC).
+    - limit: sayfa boyutu (varsayılan MEMBERS_PAGE_SIZE, en fazla 1000)
+    - cursor: önceki yanıtın X-Next-Cursor başlığındaki değer
+    - type ('timed'/'credit'), active (1/0), q (ad veya email öneki): sunucu tarafı filtreler
+    Her sayfa, salon büyüklüğünden bağımsız olarak aynı maliyettedir.
+
+    ?stream=1 veya NDJSON isteğinde filtrelenmiş liste sayfalanmadan parça parça akıtılır
+    (limit verilirse en fazla limit satır).
     """
+    args = request.args
+    streaming_requested = wants_stream()
+    try:
+        if 'limit' in args:
+            limit = max(1, min(int(args['limit']), MEMBERS_MAX_PAGE_SIZE))
+        else:
+            limit = None if streaming_requested else MEMBERS_PAGE_SIZE
+        after = decode_members_cursor(args['cursor']) if args.get('cursor') else None
+    except ValueError:
+        return jsonify({'error': 'Geçersiz limit veya cursor'}), 400
+
+    conditions = ["ms.gym_id = %s"]
+    params = [gym_id]
+    if args.get('type') in ('timed', 'credit'):
+        conditions.append("ms.type = %s")
+        params.append(args['type'])
+    if args.get('active') in ('0', '1'):
+        conditions.append("ms.is_active = %s")
+        params.append(int(args['active']))
+    if args.get('q'):
+        # Önek araması: Member(name) ve Member(email) indeksleri kullanılabilir
+        pattern = escape_like(args['q']) + '%'
+        conditions.append("(m.name LIKE %s OR m.email LIKE %s)")
+        params.extend([pattern, pattern])
+    if after:
+        after_date, after_id = after
+        # DESC sıralamada NULL start_date'ler en sona düşer
+        if after_date is None:
+            conditions.append("(ms.start_date IS NULL AND ms.membership_id < %s)")
+            params.append(after_id)
+        else:
+            conditions.append("""(ms.start_date < %s
+                 OR (ms.start_date = %s AND ms.membership_id < %s)
+                 OR ms.start_date IS NULL)""")
+            params.extend([after_date, after_date, after_id])
+    limit_sql = ""
+    if limit is not None:
+        # Bir sonraki sayfa olup olmadığını anlamak için bir satır fazla oku
+        limit_sql = "LIMIT %s"
+        params.append(limit if streaming_requested else limit + 1)
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
+    streaming = False
     try:
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 m.member_id, m.name, m.email,
                 ms.membership_id, ms.type, ms.is_active,
@@ -739,14 +3309,31 @@ def get_gym_members(gym_id):
                 END as remaining_credits
             FROM Membership ms
             JOIN Member m ON ms.member_id = m.member_id
-            WHERE ms.gym_id = %s
-            ORDER BY ms.start_date DESC
-        """, (gym_id,))
-        members = cursor.fetchall()
-        return jsonify(members)
+            WHERE {' AND '.join(conditions)}
+            ORDER BY ms.start_date DESC, ms.membership_id DESC
+            {limit_sql}
+        """, params)
+        if streaming_requested:
+            # Cursor ve bağlantı akış bitince kapanır
+            streaming = True
+            return stream_listing(conn, cursor, columnar=wants_columnar(), ndjson=wants_ndjson())
+        
+        members = cursor.fetchall_block(columnar=wants_columnar())
+        next_cursor = None
+        if len(members.rows) > limit:
+            members.rows = members.rows[:limit]
+            last = members.rows[-1]
+            columns = members.columns
+            next_cursor = encode_members_cursor(last[columns.index('start_date')],
+                                                last[columns.index('membership_id')])
+        response = jsonify(members)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
     finally:
-        cursor.close()
-        conn.close()
+        if not streaming:
+            cursor.close()
+            conn.close()
 
 @app.route('/api/admin/membership/<int:membership_id>/add-credit', methods=['POST'])
 def add_credit_to_membership(membership_id):
@@ -761,7 +3348,7 @@ def add_credit_to_membership(membership_id):
     cursor = conn.cursor(dictionary=True)
     try:
         # Üyelik bilgisini al
-        cursor.execute("SELECT type, end_date, credit_total FROM Membership WHERE membership_id = %s", (membership_id,))
+        cursor.execute("SELECT gym_id, type, end_date, credit_total, is_active FROM Membership WHERE membership_id = %s", (membership_id,))
         membership = cursor.fetchone()
         
         if not membership:
@@ -784,7 +3371,10 @@ def add_credit_to_membership(membership_id):
                 WHERE membership_id = %s
             """, (amount, membership_id))
         
+        # Pasif üyelik yeniden aktifleşti
+        bump_gym_stats(cursor, membership['gym_id'], active_members=0 if membership['is_active'] else 1)
         conn.commit()
+        invalidate_eligibility(membership['gym_id'])
         return jsonify({'message': f'{amount} birim eklendi'})
     finally:
         cursor.close()
@@ -828,7 +3418,12 @@ def update_membership(membership_id):
         
         # Güncellenecek alanlar
         membership_type = data.get('type', membership['type'])
-        is_active = data.get('is_active', membership['is_active'])
+        was_active = int(bool(membership['is_active']))
+        is_active = data.get('is_active', was_active)
+        # bool("0") True olduğundan değer bir kez 0/1'e çevrilir; UPDATE ve sayaç aynısını kullanır
+        if is_active not in (0, 1, '0', '1'):
+            return jsonify({'error': 'is_active 0 veya 1 olmalıdır'}), 400
+        is_active = int(is_active)
         
         if membership_type == 'timed':
             days = data.get('days')
@@ -861,7 +3456,10 @@ def update_membership(membership_id):
                     WHERE membership_id = %s
                 """, (membership_type, is_active, membership_id))
         
+        bump_gym_stats(cursor, membership['gym_id'],
+                       active_members=is_active - was_active)
         conn.commit()
+        invalidate_eligibility(membership['gym_id'])
         return jsonify({'message': 'Üyelik güncellendi'})
     finally:
         cursor.close()
@@ -876,10 +3474,15 @@ def delete_membership(membership_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
+        cursor.execute("SELECT gym_id, is_active FROM Membership WHERE membership_id = %s", (membership_id,))
+        membership = cursor.fetchone()
+        if not membership:
+            return jsonify({'error': 'Üyelik bulunamadı'}), 404
+        gym_id, is_active = membership
         cursor.execute("DELETE FROM Membership WHERE membership_id = %s", (membership_id,))
+        bump_gym_stats(cursor, gym_id, total_members=-1, active_members=-1 if is_active else 0)
         conn.commit()
-        if cursor.rowcount == 0:
-            return jsonify({'error': 'Üyelik bulunamadı'}), 404
+        invalidate_eligibility(gym_id)
         return jsonify({'message': 'Üyelik silindi'})
     finally:
         cursor.close()
@@ -926,8 +3529,11 @@ def add_trainer():
             INSERT INTO Trainer (gym_id, member_id, name, specialty, rating_avg, is_in_gym)
             VALUES (%s, %s, %s, %s, 0.0, 0)
         """, (gym_id, member_id, name, specialty))
+        trainer_id = cursor.lastrowid
+        bump_gym_stats(cursor, gym_id, total_trainers=1)
         conn.commit()
-        return jsonify({'message': 'Antrenör eklendi', 'trainer_id': cursor.lastrowid}), 201
+        invalidate_eligibility(gym_id)
+        return jsonify({'message': 'Antrenör eklendi', 'trainer_id': trainer_id}), 201
     finally:
         cursor.close()
         conn.close()
@@ -968,7 +3574,10 @@ def update_trainer(trainer_id):
             SET name = %s, specialty = %s, is_in_gym = %s, member_id = %s
             WHERE trainer_id = %s
         """, (name, specialty, is_in_gym, member_id, trainer_id))
+        bump_gym_stats(cursor, trainer['gym_id'],
+                       trainers_in_gym=int(bool(is_in_gym)) - int(bool(trainer['is_in_gym'])))
         conn.commit()
+        invalidate_eligibility(trainer['gym_id'])
         return jsonify({'message': 'Antrenör güncellendi'})
     finally:
         cursor.close()
@@ -982,10 +3591,15 @@ def delete_trainer(trainer_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
+        cursor.execute("SELECT gym_id, is_in_gym FROM Trainer WHERE trainer_id = %s", (trainer_id,))
+        trainer = cursor.fetchone()
+        if not trainer:
+            return jsonify({'error': 'Antrenör bulunamadı'}), 404
+        gym_id, is_in_gym = trainer
         cursor.execute("DELETE FROM Trainer WHERE trainer_id = %s", (trainer_id,))
+        bump_gym_stats(cursor, gym_id, total_trainers=-1, trainers_in_gym=-1 if is_in_gym else 0)
         conn.commit()
-        if cursor.rowcount == 0:
-            return jsonify({'error': 'Antrenör bulunamadı'}), 404
+        invalidate_eligibility(gym_id)
         return jsonify({'message': 'Antrenör silindi'})
     finally:
         cursor.close()
@@ -999,13 +3613,14 @@ def toggle_trainer_status(trainer_id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT is_in_gym FROM Trainer WHERE trainer_id = %s", (trainer_id,))
+        cursor.execute("SELECT gym_id, is_in_gym FROM Trainer WHERE trainer_id = %s", (trainer_id,))
         trainer = cursor.fetchone()
         if not trainer:
             return jsonify({'error': 'Antrenör bulunamadı'}), 404
         
         new_status = 0 if trainer['is_in_gym'] == 1 else 1
         cursor.execute("UPDATE Trainer SET is_in_gym = %s WHERE trainer_id = %s", (new_status, trainer_id))
+        bump_gym_stats(cursor, trainer['gym_id'], trainers_in_gym=1 if new_status else -1)
         conn.commit()
         return jsonify({'message': 'Durum güncellendi', 'is_in_gym': new_status})
     finally:
@@ -1053,7 +3668,9 @@ def admin_add_membership():
                 VALUES (%s, %s, %s, %s, 1, %s, 0)
             """, (gym_id, member['member_id'], 'credit', date.today(), credits))
         
+        bump_gym_stats(cursor, gym_id, total_members=1, active_members=1)
         conn.commit()
+        invalidate_eligibility(gym_id)
         return jsonify({'message': f'{user_email} başarıyla kaydedildi.'}), 201
     finally:
         cursor.close()
@@ -1064,27 +3681,17 @@ def admin_add_membership():
 # ==================================================================
 
 @app.route('/api/admin/programs', methods=['GET'])
+@conditional('workouts')
 def get_admin_programs():
-    """Salona ait programları listeler."""
-    gym_id = request.args.get('gym_id')
+    """Salona ait programları (global + salona özel) egzersiz sayılarıyla listeler."""
+    gym_id = request.args.get('gym_id', type=int)
     if not gym_id:
         return jsonify({'error': 'gym_id gerekli'}), 400
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute("""
-            SELECT fw.fixed_id, fw.title, fw.duration_min,
-                   (SELECT COUNT(*) FROM FixedWorkoutExercise fwe WHERE fwe.fixed_id = fw.fixed_id) as exercise_count
-            FROM FixedWorkout fw
-            WHERE fw.gym_id = %s OR fw.gym_id IS NULL
-            ORDER BY fw.fixed_id DESC
-        """, (gym_id,))
-        programs = cursor.fetchall()
-        return jsonify(programs)
-    finally:
-        cursor.close()
-        conn.close()
+
+    scopes = workout_catalog.for_gym(gym_id, bypass=cache_bypassed())
+    programs = [row for scope in scopes for row in scope.admin_rows]
+    programs.sort(key=lambda p: p['fixed_id'], reverse=True)
+    return jsonify(programs)
 
 @app.route('/api/admin/programs', methods=['POST'])
 def add_program():
@@ -1105,6 +3712,7 @@ def add_program():
             VALUES (%s, %s, %s)
         """, (gym_id, title, duration_min))
         conn.commit()
+        workout_catalog.invalidate_scope(int(gym_id))
         return jsonify({'message': 'Program eklendi', 'fixed_id': cursor.lastrowid}), 201
     finally:
         cursor.close()
@@ -1130,6 +3738,7 @@ def update_program(program_id):
             WHERE fixed_id = %s
         """, (title, duration_min, program_id))
         conn.commit()
+        workout_catalog.invalidate_scope(program['gym_id'])
         return jsonify({'message': 'Program güncellendi'})
     finally:
         cursor.close()
@@ -1145,29 +3754,18 @@ def delete_program(program_id):
         conn.commit()
         if cursor.rowcount == 0:
             return jsonify({'error': 'Program bulunamadı'}), 404
+        workout_catalog.invalidate_workout(program_id, deleted=True)
         return jsonify({'message': 'Program silindi'})
     finally:
         cursor.close()
         conn.close()
 
 @app.route('/api/admin/programs/<int:program_id>/exercises', methods=['GET'])
+@conditional('workouts', 'exercises')
 def get_program_exercises(program_id):
     """Programa ait egzersizleri listeler."""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute("""
-            SELECT fwe.exercise_id, e.name, e.muscle_group, fwe.order_no, fwe.sets, fwe.reps, fwe.rest_sec
-            FROM FixedWorkoutExercise fwe
-            JOIN Exercise e ON fwe.exercise_id = e.exercise_id
-            WHERE fwe.fixed_id = %s
-            ORDER BY fwe.order_no
-        """, (program_id,))
-        exercises = cursor.fetchall()
-        return jsonify(exercises)
-    finally:
-        cursor.close()
-        conn.close()
+    workout = workout_catalog.workout(program_id, bypass=cache_bypassed())
+    return jsonify(workout['exercises'] if workout else [])
 
 @app.route('/api/admin/programs/<int:program_id>/exercises', methods=['POST'])
 def add_exercise_to_program(program_id):
@@ -1197,6 +3795,7 @@ def add_exercise_to_program(program_id):
             VALUES (%s, %s, %s, %s, %s, %s)
         """, (program_id, exercise_id, order_no, sets, reps, rest_sec))
         conn.commit()
+        workout_catalog.invalidate_workout(program_id)
         return jsonify({'message': 'Egzersiz eklendi'}), 201
     except Exception as e:
         return jsonify({'error': 'Bu egzersiz zaten programda mevcut'}), 400
@@ -1217,28 +3816,12 @@ def remove_exercise_from_program(program_id, exercise_id):
         conn.commit()
         if cursor.rowcount == 0:
             return jsonify({'error': 'Egzersiz bulunamadı'}), 404
+        workout_catalog.invalidate_workout(program_id)
         return jsonify({'message': 'Egzersiz silindi'})
     finally:
         cursor.close()
         conn.close()
 
-@app.route('/api/exercises', methods=['GET'])
-def get_all_exercises():
-    """Tüm egzersizleri listeler."""
-    muscle_group = request.args.get('muscle_group')
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        if muscle_group:
-            cursor.execute("SELECT * FROM Exercise WHERE muscle_group = %s ORDER BY name", (muscle_group,))
-        else:
-            cursor.execute("SELECT * FROM Exercise ORDER BY name")
-        exercises = cursor.fetchall()
-        return jsonify(exercises)
-    finally:
-        cursor.close()
-        conn.close()
-
 if __name__ == '__main__':
     """
     1. Proje Vizyonu: GymPro SaaS Platformu
@@ -1285,4 +3868,14 @@ Data Integrity: Bir salon silindiğinde (CASCADE), ona ait üyeliklerin ve logla
 
 Scalability: Yeni bir şube açıldığında kod değiştirmeye gerek yoktur; sadece Gym tablosuna bir satır eklenir.
     """
+    # Doluluk sayaçlarını açılışta turnike geçmişinden kur
+    try:
+        startup_conn = get_db_connection()
+        try:
+            occupancy.rebuild(startup_conn)
+        finally:
+            startup_conn.close()
+    except pyodbc.Error as err:
+        print(f"Uyarı: doluluk sayaçları kurulamadı, ilk istekte yüklenecek: {err}")
+    rollup_worker.ensure_started()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
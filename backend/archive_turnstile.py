@@ -0,0 +1,55 @@
+"""
+Turnike arşiv komutu: TurnstileEvent'teki eski olayları aylık soğuk katmana taşır.
+
+Sıcak tabloda son TURNSTILE_HOT_DAYS gün (varsayılan 90) kalır; daha eski olaylar
+TurnstileEvent_YYYYMM tablolarına veya --files ile sıkıştırılmış JSONL dosyalarına taşınır.
+Sadece rollup'a işlenmiş olaylar taşındığından önce rollup çalışmış olmalıdır
+(sunucudaki arka plan işçisi veya python rollup_turnstile.py).
+
+Kullanım:
+    python archive_turnstile.py                   # arşiv tablolarına taşı
+    python archive_turnstile.py --days 30         # son 30 günü sıcak tut
+    python archive_turnstile.py --files ./arsiv   # tablolar yerine .jsonl.gz dosyalarına yaz
+    python archive_turnstile.py --dry-run         # sadece kaç olay taşınacağını göster
+"""
+import argparse
+import os
+import time
+from datetime import date
+
+import app as api
+
+def run():
+    parser = argparse.ArgumentParser(description="Eski turnike olaylarını aylık arşive taşır.")
+    parser.add_argument('--days', type=int, default=None,
+                        help=f"sıcak tabloda tutulacak gün (varsayılan {api.ARCHIVE_CONFIG['hot_days']})")
+    parser.add_argument('--files', metavar='KLASÖR', default=None,
+                        help="arşiv tabloları yerine bu klasöre turnstile_YYYYMM.jsonl.gz yaz")
+    parser.add_argument('--chunk', type=int, default=None, help="bir transaction'da taşınan olay sayısı")
+    parser.add_argument('--dry-run', action='store_true', help="taşımadan sadece say")
+    args = parser.parse_args()
+
+    if args.files:
+        os.makedirs(args.files, exist_ok=True)
+
+    conn = api.get_db_connection()
+    try:
+        print(f"Sınır: {api.turnstile_archive_cutoff(args.days):%Y-%m-%d %H:%M} öncesi olaylar")
+        start = time.perf_counter()
+        moved = api.archive_turnstile_events(conn, hot_days=args.days, to_dir=args.files,
+                                             chunk_size=args.chunk, dry_run=args.dry_run)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+
+    if not moved:
+        print("Taşınacak olay yok (rollup henüz çalışmadıysa önce: python rollup_turnstile.py).")
+        return
+    verb = "taşınacak" if args.dry_run else "taşındı"
+    for month, count in moved.items():
+        target = args.files or api.archive_table_name(date(int(month[:4]), int(month[5:]), 1))
+        print(f"  {month}: {count} olay {verb} -> {target}")
+    print(f"Toplam {sum(moved.values())} olay, {elapsed:.2f} sn.")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,352 @@
+"""
+Uçtan uca HTTP yük testi: gerçekçi istek karışımlarıyla endpoint başına gecikme ölçer.
+
+Uygulama bu süreçte gerçek bir HTTP sunucusu (werkzeug, threaded) olarak başlatılır ve
+populate_saas.py ile doldurulmuş yerel veritabanına bağlanır. N eşzamanlı istemci,
+seçilen karışımdaki işlemleri ağırlıklarına göre --duration saniye boyunca çalıştırır:
+
+  gate       turnike giriş/çıkışı (her istemci kendi üye dilimini sırayla içeri/dışarı alır)
+  dashboard  üye ana ekranı: /my-gyms ve salon dashboard'u
+  admin      admin listeleri: üye listesi, antrenörler, salon istatistikleri
+  routine    kişisel rutin düzenleme: egzersiz ekle / çıkar (istemci başına bir test rutini)
+
+Endpoint başına p50/p95/p99 gecikme, throughput, hata sayısı, istek başına veritabanı
+round-trip'i ve ağ üzerinden gelen ortalama yanıt boyutu raporlanır. Sonuçlar JSON olarak kaydedilir; --compare ile önceki bir
+çalıştırmayla (ör. başka bir commit) karşılaştırılır.
+
+DİKKAT: Gerçek turnike olayları ve rutin kayıtları yazar, test veritabanında çalıştırın.
+Round-trip sayısı istek thread'inde çalışan sorguları sayar; TurnstileBatcher'ın toplu
+yazmaları kendi thread'inde olduğundan gate isteklerine dahil edilmez.
+
+Kullanım:
+    python bench_api.py [--mix mixed|gate|read|admin] [--concurrency 16] [--duration 30]
+    python bench_api.py --out sonuc.json --compare bench_results/onceki.json
+    python bench_api.py --url http://127.0.0.1:5000   # çalışan bir sunucuya karşı (round-trip sayılmaz)
+    python bench_api.py --mix admin --encoding identity   # sıkıştırmasız yanıt boyutları (karşılaştırma için)
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from werkzeug.serving import make_server
+
+import app as api
+
+# İşlem ağırlıkları
+MIXES = {
+    'mixed': {'gate': 4, 'dashboard': 4, 'admin': 1, 'routine': 1},
+    'gate': {'gate': 1},
+    'read': {'dashboard': 3, 'admin': 1},
+    'admin': {'admin': 1},
+}
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_results')
+
+# --- Sunucu tarafı round-trip sayacı ---
+_db_calls = threading.local()
+
+def install_round_trip_counter():
+    """DictCursor çağrılarını istek başına sayar ve X-DB-Round-Trips başlığıyla döner."""
+    def counting(original):
+        def wrapper(self, *args, **kwargs):
+            _db_calls.count = getattr(_db_calls, 'count', 0) + 1
+            return original(self, *args, **kwargs)
+        return wrapper
+
+    # _query_lastrowid: lastrowid okunduğunda giden ayrı LAST_INSERT_ID() sorgusu
+    for name in ('execute', 'execute_batch', 'insert_many', '_query_lastrowid'):
+        setattr(api.DictCursor, name, counting(getattr(api.DictCursor, name)))
+
+    @api.app.before_request
+    def _reset_round_trips():
+        _db_calls.count = 0
+
+    @api.app.after_request
+    def _report_round_trips(response):
+        response.headers['X-DB-Round-Trips'] = str(getattr(_db_calls, 'count', 0))
+        return response
+
+def start_server(port):
+    # İstek başına erişim logu ölçümü bozmasın
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', port, api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def load_fixtures():
+    """Karışımın kullandığı gerçek kimlikler: süreli aktif üyelikler, salonlar, egzersizler."""
+    conn = api.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT member_id, gym_id FROM Membership
+            WHERE is_active = 1 AND type = 'timed'
+            LIMIT 2000
+        """)
+        memberships = [tuple(row) for row in cursor.fetchall()]
+        cursor.execute("SELECT exercise_id FROM Exercise")
+        exercises = [row[0] for row in cursor.fetchall()]
+        return memberships, exercises
+    finally:
+        cursor.close()
+        conn.close()
+
+class Client:
+    """Bir yük istemcisi: kendi HTTP oturumu, üye dilimi ve test rutini."""
+
+    def __init__(self, base_url, memberships, exercises, rng, accept_encoding=None):
+        self.base_url = base_url
+        self.session = requests.Session()
+        if accept_encoding:
+            self.session.headers['Accept-Encoding'] = accept_encoding
+        self.memberships = memberships
+        self.exercises = exercises
+        self.rng = rng
+        self.inside = set()
+        self.next_member = 0
+        self.routine_id = None
+        self.routine_exercise = None
+
+    def request(self, label, method, path, **kwargs):
+        """(label, durum_kodu, süre_ms, round_trip, ağ_baytı) döner."""
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=30, **kwargs)
+            body = response.content
+            status = response.status_code
+            round_trips = response.headers.get('X-DB-Round-Trips')
+            # requests gövdeyi açar; ağdan gelen boyut Content-Length'tedir (akışta yoksa açılmış boyut)
+            wire_bytes = int(response.headers.get('Content-Length', len(body)))
+        except requests.RequestException:
+            status, round_trips, wire_bytes = 0, None, None
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return label, status, elapsed_ms, int(round_trips) if round_trips is not None else None, wire_bytes
+
+    def gate(self):
+        member_id, gym_id = self.memberships[self.next_member % len(self.memberships)]
+        self.next_member += 1
+        key = (member_id, gym_id)
+        if key in self.inside:
+            self.inside.discard(key)
+            return self.request('POST /api/turnstile/checkout', 'POST', '/api/turnstile/checkout',
+                                json={'member_id': member_id, 'gym_id': gym_id})
+        self.inside.add(key)
+        return self.request('POST /api/turnstile/checkin', 'POST', '/api/turnstile/checkin',
+                            json={'member_id': member_id, 'gym_id': gym_id})
+
+    def dashboard(self):
+        member_id, gym_id = self.rng.choice(self.memberships)
+        if self.rng.random() < 0.5:
+            return self.request('GET /api/my-gyms', 'GET', f'/api/my-gyms?member_id={member_id}')
+        return self.request('GET /api/gym/<id>/dashboard', 'GET',
+                            f'/api/gym/{gym_id}/dashboard?member_id={member_id}')
+
+    def admin(self):
+        _, gym_id = self.rng.choice(self.memberships)
+        choice = self.rng.random()
+        if choice < 0.5:
+            return self.request('GET /api/admin/gym/<id>/members', 'GET', f'/api/admin/gym/{gym_id}/members?limit=100')
+        if choice < 0.8:
+            return self.request('GET /api/trainers', 'GET', f'/api/trainers?gym_id={gym_id}')
+        return self.request('GET /api/admin/gym/<id>/stats', 'GET', f'/api/admin/gym/{gym_id}/stats')
+
+    def routine(self):
+        if self.routine_id is None:
+            member_id, _ = self.memberships[0]
+            response = self.session.post(self.base_url + '/api/my-routines',
+                                         json={'member_id': member_id, 'title': 'bench_api'}, timeout=30)
+            self.routine_id = response.json()['routine_id']
+        if self.routine_exercise is None:
+            self.routine_exercise = self.rng.choice(self.exercises)
+            return self.request('POST /api/my-routines/<id>/add-exercise', 'POST',
+                                f'/api/my-routines/{self.routine_id}/add-exercise',
+                                json={'exercise_id': self.routine_exercise, 'sets': 3, 'reps': 10,
+                                      'rest_sec': 60, 'order_no': 1})
+        exercise_id, self.routine_exercise = self.routine_exercise, None
+        return self.request('DELETE /api/my-routines/<id>/remove-exercise/<eid>', 'DELETE',
+                            f'/api/my-routines/{self.routine_id}/remove-exercise/{exercise_id}')
+
+    def close(self):
+        """Test rutinini ve içeride kalan üyeleri temizler."""
+        for member_id, gym_id in list(self.inside):
+            self.session.post(self.base_url + '/api/turnstile/checkout',
+                              json={'member_id': member_id, 'gym_id': gym_id}, timeout=30)
+        if self.routine_id is not None:
+            self.session.delete(f"{self.base_url}/api/my-routines/{self.routine_id}", timeout=30)
+        self.session.close()
+
+def run_client(client, mix, deadline, samples):
+    operations = list(mix)
+    weights = [mix[name] for name in operations]
+    while time.perf_counter() < deadline:
+        operation = client.rng.choices(operations, weights)[0]
+        sample = getattr(client, operation)()
+        if samples is not None:
+            samples.append(sample)
+
+def percentile(sorted_values, p):
+    """En yakın sıra yöntemiyle yüzdelik."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def summarize(samples, duration):
+    by_label = {}
+    for label, status, elapsed_ms, round_trips, wire_bytes in samples:
+        by_label.setdefault(label, []).append((status, elapsed_ms, round_trips, wire_bytes))
+    by_label['TOPLAM'] = [sample[1:] for sample in samples]
+
+    results = {}
+    for label, rows in by_label.items():
+        latencies = sorted(ms for _, ms, _, _ in rows)
+        round_trips = [rt for _, _, rt, _ in rows if rt is not None]
+        sizes = [size for _, _, _, size in rows if size is not None]
+        results[label] = {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / duration, 1),
+            'errors': sum(1 for status, _, _, _ in rows if status == 0 or status >= 500),
+            'status_4xx': sum(1 for status, _, _, _ in rows if 400 <= status < 500),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'max_ms': round(latencies[-1], 2),
+            'db_round_trips': round(sum(round_trips) / len(round_trips), 2) if round_trips else None,
+            'avg_bytes': round(sum(sizes) / len(sizes)) if sizes else None,
+        }
+    return results
+
+def print_results(results):
+    print(f"{'endpoint':<52} {'istek':>7} {'istek/sn':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'RT':>5} "
+          f"{'bayt':>8} {'hata':>5}")
+    print("-" * 117)
+    for label, r in results.items():
+        rt = '-' if r['db_round_trips'] is None else f"{r['db_round_trips']:.1f}"
+        size = '-' if r.get('avg_bytes') is None else r['avg_bytes']
+        print(f"{label:<52} {r['requests']:>7} {r['throughput_rps']:>9.1f} {r['p50_ms']:>8.2f} "
+              f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {rt:>5} {size:>8} {r['errors']:>5}")
+
+def print_comparison(results, previous_path):
+    with open(previous_path, encoding='utf-8') as f:
+        previous = json.load(f)
+    print(f"\nKarşılaştırma: {previous_path} (commit {previous['meta'].get('commit')})")
+    print(f"{'endpoint':<52} {'p50 değişim':>12} {'p95 değişim':>12} {'istek/sn değişim':>17} {'bayt değişim':>13}")
+
+    def change(old, new):
+        if not old or new is None:
+            return '-'
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    for label, r in results.items():
+        old = previous['results'].get(label)
+        if not old:
+            continue
+        print(f"{label:<52} {change(old['p50_ms'], r['p50_ms']):>12} {change(old['p95_ms'], r['p95_ms']):>12} "
+              f"{change(old['throughput_rps'], r['throughput_rps']):>17} "
+              f"{change(old.get('avg_bytes'), r['avg_bytes']):>13}")
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run():
+    parser = argparse.ArgumentParser(description="GymPro API için HTTP yük testi.")
+    parser.add_argument('--mix', choices=sorted(MIXES), default='mixed', help="istek karışımı (varsayılan mixed)")
+    parser.add_argument('--concurrency', type=int, default=16, help="eşzamanlı istemci sayısı (varsayılan 16)")
+    parser.add_argument('--duration', type=float, default=30, help="ölçüm süresi, saniye (varsayılan 30)")
+    parser.add_argument('--warmup', type=float, default=3, help="ölçülmeyen ısınma süresi, saniye (varsayılan 3)")
+    parser.add_argument('--seed', type=int, default=1, help="istemci rastgeleliği için tohum")
+    parser.add_argument('--port', type=int, default=0, help="gömülü sunucu portu (varsayılan boş port)")
+    parser.add_argument('--url', default=None, help="gömülü sunucu yerine çalışan bir sunucuya bağlan")
+    parser.add_argument('--out', default=None, help="sonuç JSON dosyası (varsayılan bench_results/ altında)")
+    parser.add_argument('--compare', metavar='JSON', default=None, help="önceki bir sonuç dosyasıyla karşılaştır")
+    parser.add_argument('--encoding', default=None,
+                        help="istemcilerin Accept-Encoding başlığı (ör. 'gzip', 'br', 'identity'; varsayılan requests'inki)")
+    args = parser.parse_args()
+
+    memberships, exercises = load_fixtures()
+    if not memberships or not exercises:
+        print("Aktif süreli üyelik veya egzersiz bulunamadı. Önce populate_saas.py çalıştırın.")
+        return
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        install_round_trip_counter()
+        server, base_url = start_server(args.port)
+
+    # Her istemciye ayrık bir üye dilimi: giriş/çıkış sırası istemciler arasında karışmaz
+    rng = random.Random(args.seed)
+    shuffled = memberships[:]
+    rng.shuffle(shuffled)
+    clients = []
+    for i in range(args.concurrency):
+        own = shuffled[i::args.concurrency] or shuffled
+        clients.append(Client(base_url, own, exercises, random.Random(f"{args.seed}:{i}"), args.encoding))
+
+    mix = MIXES[args.mix]
+    print(f"{base_url} | karışım {args.mix} {mix} | {args.concurrency} istemci | "
+          f"{args.warmup:g} sn ısınma + {args.duration:g} sn ölçüm")
+    samples = []
+    try:
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            if args.warmup > 0:
+                deadline = time.perf_counter() + args.warmup
+                list(pool.map(lambda c: run_client(c, mix, deadline, None), clients))
+            start = time.perf_counter()
+            deadline = start + args.duration
+            list(pool.map(lambda c: run_client(c, mix, deadline, samples), clients))
+            duration = time.perf_counter() - start
+            list(pool.map(Client.close, clients))
+    finally:
+        if server:
+            server.shutdown()
+
+    if not samples:
+        print("Hiç istek tamamlanmadı.")
+        return
+    results = summarize(samples, duration)
+    print_results(results)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'mix': args.mix,
+            'weights': mix,
+            'concurrency': args.concurrency,
+            'duration_s': round(duration, 2),
+            'url': args.url,
+            'pool': api.POOL_CONFIG,
+            'accept_encoding': args.encoding or requests.utils.default_headers()['Accept-Encoding'],
+            'json_backend': None if args.url else api.app.json.encoder.name,
+            'compression': None if args.url else api.COMPRESSION_CONFIG,
+        },
+        'results': results,
+    }
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}_{report['meta']['commit'] or 'local'}.json")
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nSonuçlar: {out}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,105 @@
+"""
+/api/my-gyms için round-trip ve süre karşılaştırması.
+
+Eski (salon başına 2 COUNT sorgusu) akış ile yeni (toplu doluluk okuma) endpoint'i,
+farklı sayıda üyeliği olan üyeler için yan yana ölçer.
+Veritabanının populate_saas.py ile doldurulmuş olması gerekir.
+
+Kullanım:
+    python bench_my_gyms.py [tekrar_sayısı]
+"""
+import sys
+import time
+
+import app as api
+
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+# DictCursor.execute çağrılarını sayarak veritabanı round-trip'lerini ölç
+round_trips = 0
+_original_execute = api.DictCursor.execute
+
+def counting_execute(self, sql, params=None):
+    global round_trips
+    round_trips += 1
+    return _original_execute(self, sql, params)
+
+api.DictCursor.execute = counting_execute
+
+def legacy_my_gyms(member_id):
+    """Eski /api/my-gyms akışı: üyelik sorgusu + her salon için 2 COUNT(*) sorgusu."""
+    conn = api.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            SELECT g.gym_id, g.name, g.location, g.capacity, m.type, m.is_active
+            FROM Membership m
+            JOIN Gym g ON m.gym_id = g.gym_id
+            WHERE m.member_id = %s AND m.is_active = 1
+        """, (member_id,))
+        gyms = cursor.fetchall()
+        for gym in gyms:
+            cursor.execute("SELECT count(*) as cnt FROM TurnstileEvent WHERE gym_id = %s AND direction='in'", (gym['gym_id'],))
+            total_in = cursor.fetchone()['cnt']
+            cursor.execute("SELECT count(*) as cnt FROM TurnstileEvent WHERE gym_id = %s AND direction='out'", (gym['gym_id'],))
+            total_out = cursor.fetchone()['cnt']
+            gym['people_inside'] = max(0, total_in - total_out)
+        return gyms
+    finally:
+        cursor.close()
+        conn.close()
+
+def members_by_membership_count():
+    """Her aktif üyelik sayısı için örnek bir üye seçer: {üyelik_sayısı: member_id}"""
+    conn = api.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT member_id, COUNT(*) FROM Membership
+            WHERE is_active = 1 GROUP BY member_id
+        """)
+        samples = {}
+        for member_id, count in cursor.fetchall():
+            samples.setdefault(count, member_id)
+        return dict(sorted(samples.items()))
+    finally:
+        cursor.close()
+        conn.close()
+
+def measure(fn):
+    global round_trips
+    round_trips = 0
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    elapsed = time.perf_counter() - start
+    return round_trips / ROUNDS, elapsed / ROUNDS * 1000
+
+def measure_once(fn):
+    global round_trips
+    round_trips = 0
+    start = time.perf_counter()
+    fn()
+    return round_trips, (time.perf_counter() - start) * 1000
+
+def run():
+    samples = members_by_membership_count()
+    if not samples:
+        print("Aktif üyelik bulunamadı. Önce populate_saas.py çalıştırın.")
+        return
+
+    client = api.app.test_client()
+    print(f"{'üyelik':>7} | {'eski RT':>8} {'eski ms':>8} | {'yeni RT':>8} {'yeni ms':>8} | {'ilk istek RT':>12}")
+    print("-" * 66)
+    for count, member_id in samples.items():
+        legacy_rt, legacy_ms = measure(lambda: legacy_my_gyms(member_id))
+
+        # İlk istek: sayaçlar boşken salonlar tek toplu sorgu ile yüklenir
+        api.occupancy.reset()
+        cold_rt, _ = measure_once(lambda: client.get(f"/api/my-gyms?member_id={member_id}"))
+
+        new_rt, new_ms = measure(lambda: client.get(f"/api/my-gyms?member_id={member_id}"))
+        print(f"{count:>7} | {legacy_rt:>8.1f} {legacy_ms:>8.2f} | {new_rt:>8.1f} {new_ms:>8.2f} | {cold_rt:>12.0f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,85 @@
+"""
+Turnike yük testi: saniyede işlenen olay sayısı.
+
+İki senaryo ölçülür:
+  - single: N eşzamanlı istemci /api/turnstile/checkin ve /checkout uçlarını tek tek çağırır
+            (olaylar TurnstileBatcher tarafından toplu yazılır)
+  - bulk:   istemciler olayları /api/turnstile/events ile B'lik paketler halinde gönderir
+
+DİKKAT: Gerçek TurnstileEvent kayıtları yazar, test veritabanında çalıştırın.
+Veritabanının populate_saas.py ile doldurulmuş olması gerekir.
+
+Kullanım:
+    python bench_turnstile.py [olay_sayısı] [eşzamanlılık] [paket_boyutu]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app as api
+
+TOTAL_EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+BULK_SIZE = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+
+def load_members(limit=500):
+    """Süreli (kredisi tükenmeyen) aktif üyelikleri (member_id, gym_id) olarak döner."""
+    conn = api.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT member_id, gym_id FROM Membership
+            WHERE is_active = 1 AND type = 'timed'
+            LIMIT %s
+        """, (limit,))
+        return [tuple(row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+def make_events(pairs, count):
+    """Her üye için sırayla giriş/çıkış olayları üretir."""
+    events = []
+    for i in range(count):
+        member_id, gym_id = pairs[i % len(pairs)]
+        direction = 'in' if (i // len(pairs)) % 2 == 0 else 'out'
+        events.append({'member_id': member_id, 'gym_id': gym_id, 'direction': direction})
+    return events
+
+def run_single(client, events):
+    def send(event):
+        path = '/api/turnstile/checkin' if event['direction'] == 'in' else '/api/turnstile/checkout'
+        return client.post(path, json=event).status_code == 201
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        return sum(pool.map(send, events))
+
+def run_bulk(client, events):
+    packets = [events[i:i + BULK_SIZE] for i in range(0, len(events), BULK_SIZE)]
+    def send(packet):
+        return client.post('/api/turnstile/events', json={'events': packet}).get_json()['accepted']
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        return sum(pool.map(send, packets))
+
+def measure(name, fn, client, events):
+    before = api.turnstile_batcher.stats()
+    start = time.perf_counter()
+    accepted = fn(client, events)
+    elapsed = time.perf_counter() - start
+    after = api.turnstile_batcher.stats()
+    batches = after['batches'] - before['batches']
+    avg_batch = (after['events'] - before['events']) / batches if batches else 0
+    print(f"{name:>7} | {len(events) / elapsed:>10.0f} olay/sn | {accepted:>6} kabul | "
+          f"{batches:>5} transaction | ort. batch {avg_batch:>6.1f} | {elapsed:>6.2f} sn")
+
+def run():
+    pairs = load_members()
+    if not pairs:
+        print("Aktif süreli üyelik bulunamadı. Önce populate_saas.py çalıştırın.")
+        return
+    client = api.app.test_client()
+    print(f"{TOTAL_EVENTS} olay, {CONCURRENCY} eşzamanlı istemci, paket boyutu {BULK_SIZE}")
+    measure('single', run_single, client, make_events(pairs, TOTAL_EVENTS))
+    measure('bulk', run_bulk, client, make_events(pairs, TOTAL_EVENTS))
+
+if __name__ == "__main__":
+    run()
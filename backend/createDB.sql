@@ -133,6 +133,82 @@ CREATE TABLE IF NOT EXISTS CustomRoutineExercise (
     FOREIGN KEY (exercise_id) REFERENCES Exercise(exercise_id) ON DELETE CASCADE
 );
 
+-- 12. GymStats Tablosu (Materyalize Salon İstatistikleri)
+-- Admin paneli istatistikleri salon başına tek satırda tutulur.
+-- Uygulama yazma işlemlerinde artımlı günceller; tamamen yeniden hesaplamak için:
+--   python rebuild_stats.py
+CREATE TABLE IF NOT EXISTS GymStats (
+    gym_id INT PRIMARY KEY,
+    total_members INT NOT NULL DEFAULT 0,
+    active_members INT NOT NULL DEFAULT 0,
+    total_trainers INT NOT NULL DEFAULT 0,
+    trainers_in_gym INT NOT NULL DEFAULT 0,
+    stats_date DATE, -- today_entries'in ait olduğu gün
+    today_entries INT NOT NULL DEFAULT 0,
+    people_inside INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (gym_id) REFERENCES Gym(gym_id) ON DELETE CASCADE
+);
+
+-- 13. Turnike Rollup Tabloları (Trafik Analitiği)
+-- TurnstileEvent, watermark'tan itibaren artımlı olarak saatlik/günlük kovalara toplanır
+-- (uygulamadaki arka plan işçisi veya: python rollup_turnstile.py)
+CREATE TABLE IF NOT EXISTS TurnstileHourly (
+    gym_id INT NOT NULL,
+    bucket_start DATETIME NOT NULL, -- saat başı
+    entries INT NOT NULL DEFAULT 0,
+    exits INT NOT NULL DEFAULT 0,
+    peak_occupancy INT NOT NULL DEFAULT 0,
+    visit_count INT NOT NULL DEFAULT 0, -- girişi bu saatte olan, çıkışı okutulan ziyaretler
+    visit_seconds BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (gym_id, bucket_start),
+    FOREIGN KEY (gym_id) REFERENCES Gym(gym_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS TurnstileDaily (
+    gym_id INT NOT NULL,
+    day DATE NOT NULL,
+    entries INT NOT NULL DEFAULT 0,
+    exits INT NOT NULL DEFAULT 0,
+    peak_occupancy INT NOT NULL DEFAULT 0,
+    visit_count INT NOT NULL DEFAULT 0,
+    visit_seconds BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (gym_id, day),
+    FOREIGN KEY (gym_id) REFERENCES Gym(gym_id) ON DELETE CASCADE
+);
+
+-- Çıkışı henüz işlenmemiş ziyaretler (bir sonraki rollup çalışmasına taşınır)
+CREATE TABLE IF NOT EXISTS RollupOpenVisit (
+    gym_id INT NOT NULL,
+    member_id INT NOT NULL,
+    entered_at DATETIME NOT NULL,
+    PRIMARY KEY (gym_id, member_id),
+    FOREIGN KEY (gym_id) REFERENCES Gym(gym_id) ON DELETE CASCADE
+);
+
+-- Son işlenen event_id
+CREATE TABLE IF NOT EXISTS RollupWatermark (
+    name VARCHAR(40) PRIMARY KEY,
+    last_event_id INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Rollup bu satırı kendisi oluşturmaz: eşzamanlı ilk çalıştırmalar aynı satırı eklemeye çalışmasın
+INSERT IGNORE INTO RollupWatermark (name, last_event_id) VALUES ('turnstile', 0);
+
+-- 14. Turnike Arşiv Kaydı (Sıcak / Soğuk Katman)
+-- TurnstileEvent sadece son günleri tutar; eski olaylar aylık arşive taşınır:
+--   TurnstileEvent_YYYYMM tabloları veya turnstile_YYYYMM.jsonl.gz dosyaları
+--   (python archive_turnstile.py)
+CREATE TABLE IF NOT EXISTS TurnstileArchive (
+    month CHAR(7) NOT NULL, -- 'YYYY-MM'
+    storage VARCHAR(10) NOT NULL, -- 'table' veya 'file'
+    location VARCHAR(255) NOT NULL, -- arşiv tablosu adı veya dosya yolu
+    event_count INT NOT NULL DEFAULT 0,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (month, storage)
+);
+
 -- ================================================================
 -- GÖRÜNTÜLER (VIEWS)
 -- ================================================================
@@ -180,6 +256,7 @@ WHERE t.is_in_gym = TRUE;
 
 -- 3. Salon İstatistikleri Görüntüsü
 -- Her salonun özet istatistiklerini gösterir
+-- (Uygulama bu değerleri GymStats tablosundan okur; görüntü raporlama içindir)
 CREATE OR REPLACE VIEW GymStatsView AS
 SELECT 
     g.gym_id,
@@ -191,7 +268,7 @@ SELECT
     (SELECT COUNT(*) FROM TurnstileEvent te 
      WHERE te.gym_id = g.gym_id 
      AND te.direction = 'in' 
-     AND DATE(te.ts) = CURDATE()) AS today_entries
+     AND te.ts >= CURDATE() AND te.ts < CURDATE() + INTERVAL 1 DAY) AS today_entries
 FROM Gym g;
 
 -- 4. Bugünkü Giriş/Çıkışlar Görüntüsü
@@ -234,14 +311,18 @@ GROUP BY g.gym_id, g.name, ms.type;
 -- ================================================================
 
 -- Performans için önemli sorgularda kullanılan kolonlara index
+-- (bileşik indeksler sıcak sorguların WHERE/ORDER BY kalıplarına göre seçilmiştir,
+--  bkz. migrations/001_composite_indexes.sql ve explain_queries.py)
 CREATE INDEX idx_member_email ON Member(email);
-CREATE INDEX idx_membership_gym ON Membership(gym_id);
-CREATE INDEX idx_membership_member ON Membership(member_id);
-CREATE INDEX idx_membership_active ON Membership(is_active);
-CREATE INDEX idx_trainer_gym ON Trainer(gym_id);
+CREATE INDEX idx_member_name ON Member(name);
+CREATE INDEX idx_membership_member_gym_active ON Membership(member_id, gym_id, is_active);
+CREATE INDEX idx_membership_gym_active ON Membership(gym_id, is_active, member_id, type);
+CREATE INDEX idx_membership_gym_start ON Membership(gym_id, start_date);
+CREATE INDEX idx_trainer_gym_in_gym ON Trainer(gym_id, is_in_gym);
+CREATE INDEX idx_trainer_gym_rating ON Trainer(gym_id, rating_avg);
 CREATE INDEX idx_trainer_member ON Trainer(member_id);
-CREATE INDEX idx_trainer_in_gym ON Trainer(is_in_gym);
-CREATE INDEX idx_turnstile_gym ON TurnstileEvent(gym_id);
+CREATE INDEX idx_turnstile_gym_ts ON TurnstileEvent(gym_id, ts);
+CREATE INDEX idx_turnstile_gym_dir_ts ON TurnstileEvent(gym_id, direction, ts);
 CREATE INDEX idx_turnstile_member ON TurnstileEvent(member_id);
 CREATE INDEX idx_turnstile_date ON TurnstileEvent(ts);
 CREATE INDEX idx_exercise_muscle ON Exercise(muscle_group);
@@ -0,0 +1,296 @@
+"""
+Sorgu planı regresyon kontrolü: app.py'deki SQL ifadelerini EXPLAIN ile denetler.
+
+1. Endpoint'ler ve bakım fonksiyonları gerçek verilerle çalıştırılır; DictCursor üzerinden
+   geçen her ifade parametreleriyle yakalanır (f-string ile üretilen IN listeleri dahil).
+2. app.py içindeki sabit SQL metinlerinden senaryoda çalışmayanlar örnek parametrelerle eklenir.
+3. Her ifade için EXPLAIN çalıştırılır. Sıcak tablolarda tam tarama (type ALL / index)
+   veya "Using filesort" görülürse ya da EXPLAIN hiç çalışmazsa ifade başarısız sayılır
+   ve komut 1 ile çıkar.
+
+Senaryo turnike olayı yazar ve rollup/istatistikleri yeniler; bu yazmaların hiçbiri kalıcı
+olmaz: senaryo boyunca tüm endpoint'ler tek bir bağlantıyı paylaşır, commit'ler yutulur ve
+sonunda transaction geri alınır. Yine de populate_saas.py ile doldurulmuş bir test
+veritabanında çalıştırın: küçük tablolarda MySQL bilerek tam tarama seçebileceğinden
+sonuçlar ancak gerçekçi veri hacminde anlamlıdır.
+
+Kullanım:
+    python explain_queries.py [-v]
+"""
+import ast
+import re
+import sys
+
+import app as api
+
+VERBOSE = '-v' in sys.argv[1:]
+
+# Büyüyen tablolar: bunlarda tam tarama veya filesort regresyon sayılır
+HOT_TABLES = {'TurnstileEvent', 'Membership', 'Trainer', 'Member', 'GymStats',
+              'TurnstileHourly', 'TurnstileDaily'}
+
+# Bilinçli olarak kabul edilen planlar: SQL parçası -> gerekçe
+ALLOWED = {
+    "FROM Trainer t LEFT JOIN Gym g": "tüm antrenörlerin admin listesi (filtre yok, akışla döner)",
+    "ORDER BY ts, event_id": "birden çok salonun doluluk kurulumu; doluluk penceresiyle sınırlı, açılışta bir kez",
+    "FROM RollupOpenVisit": "açık ziyaretler küçük bir tablodur (içerideki kişi sayısı kadar)",
+}
+
+# --- 1. SQL yakalama ---
+captured = {}   # normalize SQL -> (sql, params)
+
+def normalize(sql):
+    return ' '.join(sql.split())
+
+def remember(sql, params):
+    captured.setdefault(normalize(sql), (sql, list(params or ())))
+
+_execute = api.DictCursor.execute
+_execute_batch = api.DictCursor.execute_batch
+_insert_many = api.DictCursor.insert_many
+
+def capturing_execute(self, sql, params=None):
+    remember(sql, params)
+    return _execute(self, sql, params)
+
+def capturing_execute_batch(self, sql, seq_params, *args, **kwargs):
+    seq_params = list(seq_params)
+    if seq_params:
+        remember(sql, seq_params[0])
+    return _execute_batch(self, sql, seq_params, *args, **kwargs)
+
+def capturing_insert_many(self, sql, seq_params, *args, **kwargs):
+    seq_params = list(seq_params)
+    if seq_params:
+        remember(sql, seq_params[0])
+    return _insert_many(self, sql, seq_params, *args, **kwargs)
+
+def scalar(sql, params=()):
+    conn = api.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+        return row[0] if row else None
+    finally:
+        cursor.close()
+        conn.close()
+
+class ScenarioConnection:
+    """
+    Senaryodaki tüm get_db_connection() çağrılarına verilen ortak bağlantı.
+    commit() ve close() etkisizdir; yazmalar senaryo sonunda rollback ile geri alınır.
+    (Turnike yazıcı thread'i de bunu kullanır; istek thread'i sonucu beklediği için
+    bağlantı aynı anda iki thread'den kullanılmaz.)
+    """
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def run_scenario():
+    """Sıcak yolları gerçek kimliklerle bir kez, geri alınan tek bir transaction içinde çalıştırır."""
+    gym_id = scalar("SELECT gym_id FROM Membership GROUP BY gym_id ORDER BY COUNT(*) DESC LIMIT 1")
+    if gym_id is None:
+        sys.exit("Üyelik bulunamadı. Önce populate_saas.py çalıştırın.")
+    member_id = scalar("""
+        SELECT member_id FROM Membership WHERE gym_id = %s AND is_active = 1 AND type = 'timed' LIMIT 1
+    """, (gym_id,))
+    credit_member_id = scalar("""
+        SELECT member_id FROM Membership WHERE gym_id = %s AND is_active = 1 AND type = 'credit' LIMIT 1
+    """, (gym_id,))
+    other_gym_id = scalar("SELECT gym_id FROM Gym WHERE gym_id <> %s LIMIT 1", (gym_id,))
+    fixed_id = scalar("SELECT fixed_id FROM FixedWorkout LIMIT 1")
+    routine_id = scalar("SELECT routine_id FROM CustomRoutine LIMIT 1")
+    captured.clear()
+
+    real_conn = api.get_db_connection()
+    shared = ScenarioConnection(real_conn)
+    get_db_connection = api.get_db_connection
+    api.get_db_connection = lambda *args, **kwargs: shared
+    # Arka plan rollup işçisi ortak bağlantıyı başka bir thread'den kullanmasın
+    api.rollup_worker.interval = 0
+    api.DictCursor.execute = capturing_execute
+    api.DictCursor.execute_batch = capturing_execute_batch
+    api.DictCursor.insert_many = capturing_insert_many
+    try:
+        drive_endpoints(gym_id, other_gym_id, member_id, credit_member_id, fixed_id, routine_id)
+    finally:
+        api.DictCursor.execute = _execute
+        api.DictCursor.execute_batch = _execute_batch
+        api.DictCursor.insert_many = _insert_many
+        api.get_db_connection = get_db_connection
+        real_conn.rollback()
+        real_conn.close()
+
+def drive_endpoints(gym_id, other_gym_id, member_id, credit_member_id, fixed_id, routine_id):
+    client = api.app.test_client()
+    requests = [
+        f"/api/my-gyms?member_id={member_id}",
+        f"/api/gym/{gym_id}/dashboard?member_id={member_id}",
+        f"/api/fixed-workouts?gym_id={gym_id}",
+        "/api/fixed-workouts",
+        f"/api/fixed-workouts/{fixed_id}",
+        f"/api/my-routines?member_id={member_id}",
+        f"/api/my-routines/{routine_id}",
+        f"/api/trainers?gym_id={gym_id}",
+        "/api/trainers",
+        "/api/exercises?nocache=1",
+        "/api/muscle-groups?nocache=1",
+        f"/api/gyms/{gym_id}",
+        f"/api/admin/gym/{gym_id}/stats",
+        f"/api/admin/gym/{gym_id}/analytics/heatmap",
+        f"/api/admin/gym/{gym_id}/analytics/trend",
+        f"/api/admin/gym/{gym_id}/members?type=timed&active=1",
+        f"/api/admin/gym/{gym_id}/members?q=a",
+        "/api/admin/programs",
+    ]
+    for url in requests:
+        client.get(url).close()
+
+    # Keyset sayfalamanın ikinci sayfası (cursor koşulu)
+    response = client.get(f"/api/admin/gym/{gym_id}/members?limit=20")
+    next_cursor = response.headers.get('X-Next-Cursor')
+    response.close()
+    if next_cursor:
+        client.get(f"/api/admin/gym/{gym_id}/members?limit=20&cursor={next_cursor}").close()
+
+    # Giriş/çıkış yolları (hatalı şifreler okuma yapar, kayıt oluşturmaz)
+    client.post('/api/login', json={'email': 'yok@example.com', 'password': '-'}).close()
+    client.post('/api/admin/login', json={'username': 'yok', 'password': '-'}).close()
+
+    # Turnike: süreli + kredili giriş ve çıkış (olay yazar; senaryo sonunda geri alınır)
+    for mid in filter(None, (member_id, credit_member_id)):
+        client.post('/api/turnstile/checkin', json={'member_id': mid, 'gym_id': gym_id}).close()
+        client.post('/api/turnstile/checkout', json={'member_id': mid, 'gym_id': gym_id}).close()
+
+    # Bakım yolları
+    conn = api.get_db_connection()
+    api.refresh_gym_stats(conn, [gym_id])
+    api.occupancy.rebuild(conn, [g for g in (gym_id, other_gym_id) if g])
+    api.run_turnstile_rollup(conn)
+    api.archive_turnstile_events(conn, dry_run=True)
+
+# --- 2. app.py içindeki sabit SQL metinleri ---
+def static_statements():
+    """execute/execute_batch/insert_many çağrılarındaki sabit SQL metinlerini döner."""
+    tree = ast.parse(open(api.__file__, encoding='utf-8').read())
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) \
+                and isinstance(node.value.value, str):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = node.value.value
+    statements = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr in ('execute', 'execute_batch', 'insert_many') and node.args):
+            continue
+        arg = node.args[0]
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            statements.append(arg.value)
+        elif isinstance(arg, ast.Name) and arg.id in constants:
+            statements.append(constants[arg.id])
+    return statements
+
+# --- 3. EXPLAIN ---
+_TABLE_RE = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(?!WHERE|JOIN|LEFT|INNER|ON|SET|SELECT|GROUP|ORDER|LIMIT|VALUES)(\w+))?',
+                       re.IGNORECASE)
+
+def table_aliases(sql):
+    aliases = {}
+    for table, alias in _TABLE_RE.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+def explainable(sql):
+    head = sql.lstrip().split(None, 1)[0].upper()
+    if head in ('SELECT', 'UPDATE', 'DELETE'):
+        return True
+    return head == 'INSERT' and re.search(r'\bSELECT\b', sql, re.IGNORECASE) is not None
+
+def explain(cursor, sql, params):
+    cursor.execute("EXPLAIN FORMAT=TRADITIONAL " + sql.rstrip().rstrip(';'), params)
+    return cursor.fetchall()
+
+def problems_in(plan, sql):
+    aliases = table_aliases(sql)
+    problems = []
+    for row in plan:
+        table = aliases.get(row.get('table') or '', row.get('table'))
+        if table not in HOT_TABLES or row.get('select_type') == 'INSERT':
+            continue
+        extra = row.get('Extra') or ''
+        if row.get('type') in ('ALL', 'index'):
+            problems.append(f"{table}: tam tarama (type={row['type']}, rows={row.get('rows')})")
+        if 'Using filesort' in extra:
+            problems.append(f"{table}: filesort ({extra})")
+    return problems
+
+def run():
+    run_scenario()
+    runtime = dict(captured)
+    sample_only = {}
+    for sql in static_statements():
+        key = normalize(sql)
+        if key not in runtime and key not in sample_only:
+            # Senaryoda çalışmayan ifade: tüm parametreler için örnek değer 1
+            sample_only[key] = (sql, [1] * sql.count('%s'))
+
+    conn = api.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    failures, allowed, checked, errors = [], [], 0, []
+    try:
+        cursor.execute("ANALYZE TABLE " + ', '.join(sorted(HOT_TABLES)))
+        cursor.fetchall()
+        for source, statements in (('çalışma', runtime), ('örnek', sample_only)):
+            for key, (sql, params) in statements.items():
+                if not explainable(sql):
+                    continue
+                try:
+                    plan = explain(cursor, sql, params)
+                except api.pyodbc.Error as err:
+                    errors.append((key, str(err)))
+                    continue
+                checked += 1
+                problems = problems_in(plan, sql)
+                reason = next((why for fragment, why in ALLOWED.items() if fragment in key), None)
+                if problems and reason:
+                    allowed.append((key, problems, reason))
+                elif problems:
+                    failures.append((key, problems, source, plan))
+                elif VERBOSE:
+                    print(f"OK    {key[:110]}")
+    finally:
+        cursor.close()
+        conn.close()
+
+    for key, problems, reason in allowed:
+        print(f"İZİN  {key[:110]}\n      {'; '.join(problems)} -> {reason}")
+    for key, problems, source, plan in failures:
+        print(f"HATA  [{source}] {key[:200]}")
+        for problem in problems:
+            print(f"      {problem}")
+        if VERBOSE:
+            for row in plan:
+                print(f"      {row}")
+    for key, err in errors:
+        print(f"HATA  {key[:200]}\n      EXPLAIN çalışmadı: {err}")
+
+    print(f"\n{checked} ifade denetlendi ({len(runtime)} çalışma anında yakalandı, "
+          f"{len(sample_only)} sabit metin örnek parametreyle), "
+          f"{len(allowed)} izinli, {len(failures)} hatalı plan, {len(errors)} EXPLAIN hatası.")
+    sys.exit(1 if failures or errors else 0)
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,43 @@
+-- ================================================================
+-- Migration 001: Sıcak sorgular için bileşik (composite) indeksler
+-- ================================================================
+-- Mevcut bir gympro_db veritabanına uygulanır (createDB.sql yeni kurulumlarda
+-- bu indeksleri zaten oluşturur):
+--   mysql -u root -p gympro_db < migrations/001_composite_indexes.sql
+-- Sonrasında sorgu planları kontrol edilir:
+--   python explain_queries.py
+--
+-- Yeni indeksler eskilerinden önce eklenir; böylece foreign key'ler her an
+-- kullanılabilir bir indekse sahip olur ve DROP INDEX hata vermez.
+
+-- TurnstileEvent ------------------------------------------------------
+-- Doluluk kurulumu: gym_id IN (...) AND ts >= ? ORDER BY ts, event_id
+CREATE INDEX idx_turnstile_gym_ts ON TurnstileEvent(gym_id, ts);
+-- Bugünkü girişler / yön bazlı sayımlar: gym_id = ? AND direction = ? AND ts aralığı (covering)
+CREATE INDEX idx_turnstile_gym_dir_ts ON TurnstileEvent(gym_id, direction, ts);
+-- idx_turnstile_gym, yukarıdaki indekslerin ön eki olduğu için gereksiz
+DROP INDEX idx_turnstile_gym ON TurnstileEvent;
+
+-- Member --------------------------------------------------------------
+-- Admin üye araması: name LIKE 'q%' OR email LIKE 'q%' (email zaten indeksli)
+CREATE INDEX idx_member_name ON Member(name);
+
+-- Membership ----------------------------------------------------------
+-- Turnike kredi düşümü, üyelik kontrolü, /api/my-gyms: member_id = ? AND gym_id = ? AND is_active = 1
+CREATE INDEX idx_membership_member_gym_active ON Membership(member_id, gym_id, is_active);
+-- Uygunluk önbelleği ve aktif üye sayımı: gym_id = ? AND is_active = 1 (member_id, type covering)
+CREATE INDEX idx_membership_gym_active ON Membership(gym_id, is_active, member_id, type);
+-- Admin üye listesi keyset sayfalama: gym_id = ? ORDER BY start_date DESC, membership_id DESC
+CREATE INDEX idx_membership_gym_start ON Membership(gym_id, start_date);
+-- Tek kolonlu indeksler bileşiklerin ön eki (veya seçiciliği düşük: is_active)
+DROP INDEX idx_membership_gym ON Membership;
+DROP INDEX idx_membership_member ON Membership;
+DROP INDEX idx_membership_active ON Membership;
+
+-- Trainer -------------------------------------------------------------
+-- Salondaki antrenörler ve trainers_in_gym sayımı: gym_id = ? AND is_in_gym = 1
+CREATE INDEX idx_trainer_gym_in_gym ON Trainer(gym_id, is_in_gym);
+-- Antrenör listesi: gym_id = ? ORDER BY rating_avg DESC
+CREATE INDEX idx_trainer_gym_rating ON Trainer(gym_id, rating_avg);
+DROP INDEX idx_trainer_gym ON Trainer;
+DROP INDEX idx_trainer_in_gym ON Trainer;
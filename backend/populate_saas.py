@@ -1,5 +1,30 @@
+"""
+GymPro örnek veri üretici ve yükleyici.
+
+Veri bellekte üretilir (kimlikler Python tarafında atanır, e-posta ve üyelik
+çakışmaları burada elenir) ve tablo başına düz TSV dosyalarına yazılır; turnike
+geçmişi salon başına ayrı süreçlerde üretilir. Dosyalar sonra tablo tablo toplu
+yüklenir: executemany ile çok satırlı INSERT'ler veya --infile ile LOAD DATA
+LOCAL INFILE. Her BATCH_SIZE satırda bir commit yapılır.
+
+Aynı --seed ve aynı gün aynı veriyi üretir: rastgele çekimler çalıştırma saatinden
+bağımsızdır, yalnızca bugünün henüz gelmemiş olayları en sonda ayıklanır.
+
+Kullanım:
+    python populate_saas.py                                  # varsayılan küçük veri seti
+    python populate_saas.py --gyms 200 --members 200000 --days 90 --seed 42
+    python populate_saas.py --gyms 200 --members 200000 --dump ./seed   # sadece dosyaya üret
+    python populate_saas.py --load ./seed --infile           # üretilmiş dosyaları hızlıca yükle
+"""
+import argparse
+import glob
+import json
 import mysql.connector
 import random
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, date
 import os
 
@@ -11,6 +36,27 @@ DB_CONFIG = {
     'database': os.environ.get('DB_NAME', 'gympro_db')
 }
 
+TEST_USER_EMAIL = "test@test.com"
+
+# Toplu yazma: commit başına satır sayısı
+BATCH_SIZE = int(os.environ.get('SEED_BATCH_SIZE', 5000))
+
+# Yazılan kolonlar (kimlik kolonları açıkça verilir, AUTO_INCREMENT'e bırakılmaz)
+TABLE_COLUMNS = {
+    'Gym': ('gym_id', 'name', 'location', 'capacity'),
+    'GymAdmin': ('gym_id', 'username', 'password'),
+    'Exercise': ('exercise_id', 'name', 'muscle_group'),
+    'FixedWorkout': ('fixed_id', 'gym_id', 'title', 'duration_min'),
+    'FixedWorkoutExercise': ('fixed_id', 'exercise_id', 'order_no', 'sets', 'reps', 'rest_sec'),
+    'Member': ('member_id', 'name', 'email', 'password', 'phone', 'gender', 'birth_date'),
+    'Membership': ('gym_id', 'member_id', 'type', 'start_date', 'end_date',
+                   'credit_total', 'credit_used', 'is_active'),
+    'CustomRoutine': ('routine_id', 'member_id', 'title'),
+    'CustomRoutineExercise': ('routine_id', 'exercise_id', 'order_no', 'sets', 'reps', 'rest_sec'),
+    'Trainer': ('gym_id', 'member_id', 'name', 'specialty', 'is_in_gym', 'rating_avg'),
+    'TurnstileEvent': ('gym_id', 'member_id', 'ts', 'direction'),
+}
+
 # --- İSİM HAVUZLARI (TÜİK Verilerine Yakın) ---
 MALE_NAMES = [
     "Mehmet", "Mustafa", "Ahmet", "Ali", "Hüseyin", "Hasan", "İbrahim", "İsmail", "Osman", "Yusuf",
@@ -36,8 +82,47 @@ SURNAMES = [
     "Işık", "Kaplan", "Avcı", "Sarı", "Tekin", "Taş", "Köse", "Yüksel", "Ateş", "Aksoy"
 ]
 
-def get_db_connection():
-    return mysql.connector.connect(**DB_CONFIG)
+# --- SALON HAVUZU ---
+# İlk salonlar her zaman bu örneklerdir (test kullanıcısı ilk ikisine üyedir)
+SAMPLE_GYMS = [
+    ("FitZone Kadıköy", "Kadıköy, İstanbul", 150),
+    ("PowerGym Beşiktaş", "Beşiktaş, İstanbul", 120),
+    ("IronByte Crossfit", "Çankaya, Ankara", 80),
+    ("Ege Fitness", "Bornova, İzmir", 200)
+]
+
+GYM_BRANDS = ["FitZone", "PowerGym", "IronByte", "Ege Fitness", "MacFit", "Pulse", "Atlas Gym", "CoreLab"]
+
+DISTRICTS = [
+    ("Kadıköy", "İstanbul"), ("Beşiktaş", "İstanbul"), ("Üsküdar", "İstanbul"), ("Şişli", "İstanbul"),
+    ("Ataşehir", "İstanbul"), ("Bakırköy", "İstanbul"), ("Çankaya", "Ankara"), ("Keçiören", "Ankara"),
+    ("Yenimahalle", "Ankara"), ("Bornova", "İzmir"), ("Karşıyaka", "İzmir"), ("Konak", "İzmir"),
+    ("Nilüfer", "Bursa"), ("Muratpaşa", "Antalya"), ("Seyhan", "Adana"), ("Selçuklu", "Konya")
+]
+
+EXERCISES = [
+    ("Bench Press", "Chest"), ("Squat", "Legs"), ("Deadlift", "Back"),
+    ("Overhead Press", "Shoulders"), ("Lat Pulldown", "Back"), ("Plank", "Core"),
+    ("Bicep Curl", "Arms"), ("Tricep Pushdown", "Arms"), ("Leg Press", "Legs"),
+    ("Rowing Machine", "Cardio"), ("Treadmill Run", "Cardio"), ("Pull Up", "Back"),
+    ("Dips", "Arms"), ("Lunges", "Legs"), ("Face Pull", "Shoulders")
+]
+
+# --- TURNİKE TRAFİĞİ ---
+# Saat ağırlıkları TRAFFIC_FIRST_HOUR'dan (06:00) başlar: hafta içi sabah ve akşam
+# iş çıkışı zirveleri, hafta sonu öğleye yayılan tek tepe. İlk değer günlük ziyaret çarpanı.
+TRAFFIC_FIRST_HOUR = 6
+HOURLY_TRAFFIC = {
+    #            06 07 08 09 10 11 12 13 14 15 16 17  18  19 20 21 22
+    'weekday': (1.0, [4, 8, 7, 4, 3, 3, 5, 4, 3, 3, 5, 9, 10, 9, 6, 3, 1]),
+    'weekend': (0.7, [1, 2, 4, 7, 9, 9, 8, 7, 6, 6, 5, 4, 4, 3, 2, 1, 0]),
+}
+
+# manifest.json'a yazılan üretim parametreleri
+GENERATOR_OPTIONS = ('gyms', 'members', 'memberships', 'days', 'visit_rate', 'seed')
+
+def get_db_connection(allow_local_infile=False):
+    return mysql.connector.connect(**DB_CONFIG, allow_local_infile=allow_local_infile)
 
 def tr_to_en(text):
     """Türkçe karakterleri İngilizce karşılıklarına çevirir (Email için)"""
@@ -49,11 +134,11 @@ def tr_to_en(text):
         text = text.replace(k, v)
     return text
 
-def random_date_of_birth(min_age=18, max_age=50):
+def random_date_of_birth(rng=random, min_age=18, max_age=50):
     today = date.today()
     start_date = today - timedelta(days=max_age*365)
     end_date = today - timedelta(days=min_age*365)
-    random_days = random.randint(0, (end_date - start_date).days)
+    random_days = rng.randint(0, (end_date - start_date).days)
     return start_date + timedelta(days=random_days)
 
 def clean_tables(cursor):
@@ -62,272 +147,439 @@ def clean_tables(cursor):
     tables = [
         "TurnstileEvent", "CustomRoutineExercise", "CustomRoutine", 
         "FixedWorkoutExercise", "FixedWorkout", "Membership", 
-        "Member", "Trainer", "GymAdmin", "Gym", "Exercise"
+        "Member", "Trainer", "GymAdmin", "GymStats", "TurnstileHourly", "TurnstileDaily",
+        "RollupOpenVisit", "RollupWatermark", "TurnstileArchive", "Gym", "Exercise"
     ]
+    # Aylık arşiv tabloları (archive_turnstile.py) yeni olaylarla çakışmasın
+    cursor.execute("SHOW TABLES LIKE 'TurnstileEvent\\_%'")
+    tables += [row[0] for row in cursor.fetchall()]
     for table in tables:
         try:
+            if table.startswith("TurnstileEvent_"):
+                cursor.execute(f"DROP TABLE {table}")
+                continue
             cursor.execute(f"TRUNCATE TABLE {table}")
         except mysql.connector.Error as err:
             print(f"Uyarı: {table} temizlenemedi: {err}")
     cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    # Rollup watermark satırı createDB.sql'deki gibi yeniden oluşturulur (rollup onu eklemez)
+    cursor.execute("INSERT IGNORE INTO RollupWatermark (name, last_event_id) VALUES ('turnstile', 0)")
     print("✅ Tablolar temizlendi.")
 
-def populate_saas_data():
-    conn = get_db_connection()
+def tsv_value(value):
+    """Düz dosya / LOAD DATA alanı: NULL -> \\N, özel karakterler kaçışlanır."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    text = str(value)
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+_TSV_ESCAPES = {'t': '\t', 'n': '\n', '\\': '\\'}
+
+def tsv_parse(field):
+    """tsv_value'nun tersi."""
+    if field == '\\N':
+        return None
+    if '\\' not in field:
+        return field
+    return re.sub(r'\\(.)', lambda m: _TSV_ESCAPES.get(m.group(1), m.group(1)), field)
+
+def write_tsv(path, rows):
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for row in rows:
+            f.write('\t'.join(tsv_value(v) for v in row) + '\n')
+            count += 1
+    return count
+
+def read_tsv(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        for line in f:
+            yield tuple(tsv_parse(field) for field in line.rstrip('\n').split('\t'))
+
+def table_files(directory, table):
+    """Bir tablonun düz dosyaları: <Tablo>.tsv ve salon başına <Tablo>.<gym_id>.tsv parçaları."""
+    single = os.path.join(directory, f"{table}.tsv")
+    parts = sorted(glob.glob(os.path.join(directory, f"{table}.*.tsv")))
+    return ([single] if os.path.exists(single) else []) + parts
+
+# ---------------------------------------------------------
+# TOPLU YAZICI
+# ---------------------------------------------------------
+class BulkWriter:
+    """Satırları tablo başına batch_size'lık parçalarla yazar, her parçadan sonra commit eder."""
+
+    def __init__(self, conn, batch_size=BATCH_SIZE, use_infile=False):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.batch_size = max(1, batch_size)
+        self.use_infile = use_infile
+        self.counts = {}
+
+    def write(self, table, rows):
+        """rows bir liste veya generator olabilir; bellekte en fazla bir batch tutulur."""
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(table, batch)
+                batch = []
+        if batch:
+            self._flush(table, batch)
+        return self.counts.get(table, 0)
+
+    def load_file(self, table, path):
+        """Düz dosyayı yükler: --infile ile dosya doğrudan sunucuya akar, yoksa batch'lerle INSERT."""
+        if not self.use_infile:
+            return self.write(table, read_tsv(path))
+        self._load_infile(table, path)
+        self.conn.commit()
+        self.counts[table] = self.counts.get(table, 0) + self.cursor.rowcount
+        return self.counts[table]
+
+    def _flush(self, table, batch):
+        if self.use_infile:
+            with tempfile.NamedTemporaryFile('w', suffix='.tsv', delete=False) as f:
+                path = f.name
+            try:
+                write_tsv(path, batch)
+                self._load_infile(table, path)
+            finally:
+                os.remove(path)
+        else:
+            # mysql.connector, INSERT ... VALUES için executemany'yi tek çok satırlı INSERT'e çevirir
+            columns = TABLE_COLUMNS[table]
+            placeholders = ", ".join(["%s"] * len(columns))
+            self.cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", batch)
+        self.conn.commit()
+        self.counts[table] = self.counts.get(table, 0) + len(batch)
+
+    def _load_infile(self, table, path):
+        self.cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'
+            ({', '.join(TABLE_COLUMNS[table])})
+        """, (os.path.abspath(path),))
+
+    def close(self):
+        self.cursor.close()
+
+# ---------------------------------------------------------
+# VERİ ÜRETİMİ
+# ---------------------------------------------------------
+def generate_gyms(count, rng):
+    """İlk salonlar sabit isimli örnekler, gerisi marka + semt kombinasyonlarıdır."""
+    gyms = list(SAMPLE_GYMS[:count])
+    used = {name for name, _, _ in gyms}
+    while len(gyms) < count:
+        district, city = rng.choice(DISTRICTS)
+        name = f"{rng.choice(GYM_BRANDS)} {district}"
+        if name in used:
+            name = f"{name} {len(gyms) + 1}"
+        used.add(name)
+        gyms.append((name, f"{district}, {city}", rng.choice([80, 100, 120, 150, 200, 250])))
+    return gyms
+
+def generate_dataset(options, rng):
+    """
+    Turnike geçmişi hariç tüm tabloların satırlarını üretir.
+    Dönüş: ({tablo: [satır, ...]}, {gym_id: [üyeliği olan member_id, ...]})
+    """
+    data = {table: [] for table in TABLE_COLUMNS if table != 'TurnstileEvent'}
+
+    # 1. SPOR SALONLARI
+    gym_ids, gym_weights = [], []
+    for gym_id, (name, loc, cap) in enumerate(generate_gyms(options.gyms, rng), start=1):
+        data['Gym'].append((gym_id, name, loc, cap))
+        gym_ids.append(gym_id)
+        gym_weights.append(cap)
+
+    # 2. GYM ADMINLERİ (kullanıcı adı benzersiz olmalı)
+    usernames = set()
+    for gym_id, name, _, _ in data['Gym']:
+        username = tr_to_en(name.split()[0].lower()) + "_admin"
+        if username in usernames:
+            username = f"{tr_to_en(name.split()[0].lower())}{gym_id}_admin"
+        usernames.add(username)
+        data['GymAdmin'].append((gym_id, username, "admin123"))
+
+    # 3. GLOBAL EGZERSİZLER
+    ex_ids_map = {}
+    for exercise_id, (name, muscle) in enumerate(EXERCISES, start=1):
+        data['Exercise'].append((exercise_id, name, muscle))
+        ex_ids_map[name] = exercise_id
+    ex_ids_list = list(ex_ids_map.values())
+
+    # 4. SABİT ANTRENMANLAR
+    global_workouts = [
+        ("Full Body Beginner", 60, ["Squat", "Bench Press", "Lat Pulldown", "Overhead Press", "Plank"]),
+        ("Upper Body Power", 75, ["Bench Press", "Rowing Machine", "Overhead Press", "Bicep Curl", "Tricep Pushdown"])
+    ]
+    for title, duration, ex_list in global_workouts:
+        fw_id = len(data['FixedWorkout']) + 1
+        data['FixedWorkout'].append((fw_id, None, title, duration))
+        for i, ex_name in enumerate(ex_list):
+            if ex_name in ex_ids_map:
+                data['FixedWorkoutExercise'].append((fw_id, ex_ids_map[ex_name], i+1, 3, 10, 60))
+
+    # Local Workout (IronByte)
+    iron_id = next((gym[0] for gym in data['Gym'] if gym[1] == "IronByte Crossfit"), None)
+    if iron_id:
+        wod_id = len(data['FixedWorkout']) + 1
+        data['FixedWorkout'].append((wod_id, iron_id, 'WOD: Murph Prep', 45))
+        data['FixedWorkoutExercise'].append((wod_id, ex_ids_map["Pull Up"], 1, 5, 20, 0))
+
+    # 5. TEST KULLANICISI
+    today = date.today()
+    test_member_id = 1
+    data['Member'].append((test_member_id, "Test Kullanıcı", TEST_USER_EMAIL, "123456",
+                           "5550000000", "M", date(2000, 1, 1)))
+    # (gym_id, member_id) -> satır: aynı salona ikinci üyelik burada elenir
+    memberships = {
+        (gym_ids[0], test_member_id):
+            (gym_ids[0], test_member_id, 'timed', today, today + timedelta(days=365), 0, 0, 1),
+    }
+    if len(gym_ids) > 1:
+        memberships[(gym_ids[1], test_member_id)] = \
+            (gym_ids[1], test_member_id, 'credit', today, None, 50, 12, 1)
+
+    # 6. DİĞER ÜYELER & ÜYELİKLER
+    member_ids = [test_member_id]
+    emails = {TEST_USER_EMAIL}
+
+    # Rastgele Üyeler (İsim Havuzundan)
+    for _ in range(options.members):
+        member_id = len(member_ids) + 1
+        gender = rng.choice(['M', 'F'])
+        if gender == 'M':
+            fname = rng.choice(MALE_NAMES)
+        else:
+            fname = rng.choice(FEMALE_NAMES)
+        lname = rng.choice(SURNAMES)
+
+        full_name = f"{fname} {lname}"
+        # Email oluştur: ahmet.yilmaz.45@example.com gibi; çakışırsa üye numarası kullanılır
+        email_prefix = f"{tr_to_en(fname.lower())}.{tr_to_en(lname.lower())}"
+        email = f"{email_prefix}.{rng.randint(100,999)}@example.com"
+        if email in emails:
+            email = f"{email_prefix}.{member_id}@example.com"
+        emails.add(email)
+
+        phone = f"05{rng.choice(['32','33','42','43','55','05','06','07'])}{rng.randint(1000000, 9999999)}"
+        data['Member'].append((member_id, full_name, email, '123456', phone, gender, random_date_of_birth(rng)))
+        member_ids.append(member_id)
+
+        # Üyelik sayısı: en az 1, ortalama options.memberships (geometrik dağılım)
+        extra_p = 1 - 1 / max(options.memberships, 1)
+        wanted = 1
+        while wanted < len(gym_ids) and rng.random() < extra_p:
+            wanted += 1
+        # Büyük salonlar daha çok üye çeker
+        member_gyms = set()
+        while len(member_gyms) < wanted:
+            member_gyms.add(rng.choices(gym_ids, weights=gym_weights)[0])
+
+        for gym_id in sorted(member_gyms):
+            m_type = rng.choice(['timed', 'credit'])
+            start = today - timedelta(days=rng.randint(0, 365))
+
+            if m_type == 'timed':
+                end = start + timedelta(days=365)
+                is_active = 1 if end > today else 0
+                memberships[(gym_id, member_id)] = (gym_id, member_id, m_type, start, end, 0, 0, is_active)
+            else:
+                total = rng.choice([10, 20, 50, 100])
+                used = rng.randint(0, total)
+                is_active = 1 if used < total else 0
+                memberships[(gym_id, member_id)] = (gym_id, member_id, m_type, start, None, total, used, is_active)
+    data['Membership'] = list(memberships.values())
+
+    # 7. KİŞİSEL RUTİNLER
+    routine_names = ["Bacak Günü", "Sabah Kardiyosu", "Güç Antrenmanı", "Cuma Programı", "Tatil Programı", "Karın Kası Odaklı"]
+
+    for mid in member_ids:
+        if rng.random() > 0.4:
+            routine_id = len(data['CustomRoutine']) + 1
+            data['CustomRoutine'].append((routine_id, mid, rng.choice(routine_names)))
+
+            selected_exercises = rng.sample(ex_ids_list, rng.randint(3, 6))
+            for i, eid in enumerate(selected_exercises):
+                data['CustomRoutineExercise'].append((routine_id, eid, i+1, 3, 10, 60))
+
+    # 8. TRAINERS (İsim Havuzundan)
+    for gym_id in gym_ids:
+        for _ in range(rng.randint(3, 5)):
+            # Rastgele isim seç
+            if rng.choice([True, False]):
+                t_name = f"{rng.choice(MALE_NAMES)} {rng.choice(SURNAMES)}"
+            else:
+                t_name = f"{rng.choice(FEMALE_NAMES)} {rng.choice(SURNAMES)}"
+
+            specialty = rng.choice(["Vücut Geliştirme", "Crossfit", "Yoga", "Pilates", "Rehabilitasyon", "Powerlifting"])
+            is_in = rng.choice([1, 0])
+            rating = round(rng.uniform(3.5, 5.0), 1)
+
+            linked_member_id = None
+            if rng.random() > 0.5:
+                linked_member_id = rng.choice(member_ids)
+
+            data['Trainer'].append((gym_id, linked_member_id, t_name, specialty, is_in, rating))
+
+    gym_member_ids = {gym_id: [] for gym_id in gym_ids}
+    for gym_id, mid in memberships:
+        gym_member_ids[gym_id].append(mid)
+    return data, gym_member_ids
+
+def generate_turnstile_events(gym_id, gym_member_ids, days, visit_rate, rng):
+    """
+    Bir salonun turnike geçmişi. Günlük ziyaret sayısı üye sayısı x visit_rate
+    (hafta sonu HOURLY_TRAFFIC oranında), saatler HOURLY_TRAFFIC ağırlıklarıyla seçilir.
+    Bir üye günde en fazla bir kez gelir. Olaylar ts'ye göre sıralanır; salon dosyaları
+    sırayla yüklendiği için event_id sırası yalnızca salon içinde zaman sırasıyla aynıdır
+    (rollup kovaları ve açık ziyaretleri salon bazlı olduğundan bu yeterlidir).
+    Tüm rastgele çekimler her olay için yapılır, gelecekteki olaylar sonra atılır; böylece
+    geçmiş günlerin verisi çalıştırma saatine bağlı değildir.
+    """
+    now = datetime.now()
+    events = []
+    if not gym_member_ids:
+        return events
+    for day_offset in range(days):
+        current_day = (now - timedelta(days=day_offset)).replace(hour=0, minute=0, second=0, microsecond=0)
+        profile = 'weekend' if current_day.weekday() >= 5 else 'weekday'
+        day_factor, hour_weights = HOURLY_TRAFFIC[profile]
+        visits = round(len(gym_member_ids) * visit_rate * day_factor * rng.uniform(0.8, 1.2))
+        visitors = rng.sample(gym_member_ids, min(visits, len(gym_member_ids)))
+        hours = rng.choices(range(TRAFFIC_FIRST_HOUR, TRAFFIC_FIRST_HOUR + len(hour_weights)),
+                            weights=hour_weights, k=len(visitors))
+
+        for mid, hour in zip(visitors, hours):
+            entry_time = current_day.replace(hour=hour, minute=rng.randint(0, 59))
+            events.append((gym_id, mid, entry_time, 'in'))
+
+            # %10 çıkış okutmadan ayrılır
+            if rng.random() > 0.1:
+                duration = min(180, max(20, round(rng.gauss(70, 25))))
+                exit_time = entry_time + timedelta(minutes=duration, seconds=rng.randint(0, 59))
+                events.append((gym_id, mid, exit_time, 'out'))
+    events = [event for event in events if event[2] <= now]
+    events.sort(key=lambda event: event[2])
+    return events
+
+def write_gym_events(job):
+    """Süreç havuzu işi: bir salonun olaylarını üretip <dizin>/TurnstileEvent.<gym_id>.tsv'ye yazar."""
+    gym_id, member_ids, options, directory = job
+    # Salon başına ayrı tohum: sonuç işçi sayısından ve sıralamadan bağımsızdır
+    rng = random.Random(f"{options.seed}:{gym_id}")
+    events = generate_turnstile_events(gym_id, member_ids, options.days, options.visit_rate, rng)
+    return write_tsv(os.path.join(directory, f"TurnstileEvent.{gym_id:05d}.tsv"), events)
+
+def generate_files(options, directory):
+    """Tüm veri setini düz dosyalara üretir; dönüş {tablo: satır_sayısı}."""
+    os.makedirs(directory, exist_ok=True)
+    started = time.perf_counter()
+    data, gym_member_ids = generate_dataset(options, random.Random(options.seed))
+    counts = {table: write_tsv(os.path.join(directory, f"{table}.tsv"), rows)
+              for table, rows in data.items()}
+    print(f"✅ Tablolar üretildi ({sum(counts.values())} satır, {time.perf_counter() - started:.1f} sn).")
+
+    print(f"⏳ Turnike geçmişi üretiliyor ({len(gym_member_ids)} salon, {options.workers} işçi)...")
+    started = time.perf_counter()
+    jobs = [(gym_id, member_ids, options, directory) for gym_id, member_ids in gym_member_ids.items()]
+    if options.workers > 1:
+        with ProcessPoolExecutor(max_workers=options.workers) as pool:
+            counts['TurnstileEvent'] = sum(pool.map(write_gym_events, jobs, chunksize=4))
+    else:
+        counts['TurnstileEvent'] = sum(map(write_gym_events, jobs))
+    print(f"✅ TurnstileEvent: {counts['TurnstileEvent']} olay ({time.perf_counter() - started:.1f} sn).")
+
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': datetime.now().isoformat(timespec='seconds'),
+                   'options': {k: v for k, v in vars(options).items() if k in GENERATOR_OPTIONS},
+                   'counts': counts}, f, ensure_ascii=False, indent=2)
+    return counts
+
+def load_files(conn, directory, batch_size=BATCH_SIZE, use_infile=False):
+    """Düz dosyaları TABLE_COLUMNS sırasıyla veritabanına yükler."""
+    cursor = conn.cursor()
+    writer = BulkWriter(conn, batch_size, use_infile)
+    try:
+        # Kimlikler ve benzersiz alanlar üretim sırasında tekilleştirildi;
+        # yükleme boyunca sunucu tarafı kontrolleri kapat
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        cursor.execute("SET UNIQUE_CHECKS = 0")
+        for table in TABLE_COLUMNS:
+            started = time.perf_counter()
+            for path in table_files(directory, table):
+                writer.load_file(table, path)
+            print(f"✅ {table}: {writer.counts.get(table, 0)} satır ({time.perf_counter() - started:.1f} sn)")
+        cursor.execute("SET UNIQUE_CHECKS = 1")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        return writer.counts
+    finally:
+        writer.close()
+        cursor.close()
+
+def populate_saas_data(options):
+    if options.dump:
+        print(f"🚀 Veri {options.dump} klasörüne üretiliyor (seed={options.seed})...")
+        generate_files(options, options.dump)
+        print(f"🎉 İŞLEM TAMAM! Yüklemek için: python populate_saas.py --load {options.dump}")
+        return
+
+    conn = get_db_connection(allow_local_infile=options.infile)
     cursor = conn.cursor()
-    
+
     try:
         clean_tables(cursor)
-        print("🚀 Veri Yükleme Başladı (Gerçekçi İsimler)...")
-
-        # ---------------------------------------------------------
-        # 1. SPOR SALONLARI
-        # ---------------------------------------------------------
-        gyms = [
-            ("FitZone Kadıköy", "Kadıköy, İstanbul", 150),
-            ("PowerGym Beşiktaş", "Beşiktaş, İstanbul", 120),
-            ("IronByte Crossfit", "Çankaya, Ankara", 80),
-            ("Ege Fitness", "Bornova, İzmir", 200)
-        ]
-        gym_map = {} 
-        
-        for name, loc, cap in gyms:
-            cursor.execute("INSERT INTO Gym (name, location, capacity) VALUES (%s, %s, %s)", (name, loc, cap))
-            gym_map[name] = cursor.lastrowid
-        
-        print(f"✅ {len(gyms)} Spor Salonu oluşturuldu.")
-
-        # ---------------------------------------------------------
-        # 2. GYM ADMINLERİ
-        # ---------------------------------------------------------
-        for gym_name, gym_id in gym_map.items():
-            username = gym_name.split()[0].lower() + "_admin"
-            cursor.execute("INSERT INTO GymAdmin (gym_id, username, password) VALUES (%s, %s, %s)", 
-                           (gym_id, username, "admin123"))
-        print("✅ Salon Yöneticileri oluşturuldu.")
-
-        # ---------------------------------------------------------
-        # 3. GLOBAL EGZERSİZLER
-        # ---------------------------------------------------------
-        exercises = [
-            ("Bench Press", "Chest"), ("Squat", "Legs"), ("Deadlift", "Back"),
-            ("Overhead Press", "Shoulders"), ("Lat Pulldown", "Back"), ("Plank", "Core"),
-            ("Bicep Curl", "Arms"), ("Tricep Pushdown", "Arms"), ("Leg Press", "Legs"),
-            ("Rowing Machine", "Cardio"), ("Treadmill Run", "Cardio"), ("Pull Up", "Back"),
-            ("Dips", "Arms"), ("Lunges", "Legs"), ("Face Pull", "Shoulders")
-        ]
-        ex_ids_list = []
-        ex_ids_map = {}
-        
-        for name, muscle in exercises:
-            cursor.execute("INSERT INTO Exercise (name, muscle_group) VALUES (%s, %s)", (name, muscle))
-            new_id = cursor.lastrowid
-            ex_ids_list.append(new_id)
-            ex_ids_map[name] = new_id
-            
-        print("✅ Egzersiz havuzu oluşturuldu.")
-
-        # ---------------------------------------------------------
-        # 4. SABİT ANTRENMANLAR
-        # ---------------------------------------------------------
-        global_workouts = [
-            ("Full Body Beginner", 60, ["Squat", "Bench Press", "Lat Pulldown", "Overhead Press", "Plank"]),
-            ("Upper Body Power", 75, ["Bench Press", "Rowing Machine", "Overhead Press", "Bicep Curl", "Tricep Pushdown"])
-        ]
-        
-        for title, duration, ex_list in global_workouts:
-            cursor.execute("INSERT INTO FixedWorkout (gym_id, title, duration_min) VALUES (NULL, %s, %s)", (title, duration))
-            fw_id = cursor.lastrowid
-            for i, ex_name in enumerate(ex_list):
-                if ex_name in ex_ids_map:
-                    cursor.execute("INSERT INTO FixedWorkoutExercise (fixed_id, exercise_id, order_no, sets, reps, rest_sec) VALUES (%s, %s, %s, 3, 10, 60)", 
-                                   (fw_id, ex_ids_map[ex_name], i+1))
-
-        # Local Workout (IronByte)
-        iron_id = gym_map.get("IronByte Crossfit")
-        if iron_id:
-            cursor.execute("INSERT INTO FixedWorkout (gym_id, title, duration_min) VALUES (%s, 'WOD: Murph Prep', 45)", (iron_id,))
-            wod_id = cursor.lastrowid
-            cursor.execute("INSERT INTO FixedWorkoutExercise (fixed_id, exercise_id, order_no, sets, reps, rest_sec) VALUES (%s, %s, 1, 5, 20, 0)", 
-                           (wod_id, ex_ids_map["Pull Up"]))
-
-        print("✅ Sabit Antrenmanlar eklendi.")
-
-        # ---------------------------------------------------------
-        # 5. TEST KULLANICISI
-        # ---------------------------------------------------------
-        test_user_email = "test@test.com"
-        cursor.execute("""
-            INSERT INTO Member (name, email, password, phone, gender, birth_date) 
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, ("Test Kullanıcı", test_user_email, "123456", "5550000000", "M", "2000-01-01"))
-        test_member_id = cursor.lastrowid
-
-        cursor.execute("""
-            INSERT INTO Membership (gym_id, member_id, type, start_date, end_date, is_active)
-            VALUES (%s, %s, 'timed', %s, %s, 1)
-        """, (gym_map["FitZone Kadıköy"], test_member_id, date.today(), date.today() + timedelta(days=365)))
-        
-        cursor.execute("""
-            INSERT INTO Membership (gym_id, member_id, type, start_date, credit_total, credit_used, is_active)
-            VALUES (%s, %s, 'credit', %s, 50, 12, 1)
-        """, (gym_map["PowerGym Beşiktaş"], test_member_id, date.today()))
-
-        print(f"✅ Test Kullanıcısı oluşturuldu: {test_user_email} / 123456")
-
-        # ---------------------------------------------------------
-        # 6. DİĞER ÜYELER & ÜYELİKLER
-        # ---------------------------------------------------------
-        member_ids = [test_member_id]
-        
-        # 120 Rastgele Üye (İsim Havuzundan)
-        for _ in range(120):
-            gender = random.choice(['M', 'F'])
-            if gender == 'M':
-                fname = random.choice(MALE_NAMES)
-            else:
-                fname = random.choice(FEMALE_NAMES)
-            lname = random.choice(SURNAMES)
-            
-            full_name = f"{fname} {lname}"
-            # Email oluştur: ahmet.yilmaz.45@example.com gibi
-            clean_fname = tr_to_en(fname.lower())
-            clean_lname = tr_to_en(lname.lower())
-            email = f"{clean_fname}.{clean_lname}.{random.randint(100,999)}@example.com"
-            
-            phone = f"05{random.choice(['32','33','42','43','55','05','06','07'])}{random.randint(1000000, 9999999)}"
-            birth_date = random_date_of_birth()
-
-            # Unique email kontrolü gerekebilir ama random sayı ile ihtimali düşürdük
-            try:
-                cursor.execute("INSERT INTO Member (name, email, password, phone, gender, birth_date) VALUES (%s, %s, '123456', %s, %s, %s)",
-                            (full_name, email, phone, gender, birth_date))
-                member_ids.append(cursor.lastrowid)
-            except mysql.connector.Error:
-                pass # Email çakışırsa atla
-
-        print(f"✅ {len(member_ids)} Üye oluşturuldu.")
-
-        # Üyelikleri dağıt
-        for gym_name, gym_id in gym_map.items():
-            gym_members = random.sample(member_ids, 40) # Her salona 40 üye
-            
-            for mid in gym_members:
-                cursor.execute("SELECT membership_id FROM Membership WHERE gym_id=%s AND member_id=%s", (gym_id, mid))
-                if cursor.fetchone(): continue
-
-                m_type = random.choice(['timed', 'credit'])
-                start = date.today() - timedelta(days=random.randint(0, 365))
-                
-                if m_type == 'timed':
-                    end = start + timedelta(days=365)
-                    is_active = 1 if end > date.today() else 0
-                    cursor.execute("""
-                        INSERT INTO Membership (gym_id, member_id, type, start_date, end_date, is_active)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (gym_id, mid, m_type, start, end, is_active))
-                else:
-                    total = random.choice([10, 20, 50, 100])
-                    used = random.randint(0, total)
-                    is_active = 1 if used < total else 0
-                    cursor.execute("""
-                        INSERT INTO Membership (gym_id, member_id, type, start_date, credit_total, credit_used, is_active)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """, (gym_id, mid, m_type, start, total, used, is_active))
-
-        print("✅ Üyelikler dağıtıldı.")
-
-        # ---------------------------------------------------------
-        # 7. KİŞİSEL RUTİNLER
-        # ---------------------------------------------------------
-        routine_names = ["Bacak Günü", "Sabah Kardiyosu", "Güç Antrenmanı", "Cuma Programı", "Tatil Programı", "Karın Kası Odaklı"]
-        
-        for mid in member_ids:
-            if random.random() > 0.4:
-                title = random.choice(routine_names)
-                cursor.execute("INSERT INTO CustomRoutine (member_id, title) VALUES (%s, %s)", (mid, title))
-                routine_id = cursor.lastrowid
-                
-                num_exercises = random.randint(3, 6)
-                selected_exercises = random.sample(ex_ids_list, num_exercises)
-                
-                for i, eid in enumerate(selected_exercises):
-                    cursor.execute("""
-                        INSERT INTO CustomRoutineExercise (routine_id, exercise_id, order_no, sets, reps, rest_sec)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (routine_id, eid, i+1, 3, 10, 60))
-        
-        print("✅ Kişisel rutinler oluşturuldu.")
-
-        # ---------------------------------------------------------
-        # 8. TRAINERS (İsim Havuzundan)
-        # ---------------------------------------------------------
-        for gym_name, gym_id in gym_map.items():
-            for _ in range(random.randint(3, 5)):
-                # Rastgele isim seç
-                if random.choice([True, False]):
-                    t_name = f"{random.choice(MALE_NAMES)} {random.choice(SURNAMES)}"
-                else:
-                    t_name = f"{random.choice(FEMALE_NAMES)} {random.choice(SURNAMES)}"
-
-                specialty = random.choice(["Vücut Geliştirme", "Crossfit", "Yoga", "Pilates", "Rehabilitasyon", "Powerlifting"])
-                is_in = random.choice([True, False])
-                rating = round(random.uniform(3.5, 5.0), 1)
-                
-                linked_member_id = None
-                if random.random() > 0.5:
-                    linked_member_id = random.choice(member_ids)
-
-                cursor.execute("""
-                    INSERT INTO Trainer (gym_id, member_id, name, specialty, is_in_gym, rating_avg) 
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (gym_id, linked_member_id, t_name, specialty, is_in, rating))
-
-        print("✅ Antrenörler oluşturuldu.")
-
-        # ---------------------------------------------------------
-        # 9. TURNİKE GEÇMİŞİ
-        # ---------------------------------------------------------
-        print("⏳ Turnike geçmişi oluşturuluyor (biraz sürebilir)...")
-        today = datetime.now()
-        
-        for gym_name, gym_id in gym_map.items():
-            cursor.execute("SELECT member_id FROM Membership WHERE gym_id = %s", (gym_id,))
-            gym_member_ids = [row[0] for row in cursor.fetchall()]
-            
-            if not gym_member_ids: continue
-
-            for day_offset in range(30):
-                current_day = today - timedelta(days=day_offset)
-                daily_entries = random.randint(20, 50)
-                
-                for _ in range(daily_entries):
-                    mid = random.choice(gym_member_ids)
-                    hour = random.randint(7, 21)
-                    minute = random.randint(0, 59)
-                    entry_time = current_day.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    
-                    if entry_time > datetime.now(): continue
-
-                    cursor.execute("INSERT INTO TurnstileEvent (gym_id, member_id, ts, direction) VALUES (%s, %s, %s, 'in')",
-                                   (gym_id, mid, entry_time))
-                    
-                    if random.random() > 0.1:
-                        duration = random.randint(30, 120)
-                        exit_time = entry_time + timedelta(minutes=duration)
-                        if exit_time < datetime.now():
-                            cursor.execute("INSERT INTO TurnstileEvent (gym_id, member_id, ts, direction) VALUES (%s, %s, %s, 'out')",
-                                           (gym_id, mid, exit_time))
-
-        conn.commit()
-        print("🎉 İŞLEM TAMAM! Gerçekçi Türk isimleri ile veritabanı hazır.")
+        started = time.perf_counter()
+        if options.load:
+            print(f"🚀 {options.load} klasöründeki düz dosyalar yükleniyor...")
+            counts = load_files(conn, options.load, options.batch_size, options.infile)
+        else:
+            print(f"🚀 Veri Yükleme Başladı (seed={options.seed})...")
+            with tempfile.TemporaryDirectory(prefix='gympro_seed_') as directory:
+                generate_files(options, directory)
+                counts = load_files(conn, directory, options.batch_size, options.infile)
+
+        print(f"✅ Test Kullanıcısı: {TEST_USER_EMAIL} / 123456")
+        print(f"🎉 İŞLEM TAMAM! {sum(counts.values())} satır {time.perf_counter() - started:.1f} sn'de yüklendi.")
+        print("   Sayaçlar için: python rebuild_stats.py && python rollup_turnstile.py")
 
     except mysql.connector.Error as err:
+        # Önceki batch'ler commit edilmiş olabilir; tekrar çalıştırmak tabloları baştan temizler
         print(f"❌ Hata: {err}")
         conn.rollback()
     finally:
         cursor.close()
         conn.close()
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="GymPro örnek verisini üretir ve toplu yükler.")
+    parser.add_argument('--gyms', type=int, default=4, help="salon sayısı (varsayılan 4)")
+    parser.add_argument('--members', type=int, default=120, help="test kullanıcısı dışındaki üye sayısı (varsayılan 120)")
+    parser.add_argument('--memberships', type=float, default=1.3,
+                        help="üye başına ortalama üyelik sayısı, en az 1 (varsayılan 1.3)")
+    parser.add_argument('--days', type=int, default=30, help="turnike geçmişi gün sayısı (varsayılan 30)")
+    parser.add_argument('--visit-rate', type=float, default=0.35,
+                        help="hafta içi bir üyenin o gün gelme olasılığı (varsayılan 0.35)")
+    parser.add_argument('--seed', type=int, default=None, help="tekrarlanabilir üretim için tohum (varsayılan rastgele)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="turnike geçmişini üreten süreç sayısı (varsayılan CPU sayısı)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"commit başına satır sayısı (varsayılan {BATCH_SIZE})")
+    parser.add_argument('--infile', action='store_true',
+                        help="executemany yerine LOAD DATA LOCAL INFILE kullan (sunucuda local_infile=ON olmalı)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--dump', metavar='KLASÖR', help="veritabanına dokunmadan düz dosyalara üret")
+    mode.add_argument('--load', metavar='KLASÖR', help="--dump ile üretilmiş dosyaları yükle (üretim yapmaz)")
+    options = parser.parse_args(argv)
+    if options.seed is None:
+        options.seed = random.randrange(2**31)
+    return options
+
 if __name__ == "__main__":
-    populate_saas_data()
\ No newline at end of file
+    populate_saas_data(parse_args())
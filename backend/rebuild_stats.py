@@ -0,0 +1,30 @@
+"""
+GymStats bakım komutu: salon istatistiklerini ana tablolardan yeniden hesaplar.
+
+Uygulama sayaçları yazma işlemlerinde artımlı günceller. Veritabanı uygulama dışından
+değiştirildiğinde (populate_saas.py, elle yapılan SQL düzeltmeleri) veya sayaçlardan
+şüphelenildiğinde çalıştırılır. Çalışan sunucu etkilenmez; o sürecin bellekteki
+doluluk sayacı gerekiyorsa /api/admin/gym/<id>/occupancy/rebuild ile yenilenir.
+
+Kullanım:
+    python rebuild_stats.py            # tüm salonlar
+    python rebuild_stats.py 1 3 7      # sadece verilen salonlar
+"""
+import sys
+import time
+
+import app as api
+
+def run():
+    gym_ids = [int(arg) for arg in sys.argv[1:]] or None
+    conn = api.get_db_connection()
+    try:
+        start = time.perf_counter()
+        count = api.refresh_gym_stats(conn, gym_ids)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+    print(f"{count} salonun istatistikleri yenilendi ({elapsed:.2f} sn).")
+
+if __name__ == "__main__":
+    run()
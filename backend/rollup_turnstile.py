@@ -0,0 +1,42 @@
+"""
+Turnike rollup komutu: TurnstileEvent'i watermark'tan itibaren saatlik/günlük
+kovalara (TurnstileHourly, TurnstileDaily) işler ve GymStats.people_inside'ı
+turnike geçmişinden yeniler.
+
+Sunucudaki arka plan işçisi (ROLLUP_INTERVAL) bunu periyodik olarak yapar; bu komut
+ilk doldurma (populate_saas.py sonrası) veya işçi kapalıyken cron ile çalıştırmak içindir.
+Sunucu ile aynı anda çalıştırılabilir: watermark satırı kilitlendiği için aynı olay iki kez
+sayılmaz. Son ROLLUP_SAFETY_LAG saniyedeki olaylar (henüz commit edilmemiş daha küçük
+id'li olaylar beklenirken) işlenmez, bir sonraki çalıştırmada sayılır. Geriye tarihli ts ile
+toplu gönderilen olaylar için bu garanti yalnızca tek API sürecinde (tek yazıcı) geçerlidir;
+ayrıntı: app.rollup_turnstile_batch.
+
+Kullanım:
+    python rollup_turnstile.py [batch_boyutu]
+"""
+import sys
+import time
+
+import app as api
+
+def run():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else api.ROLLUP_CONFIG['batch_size']
+    conn = api.get_db_connection()
+    try:
+        start = time.perf_counter()
+        total = 0
+        while True:
+            processed = api.rollup_turnstile_batch(conn, batch_size)
+            total += processed
+            if processed:
+                print(f"  {total} olay işlendi...")
+            if processed < batch_size:
+                break
+        api.refresh_people_inside(conn)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+    print(f"Rollup tamam: {total} olay, {elapsed:.2f} sn.")
+
+if __name__ == "__main__":
+    run()
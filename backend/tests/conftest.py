@@ -0,0 +1,15 @@
+"""
+Veritabanı gerektirmeyen birim testleri için ortak ayarlar.
+
+Testler app.py'yi modül olarak içe aktarır; bağlantı havuzu ilk kullanımda oluştuğundan
+içe aktarma veritabanına bağlanmaz. pyodbc (unixODBC) kurulu değilse test modülleri atlanır.
+
+Kullanım (backend/ dizininde):
+    python -m pytest tests
+"""
+import os
+import sys
+
+# Arka plan rollup işçisi testlerde başlamasın
+os.environ.setdefault('ROLLUP_INTERVAL', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,88 @@
+import pytest
+
+pytest.importorskip('pyodbc', reason='pyodbc ve unixODBC gerekli', exc_type=ImportError)
+import app as api  # noqa: E402
+
+
+class Clock:
+    """time.monotonic yerine geçen, elle ilerletilen saat."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(api.time, 'monotonic', fake)
+    return fake
+
+
+@pytest.fixture
+def cache():
+    cache = api.TTLCache('test-cache', ttl=60)
+    cache.enabled = True
+    yield cache
+    api.CACHES.pop('test-cache', None)
+
+
+class Loader:
+    def __init__(self, value='v'):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_value_is_served_until_ttl_expires(cache, clock):
+    loader = Loader()
+    assert cache.get_or_load('k', loader) == 'v'
+    clock.now += 59
+    assert cache.get_or_load('k', loader) == 'v'
+    assert loader.calls == 1
+
+    clock.now += 1
+    loader.value = 'w'
+    assert cache.get_or_load('k', loader) == 'w'
+    assert loader.calls == 2
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+
+
+def test_invalidate_single_key_keeps_others(cache, clock):
+    a, b = Loader('a'), Loader('b')
+    cache.get_or_load('a', a)
+    cache.get_or_load('b', b)
+    cache.invalidate('a')
+    cache.get_or_load('a', a)
+    cache.get_or_load('b', b)
+    assert a.calls == 2
+    assert b.calls == 1
+
+
+def test_invalidate_during_load_does_not_store_stale_value(cache, clock):
+    def stale_loader():
+        # Yükleme sürerken bir yazma endpoint'i önbelleği geçersiz kılar
+        cache.invalidate()
+        return 'stale'
+
+    assert cache.get_or_load('k', stale_loader) == 'stale'
+    fresh = Loader('fresh')
+    assert cache.get_or_load('k', fresh) == 'fresh'
+    assert fresh.calls == 1
+
+
+def test_bypass_and_disabled_cache_always_load(cache, clock):
+    loader = Loader()
+    cache.get_or_load('k', loader)
+    cache.get_or_load('k', loader, bypass=True)
+    cache.enabled = False
+    cache.get_or_load('k', loader)
+    assert loader.calls == 3
+    assert cache.stats()['bypassed'] == 2
@@ -0,0 +1,88 @@
+import pytest
+
+pytest.importorskip('pyodbc', reason='pyodbc ve unixODBC gerekli', exc_type=ImportError)
+import app as api  # noqa: E402
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    versions = api.ResourceVersions(('things',))
+    monkeypatch.setattr(api, 'resource_versions', versions)
+    monkeypatch.setitem(api.CONDITIONAL_GET_CONFIG, 'enabled', True)
+    monkeypatch.setitem(api.CONDITIONAL_GET_CONFIG, 'max_age', 0)
+    monkeypatch.setitem(api.COMPRESSION_CONFIG, 'enabled', True)
+    return versions
+
+
+class View:
+    def __init__(self, status=200):
+        self.status = status
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return api.jsonify({'items': [1, 2, 3]}), self.status
+
+
+def call(view, path='/things', headers=None):
+    with api.app.test_request_context(path, headers=headers or {}):
+        return api.conditional('things')(view)()
+
+
+def test_first_request_gets_validators(versions):
+    view = View()
+    response = call(view)
+    assert response.status_code == 200
+    assert response.get_etag()[1] is True
+    assert response.last_modified is not None
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_matching_if_none_match_returns_304_without_running_view(versions):
+    view = View()
+    etag = call(view).headers['ETag']
+    response = call(view, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert view.calls == 1
+    assert response.headers['ETag'] == etag
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_bump_changes_etag(versions):
+    view = View()
+    etag = call(view).headers['ETag']
+    versions.bump('things')
+    response = call(view, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_etag_depends_on_query_string(versions):
+    view = View()
+    etag = call(view, '/things?gym_id=1').headers['ETag']
+    assert call(view, '/things?gym_id=2', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_if_modified_since(versions):
+    view = View()
+    last_modified = call(view).headers['Last-Modified']
+    response = call(view, headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+    assert 'Accept-Encoding' in response.vary
+
+    versions.bump('things')
+    assert call(view, headers={'If-Modified-Since': last_modified}).status_code == 200
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since(versions):
+    view = View()
+    last_modified = call(view).headers['Last-Modified']
+    response = call(view, headers={'If-None-Match': 'W/"other"', 'If-Modified-Since': last_modified})
+    assert response.status_code == 200
+
+
+def test_error_responses_get_no_validators(versions):
+    response = call(View(status=404))
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
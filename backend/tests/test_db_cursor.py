@@ -0,0 +1,200 @@
+import pytest
+
+pytest.importorskip('pyodbc', reason='pyodbc ve unixODBC gerekli', exc_type=ImportError)
+import app as api  # noqa: E402
+
+
+class ScriptedCursor:
+    """
+    Ham pyodbc cursor taklidi. reject_batches=True iken ';' içeren her SQL'i, sunucu tarafı
+    prepared statement kullanan bir sürücü gibi ProgrammingError ile reddeder.
+    """
+
+    def __init__(self, reject_batches=False, fail_inserts=False, rowcounts=None, max_results=None,
+                 fail_batch_at=None):
+        self.reject_batches = reject_batches
+        self.fail_batch_at = fail_batch_at
+        self.max_results = max_results
+        self.fail_inserts = fail_inserts
+        self.rowcounts = list(rowcounts or [])
+        self.executed = []
+        self.rowcount = -1
+        self.description = None
+        self._pending = []
+        self._row = None
+        self.last_id = 100
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        if ';' in sql and self.reject_batches:
+            raise api.pyodbc.ProgrammingError('42000', 'You have an error in your SQL syntax')
+        statements = [part.strip() for part in sql.split(';')]
+        results = []
+        for statement in statements:
+            if statement.startswith('INSERT'):
+                if self.fail_inserts:
+                    raise api.pyodbc.ProgrammingError('42S02', "Table doesn't exist")
+                self.last_id += 1
+                results.append(('count', 1))
+            elif statement == 'SELECT LAST_INSERT_ID()':
+                results.append(('row', (self.last_id,)))
+            else:
+                results.append(('count', self.rowcounts.pop(0) if self.rowcounts else 1))
+        # Bazı sürücüler batch'in tüm sonuç kümelerini döndürmez
+        self._pending = results[:self.max_results]
+        if self.fail_batch_at is not None and len(statements) > 1:
+            # MySQL gibi: hata veren ifadeye nextset() ile gelinince hata, sonrakiler çalışmaz
+            self._pending = self._pending[:self.fail_batch_at] + [('error', None)]
+        self._advance()
+
+    def _advance(self):
+        kind, value = self._pending.pop(0)
+        if kind == 'error':
+            self._pending = []
+            raise api.pyodbc.ProgrammingError('HY000', 'Statement failed inside batch')
+        if kind == 'count':
+            self.rowcount, self._row = value, None
+        else:
+            self.rowcount, self._row = -1, value
+
+    def nextset(self):
+        if not self._pending:
+            return False
+        self._advance()
+        return True
+
+    def fetchone(self):
+        row, self._row = self._row, None
+        return row
+
+
+@pytest.fixture(autouse=True)
+def reset_batching(monkeypatch):
+    monkeypatch.setattr(api.DictCursor, 'batching_rejected', False)
+
+
+def test_insert_uses_single_round_trip_on_multi_statement_connection():
+    raw = ScriptedCursor()
+    cursor = api.DictCursor(raw, multi_statements=True)
+    cursor.execute("INSERT INTO Gym (name) VALUES (%s)", ('A',))
+    assert cursor.lastrowid == 101
+    assert len(raw.executed) == 1
+    assert raw.executed[0][0].endswith('; SELECT LAST_INSERT_ID()')
+
+
+def test_insert_on_pooled_connection_sends_separate_select():
+    raw = ScriptedCursor()
+    cursor = api.DictCursor(raw)
+    cursor.execute("INSERT INTO Gym (name) VALUES (%s)", ('A',))
+    assert cursor.lastrowid == 101
+    assert cursor.rowcount == 1
+    assert [sql for sql, _ in raw.executed] == ["INSERT INTO Gym (name) VALUES (?)", "SELECT LAST_INSERT_ID()"]
+
+
+def test_insert_id_is_only_queried_when_read():
+    raw = ScriptedCursor()
+    cursor = api.DictCursor(raw)
+    cursor.execute("INSERT INTO Gym (name) VALUES (%s)", ('A',))
+    assert cursor.rowcount == 1
+    assert [sql for sql, _ in raw.executed] == ["INSERT INTO Gym (name) VALUES (?)"]
+
+    assert cursor.lastrowid == 101
+    assert cursor.lastrowid == 101
+    assert len(raw.executed) == 2
+
+
+def test_insert_batch_failing_after_insert_does_not_repeat_insert():
+    raw = ScriptedCursor(fail_batch_at=1)
+    cursor = api.DictCursor(raw, multi_statements=True)
+    cursor.execute("INSERT INTO Gym (name) VALUES (%s)", ('A',))
+    assert cursor.lastrowid == 101
+    assert sum(sql.startswith('INSERT') for sql, _ in raw.executed) == 1
+
+
+def test_rejected_insert_batch_falls_back_and_is_remembered():
+    raw = ScriptedCursor(reject_batches=True)
+    cursor = api.DictCursor(raw, multi_statements=True)
+    cursor.execute("INSERT INTO Gym (name) VALUES (%s)", ('A',))
+    assert cursor.lastrowid == 101
+    assert api.DictCursor.batching_rejected
+
+    # Sonraki INSERT'ler batch denemeden doğrudan tek ifadelik yoldan gider
+    raw.executed.clear()
+    api.DictCursor(raw, multi_statements=True).execute("INSERT INTO Gym (name) VALUES (%s)", ('B',))
+    assert all(';' not in sql for sql, _ in raw.executed)
+
+
+def test_insert_error_unrelated_to_batching_is_raised():
+    raw = ScriptedCursor(reject_batches=True, fail_inserts=True)
+    cursor = api.DictCursor(raw, multi_statements=True)
+    with pytest.raises(api.pyodbc.ProgrammingError):
+        cursor.execute("INSERT INTO Missing (name) VALUES (%s)", ('A',))
+    assert not api.DictCursor.batching_rejected
+
+
+def test_execute_batch_sends_one_statement_per_row_without_multi_statements():
+    raw = ScriptedCursor(rowcounts=[1, 0, 1])
+    cursor = api.DictCursor(raw)
+    counts = cursor.execute_batch("UPDATE Membership SET credit_used = credit_used + 1 WHERE member_id = %s",
+                                  [(1,), (2,), (3,)])
+    assert counts == [1, 0, 1]
+    assert len(raw.executed) == 3
+    assert cursor.rowcount == 2
+
+
+def test_execute_batch_groups_statements_on_multi_statement_connection():
+    raw = ScriptedCursor(rowcounts=[1, 0, 1])
+    cursor = api.DictCursor(raw, multi_statements=True)
+    counts = cursor.execute_batch("UPDATE Membership SET credit_used = credit_used + 1 WHERE member_id = %s",
+                                  [(1,), (2,), (3,)])
+    assert counts == [1, 0, 1]
+    assert len(raw.executed) == 1
+    assert raw.executed[0][1] == [1, 2, 3]
+
+
+def test_rejected_execute_batch_falls_back_to_single_statements():
+    raw = ScriptedCursor(reject_batches=True, rowcounts=[1, 1])
+    cursor = api.DictCursor(raw, multi_statements=True)
+    counts = cursor.execute_batch("UPDATE Membership SET credit_used = credit_used + 1 WHERE member_id = %s",
+                                  [(1,), (2,)])
+    assert counts == [1, 1]
+    assert api.DictCursor.batching_rejected
+
+
+def test_execute_batch_failing_mid_batch_replays_only_remaining_statements():
+    raw = ScriptedCursor(rowcounts=[1, 1, 1, 1], fail_batch_at=2)
+    cursor = api.DictCursor(raw, multi_statements=True)
+    counts = cursor.execute_batch("UPDATE Membership SET credit_used = credit_used + 1 WHERE member_id = %s",
+                                  [(1,), (2,), (3,), (4,)])
+    assert counts == [1, 1, 1, 1]
+    # İlk iki ifade batch içinde çalıştı; yalnızca 3 ve 4 tek tek tekrarlanır
+    assert [params for _, params in raw.executed[1:]] == [(3,), (4,)]
+    assert api.DictCursor.batching_rejected
+
+
+def test_execute_batch_with_missing_row_counts_raises_and_disables_batching():
+    raw = ScriptedCursor(rowcounts=[1, 1, 1], max_results=2)
+    cursor = api.DictCursor(raw, multi_statements=True)
+    with pytest.raises(api.BatchResultError):
+        cursor.execute_batch("UPDATE Membership SET credit_used = credit_used + 1 WHERE member_id = %s",
+                             [(1,), (2,), (3,)])
+    assert isinstance(api.BatchResultError(), api.pyodbc.Error)
+    assert api.DictCursor.batching_rejected
+
+    # Tekrar denemede (geri alınan transaction'dan sonra) ifadeler tek tek gider
+    raw = ScriptedCursor(rowcounts=[1, 0, 1])
+    counts = api.DictCursor(raw, multi_statements=True).execute_batch(
+        "UPDATE Membership SET credit_used = credit_used + 1 WHERE member_id = %s", [(1,), (2,), (3,)])
+    assert counts == [1, 0, 1]
+    assert len(raw.executed) == 3
+
+
+def test_insert_many_returns_row_count_not_ids():
+    raw = ScriptedCursor()
+    cursor = api.DictCursor(raw, multi_statements=True)
+    inserted = cursor.insert_many("INSERT INTO TurnstileEvent (gym_id, member_id) VALUES (%s, %s)",
+                                  [(1, 1), (1, 2), (1, 3)], batch_size=2)
+    assert len(raw.executed) == 2
+    assert raw.executed[0][0] == "INSERT INTO TurnstileEvent (gym_id, member_id) VALUES (?, ?), (?, ?)"
+    assert cursor.lastrowid is None
+    assert inserted == cursor.rowcount
@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip('pyodbc', reason='pyodbc ve unixODBC gerekli', exc_type=ImportError)
+import app as api  # noqa: E402
+
+
+ROWS = [
+    {'exercise_id': 1, 'name': 'Squat', 'muscle_group': 'Legs'},
+    {'exercise_id': 2, 'name': 'Bench Press', 'muscle_group': 'Chest'},
+    {'exercise_id': 3, 'name': 'Lunges', 'muscle_group': 'Legs'},
+    {'exercise_id': 4, 'name': 'bent-over row', 'muscle_group': 'Back'},
+    {'exercise_id': 5, 'name': 'Stretch', 'muscle_group': None},
+]
+
+
+@pytest.fixture
+def index():
+    return api.ExerciseIndex(ROWS)
+
+
+def ids(exercises):
+    return [e['exercise_id'] for e in exercises]
+
+
+def test_default_sort_puts_null_group_first_then_group_and_name(index):
+    assert ids(index.search()) == [5, 4, 2, 3, 1]
+    assert index.muscle_groups == [None, 'Back', 'Chest', 'Legs']
+
+
+def test_name_and_id_sorts(index):
+    assert ids(index.search(sort='name')) == [2, 4, 3, 1, 5]
+    assert ids(index.search(sort='id')) == [1, 2, 3, 4, 5]
+
+
+def test_muscle_group_filter(index):
+    assert ids(index.search(muscle_group='Legs')) == [3, 1]
+    assert ids(index.search(muscle_group='Legs', sort='id')) == [1, 3]
+    assert index.search(muscle_group='Arms') == []
+
+
+def test_prefix_search_is_case_insensitive(index):
+    assert ids(index.search(prefix='be', sort='name')) == [2, 4]
+    assert ids(index.search(prefix='BE', sort='id')) == [2, 4]
+    # Varsayılan sıralamada önce kas grubu gelir
+    assert ids(index.search(prefix='be')) == [4, 2]
+    assert index.search(prefix='xyz') == []
+
+
+def test_prefix_search_with_muscle_group(index):
+    assert ids(index.search(muscle_group='Legs', prefix='s')) == [1]
+    assert index.search(muscle_group='Chest', prefix='s') == []
+
+
+def test_by_id_lookup(index):
+    assert index.by_id[3]['name'] == 'Lunges'
+    assert 99 not in index.by_id
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('pyodbc', reason='pyodbc ve unixODBC gerekli', exc_type=ImportError)
+import app as api  # noqa: E402
+
+
+class HistoryConnection:
+    """_load'un turnike geçmişi sorgusuna sabit satırlar döner ve sorguları sayar."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def cursor(self):
+        return HistoryCursor(self)
+
+
+class HistoryCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.params = None
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append((sql, params))
+        self.params = params
+
+    def fetchall(self):
+        gym_ids = set(self.params[:-1] if isinstance(self.params[-1], datetime) else self.params)
+        return [row for row in self.conn.rows if row[0] in gym_ids]
+
+    def close(self):
+        pass
+
+
+def test_counter_is_built_from_history_once():
+    now = datetime.now()
+    conn = HistoryConnection([
+        (1, 10, 'in', now - timedelta(minutes=30)),
+        (1, 11, 'in', now - timedelta(minutes=20)),
+        (1, 10, 'out', now - timedelta(minutes=10)),
+        (2, 12, 'in', now - timedelta(minutes=5)),
+    ])
+    tracker = api.OccupancyTracker(expire_hours=4)
+    assert tracker.people_inside_many([1, 2, 3], conn) == {1: 1, 2: 1, 3: 0}
+    # Üç salon tek sorguyla kuruldu, sonraki okumalar bellekten
+    assert len(conn.queries) == 1
+    assert tracker.people_inside(1, conn) == 1
+    assert len(conn.queries) == 1
+
+
+def test_record_updates_loaded_gym():
+    tracker = api.OccupancyTracker(expire_hours=4)
+    conn = HistoryConnection([])
+    assert tracker.people_inside(1, conn) == 0
+    tracker.record(1, 10, 'in')
+    tracker.record(1, 11, 'in')
+    tracker.record(1, 10, 'out')
+    assert tracker.people_inside(1, conn) == 1
+    # Tekrarlanan giriş çift sayılmaz
+    tracker.record(1, 11, 'in')
+    assert tracker.loaded_count(1) == 1
+
+
+def test_record_for_unloaded_gym_is_ignored_until_load():
+    tracker = api.OccupancyTracker(expire_hours=4)
+    tracker.record(5, 10, 'in')
+    assert tracker.loaded_count(5) is None
+
+
+def test_entries_older_than_expiry_are_pruned():
+    tracker = api.OccupancyTracker(expire_hours=1)
+    now = datetime.now()
+    conn = HistoryConnection([
+        (1, 10, 'in', now - timedelta(minutes=50)),
+        (1, 11, 'in', now - timedelta(minutes=5)),
+    ])
+    assert tracker.people_inside(1, conn) == 2
+    # Çıkış okutmayan ilk üyenin girişi süreyi aştı
+    with tracker._lock:
+        tracker._inside[1][10] = now - timedelta(minutes=61)
+    assert tracker.people_inside(1, conn) == 1
+
+
+def test_history_query_is_bounded_by_expiry_window():
+    tracker = api.OccupancyTracker(expire_hours=2)
+    conn = HistoryConnection([])
+    tracker.people_inside(1, conn)
+    sql, params = conn.queries[0]
+    assert 'ts >=' in sql
+    assert params[-1] <= datetime.now() - timedelta(hours=2) + timedelta(seconds=5)
+
+
+def test_late_entry_older_than_expiry_does_not_count():
+    tracker = api.OccupancyTracker(expire_hours=1)
+    conn = HistoryConnection([])
+    tracker.people_inside(1, conn)
+    tracker.record(1, 10, 'in', datetime.now() - timedelta(hours=2))
+    assert tracker.loaded_count(1) == 0
+
+
+def test_no_expiry_keeps_entries_forever():
+    tracker = api.OccupancyTracker(expire_hours=0)
+    conn = HistoryConnection([(1, 10, 'in', datetime.now() - timedelta(days=30))])
+    assert tracker.people_inside(1, conn) == 1
+    assert 'ts >=' not in conn.queries[0][0]
@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('pyodbc', reason='pyodbc ve unixODBC gerekli', exc_type=ImportError)
+import app as api  # noqa: E402
+
+
+class FakeConnection:
+    """SELECT 1 sağlık kontrolünü ve rollback'i taklit eden ham bağlantı."""
+
+    def __init__(self):
+        self.broken = False
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise api.pyodbc.Error('bağlantı koptu')
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, *params):
+        if self.conn.broken:
+            raise api.pyodbc.Error('bağlantı koptu')
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+def make_pool(**kwargs):
+    opened = []
+
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    options = dict(min_size=0, max_size=2, timeout=0.05, max_idle=300.0, max_lifetime=1800.0)
+    options.update(kwargs)
+    return api.ConnectionPool(connect, **options), opened
+
+
+def test_acquire_times_out_when_pool_is_exhausted():
+    pool, _ = make_pool(max_size=1)
+    held = pool.acquire()
+    started = time.monotonic()
+    with pytest.raises(api.PoolTimeoutError):
+        pool.acquire()
+    assert time.monotonic() - started >= 0.05
+    stats = pool.stats()
+    assert stats['timeouts'] == 1
+    assert stats['in_use'] == 1
+    held.close()
+    assert pool.stats()['in_use'] == 0
+
+
+def test_waiting_acquire_gets_released_connection():
+    pool, opened = make_pool(max_size=1, timeout=2.0)
+    held = pool.acquire()
+    threading.Timer(0.05, held.close).start()
+    conn = pool.acquire()
+    assert len(opened) == 1
+    assert pool.stats()['waits'] == 1
+    conn.close()
+
+
+def test_broken_idle_connection_is_discarded_on_checkout():
+    pool, opened = make_pool()
+    conn = pool.acquire()
+    conn.close()
+    opened[0].broken = True
+
+    replacement = pool.acquire()
+    assert opened[0].closed
+    assert len(opened) == 2
+    stats = pool.stats()
+    assert stats['broken'] == 1
+    assert stats['total'] == 1
+    replacement.close()
+
+
+def test_connection_failing_rollback_on_release_is_discarded():
+    pool, opened = make_pool()
+    conn = pool.acquire()
+    opened[0].broken = True
+    conn.close()
+    stats = pool.stats()
+    assert opened[0].closed
+    assert stats['broken'] == 1
+    assert stats['idle'] == 0
+    assert stats['total'] == 0
+
+
+def test_double_close_returns_connection_once():
+    pool, _ = make_pool()
+    conn = pool.acquire()
+    conn.close()
+    conn.close()
+    stats = pool.stats()
+    assert stats['in_use'] == 0
+    assert stats['idle'] == 1
+
+
+def test_expired_idle_connection_is_recycled():
+    pool, opened = make_pool(max_idle=0.0)
+    pool.acquire().close()
+    time.sleep(0.01)
+    pool.acquire().close()
+    assert opened[0].closed
+    assert pool.stats()['recycled'] == 1
@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip('pyodbc', reason='pyodbc ve unixODBC gerekli', exc_type=ImportError)
+import app as api  # noqa: E402
+
+
+def fingerprint(sql):
+    return api.sql_fingerprint(sql)[1]
+
+
+def test_literals_and_placeholders_become_question_marks():
+    assert fingerprint("SELECT * FROM Member WHERE email = 'a@b.com' AND member_id = 42") == \
+        "SELECT * FROM Member WHERE email = ? AND member_id = ?"
+    assert fingerprint("SELECT * FROM Member WHERE name = 'O''Brien' AND rating > 4.5") == \
+        "SELECT * FROM Member WHERE name = ? AND rating > ?"
+    assert fingerprint("SELECT * FROM Member WHERE member_id = %s") == \
+        "SELECT * FROM Member WHERE member_id = ?"
+
+
+def test_whitespace_and_trailing_semicolon_are_normalized():
+    assert fingerprint("  SELECT  gym_id\n  FROM   Gym\n\tWHERE gym_id = %s ; ") == \
+        "SELECT gym_id FROM Gym WHERE gym_id = ?"
+
+
+def test_in_lists_of_any_length_collapse_to_one_fingerprint():
+    one = api.sql_fingerprint("SELECT * FROM Trainer WHERE trainer_id IN (%s)")
+    three = api.sql_fingerprint("SELECT * FROM Trainer WHERE trainer_id IN (%s, %s, %s)")
+    literals = api.sql_fingerprint("SELECT * FROM Trainer WHERE trainer_id in (1,2,3,4)")
+    assert one[1] == "SELECT * FROM Trainer WHERE trainer_id IN (?+)"
+    assert one[0] == three[0] == literals[0]
+
+
+def test_multi_row_values_collapse_to_one_group():
+    single = api.sql_fingerprint("INSERT INTO TurnstileEvent (gym_id, member_id) VALUES (%s, %s)")
+    multi = api.sql_fingerprint("INSERT INTO TurnstileEvent (gym_id, member_id) VALUES (%s, %s), (%s, %s), (%s, %s)")
+    assert multi[1] == "INSERT INTO TurnstileEvent (gym_id, member_id) VALUES (?, ?)+"
+    assert single[1] == "INSERT INTO TurnstileEvent (gym_id, member_id) VALUES (?, ?)"
+    assert single[0] != multi[0]
+    rows = ', '.join(['(%s, %s)'] * 50)
+    assert api.sql_fingerprint(f"INSERT INTO TurnstileEvent (gym_id, member_id) VALUES {rows}")[0] == multi[0]
+
+
+def test_identifiers_with_digits_are_kept():
+    assert fingerprint("SELECT * FROM TurnstileEvent_202501 WHERE event_id = 7") == \
+        "SELECT * FROM TurnstileEvent_202501 WHERE event_id = ?"
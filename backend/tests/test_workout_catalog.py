@@ -0,0 +1,168 @@
+import pytest
+
+pytest.importorskip('pyodbc', reason='pyodbc ve unixODBC gerekli', exc_type=ImportError)
+import app as api  # noqa: E402
+
+
+def row(fixed_id, gym_id, title, exercise_id=None, order_no=None):
+    return {'fixed_id': fixed_id, 'gym_id': gym_id, 'title': title, 'duration_min': 30,
+            'exercise_id': exercise_id, 'name': f'Ex{exercise_id}' if exercise_id else None,
+            'muscle_group': 'Legs' if exercise_id else None, 'order_no': order_no,
+            'sets': 3 if exercise_id else None, 'reps': 10 if exercise_id else None,
+            'rest_sec': 60 if exercise_id else None}
+
+
+class CatalogDatabase:
+    """WORKOUT_CATALOG_SQL'i kapsam (gym_id) bazında cevaplar ve yüklemeleri sayar."""
+
+    def __init__(self):
+        self.rows = [
+            row(1, None, 'Full Body', 10, 1), row(1, None, 'Full Body', 11, 2),
+            row(2, 7, 'Local A', 12, 1),
+            row(3, 8, 'Local B'),
+        ]
+        self.loads = []
+        self.lookups = []
+
+    def connect(self, *args, **kwargs):
+        return CatalogConnection(self)
+
+
+class CatalogConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, dictionary=False):
+        return CatalogCursor(self.db)
+
+    def close(self):
+        pass
+
+
+class CatalogCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, params):
+        if sql is api.WORKOUT_CATALOG_SQL:
+            self.db.loads.append(params[0])
+            self.result = [dict(r) for r in self.db.rows if r['gym_id'] == params[0]]
+        else:
+            self.db.lookups.append(params[0])
+            self.result = [{'gym_id': r['gym_id']} for r in self.db.rows if r['fixed_id'] == params[0]][:1]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = CatalogDatabase()
+    monkeypatch.setattr(api, 'get_db_connection', db.connect)
+    monkeypatch.setattr(api, 'resource_versions', api.ResourceVersions(('workouts',)))
+    return db
+
+
+@pytest.fixture
+def catalog(db):
+    cache = api.TTLCache('test-workouts', ttl=300)
+    cache.enabled = True
+    yield api.WorkoutCatalog(cache)
+    api.CACHES.pop('test-workouts', None)
+
+
+def test_gym_catalog_is_global_plus_own_scope_and_cached(catalog, db):
+    global_scope, gym_scope = catalog.for_gym(7)
+    assert [w['fixed_id'] for w in global_scope.summaries] == [1]
+    assert [w['fixed_id'] for w in gym_scope.summaries] == [2]
+    assert global_scope.admin_rows[0]['exercise_count'] == 2
+    catalog.for_gym(7)
+    assert db.loads == [None, 7]
+
+
+def test_workout_detail_keeps_exercise_order(catalog, db):
+    workout = catalog.workout(1)
+    assert [e['exercise_id'] for e in workout['exercises']] == [10, 11]
+    assert catalog.workout(3)['exercises'] == []
+    assert catalog.workout(99) is None
+
+
+def test_unknown_workout_looks_up_its_scope_once(catalog, db):
+    assert catalog.workout(2)['title'] == 'Local A'
+    assert catalog.workout(2)['title'] == 'Local A'
+    assert db.lookups == [2]
+    assert db.loads == [7]
+
+
+def test_invalidate_scope_reloads_only_that_scope(catalog, db):
+    catalog.for_gym(7)
+    catalog.for_gym(8)
+    version = api.resource_versions.get('workouts')[0]
+
+    catalog.invalidate_scope(7)
+    catalog.for_gym(7)
+    catalog.for_gym(8)
+    assert db.loads == [None, 7, 8, 7]
+    assert api.resource_versions.get('workouts')[0] == version + 1
+
+
+def test_invalidate_workout_reloads_its_own_scope(catalog, db):
+    catalog.for_gym(7)
+    db.rows[0]['title'] = db.rows[1]['title'] = 'Renamed'
+    catalog.invalidate_workout(1)
+    global_scope, _ = catalog.for_gym(7)
+    assert global_scope.by_id[1]['title'] == 'Renamed'
+    assert db.loads == [None, 7, None]
+
+
+def test_deleted_workout_is_forgotten(catalog, db):
+    catalog.for_gym(7)
+    db.rows = [r for r in db.rows if r['fixed_id'] != 2]
+    catalog.invalidate_workout(2, deleted=True)
+    assert catalog.workout(2) is None
+    assert db.lookups == [2]
+    assert db.loads == [None, 7]
+
+
+def test_invalidating_unknown_workout_only_bumps_version(catalog, db):
+    catalog.for_gym(None)
+    catalog.invalidate_workout(42)
+    catalog.for_gym(None)
+    assert db.loads == [None]
+    assert api.resource_versions.get('workouts')[0] == 1
+
+
+@pytest.fixture
+def app_catalog(db, monkeypatch):
+    """Uygulamanın workout_catalog'u yerine sahte veritabanlı bir katalog."""
+    cache = api.TTLCache('test-app-workouts', ttl=300)
+    cache.enabled = True
+    catalog = api.WorkoutCatalog(cache)
+    monkeypatch.setattr(api, 'workout_cache', cache)
+    monkeypatch.setitem(api.CACHE_INVALIDATORS, 'workouts', catalog.invalidate_all)
+    monkeypatch.setattr(api, 'resource_versions', api.ResourceVersions(('workouts', 'exercises', 'gyms')))
+    yield catalog
+    api.CACHES.pop('test-app-workouts', None)
+
+
+@pytest.mark.parametrize('name', ['exercises', 'workouts'])
+def test_invalidate_endpoint_clears_workout_scopes(app_catalog, db, name):
+    app_catalog.for_gym(7)
+    db.rows[0]['name'] = 'Renamed'
+    response = api.app.test_client().post(f'/api/admin/cache/{name}/invalidate')
+    assert response.status_code == 200
+    global_scope, _ = app_catalog.for_gym(7)
+    assert global_scope.by_id[1]['exercises'][0]['name'] == 'Renamed'
+    assert db.loads == [None, 7, None, 7]
+    assert api.resource_versions.get(name)[0] == 1
+
+
+def test_invalidate_endpoint_rejects_unknown_cache(db):
+    assert api.app.test_client().post('/api/admin/cache/nope/invalidate').status_code == 404